@@ -1,8 +1,16 @@
 from app.extensions.app_extensions import ApiRouter
 from app.api.v1.github_routes import router as github_router
+from app.api.v1.quota_routes import router as quota_router
+from app.api.v1.admin_routes import router as admin_router
+from app.api.v1.health_routes import router as health_router
+from app.api.v1.reviews_routes import router as reviews_router
 
 # Create the versioned API router and register all routes here
 _api_router = ApiRouter()
 _api_router.get_router().include_router(github_router)
+_api_router.get_router().include_router(quota_router)
+_api_router.get_router().include_router(admin_router)
+_api_router.get_router().include_router(health_router)
+_api_router.get_router().include_router(reviews_router)
 
 api_router = _api_router.get_router()
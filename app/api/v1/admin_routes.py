@@ -0,0 +1,4 @@
+from app.controllers.admin_controller import AdminController
+
+admin_controller = AdminController()
+router = admin_controller.router
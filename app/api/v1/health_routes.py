@@ -0,0 +1,4 @@
+from app.controllers.health_controller import HealthController
+
+health_controller = HealthController()
+router = health_controller.router
@@ -0,0 +1,4 @@
+from app.controllers.quota_controller import QuotaController
+
+quota_controller = QuotaController()
+router = quota_controller.router
@@ -0,0 +1,4 @@
+from app.controllers.reviews_controller import ReviewsController
+
+reviews_controller = ReviewsController()
+router = reviews_controller.router
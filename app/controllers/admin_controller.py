@@ -0,0 +1,55 @@
+import asyncio
+import hmac
+
+from fastapi import APIRouter, Header
+from fastapi.responses import JSONResponse
+from kombu.exceptions import OperationalError
+
+from app.core.logger import logger
+from app.core.settings import settings
+
+
+def admin_denied(authorization: str | None) -> JSONResponse | None:
+    """The error response for a request without a valid admin token, or None if it may proceed."""
+    if not settings.ADMIN_TOKEN:
+        return JSONResponse(status_code=404, content={"detail": "Not Found"})
+    expected = f"Bearer {settings.ADMIN_TOKEN}"
+    if not authorization or not hmac.compare_digest(authorization.encode(), expected.encode()):
+        return JSONResponse(status_code=401, content={"detail": "Invalid admin token"})
+    return None
+
+
+class AdminController:
+    """
+    Operator endpoints, guarded by `Authorization: Bearer <ADMIN_TOKEN>`.
+    While ADMIN_TOKEN is unset every route answers 404.
+    """
+
+    def __init__(self):
+        self.router = APIRouter(prefix="/admin", tags=["Admin"])
+        self._register_routes()
+
+    def _register_routes(self):
+        self.router.add_api_route(
+            "/profile",
+            self.profile,
+            methods=["POST"]
+        )
+
+    async def profile(self, tasks: int = 1, authorization: str | None = Header(default=None)):
+        """Arm the workers' sampling profiler for their next `tasks` tasks (0 disarms)."""
+        denied = admin_denied(authorization)
+        if denied is not None:
+            return denied
+        # The API only needs the Celery app for this route
+        from app.core.celery_app import celery
+        try:
+            # broadcast blocks while it collects replies; keep it off the event loop
+            replies = await asyncio.to_thread(
+                celery.control.broadcast, "profile_tasks", arguments={"tasks": tasks}, reply=True, timeout=1.0
+            )
+        except OperationalError as e:
+            logger.error("Failed to reach workers for profiling: %s", e)
+            return JSONResponse(status_code=503, content={"detail": "Broker unavailable"})
+        logger.info("Armed the profiler for %d tasks on %d workers", tasks, len(replies))
+        return {"tasks": tasks, "workers": {name: reply for r in replies for name, reply in r.items()}}
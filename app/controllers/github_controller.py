@@ -1,6 +1,26 @@
+from typing import Awaitable, Callable
+
 from fastapi import APIRouter, Request, Header
-from app.core.logger import logger
+from fastapi.responses import JSONResponse
+from pydantic import ValidationError
+from redis.exceptions import RedisError
+from app.controllers.admin_controller import admin_denied
+from app.core.logger import get_logger
+from app.core.settings import settings
+from app.infrastructure.task_publisher import task_publisher
+from app.models.github import REVIEW_ACTIONS, PullRequestPayload
+from app.services.github.delivery_dedup import DeliveryDeduplicator
+from app.services.github.event_queue import GitHubEventQueue
 from app.services.github.processor import GitHubEventProcessor
+from app.services.github.review_scheduler import review_scheduler
+from app.services.notifications.discord_dispatcher import discord_dispatcher
+from app.services.notifications.outbox import notification_outbox
+
+REVIEW_TASK_NAME = "app.tasks.review.process_pull_request_review"
+REVIEW_TICKET_TASK_NAME = "app.tasks.review.process_next_review"
+NOTIFICATION_TASK_NAME = "app.tasks.notifications.process_github_event"
+
+logger = get_logger("ingress")
 
 
 class GithubController:
@@ -9,6 +29,13 @@ class GithubController:
         self._register_routes()
         # Initialize the event processor Context once
         self.processor = GitHubEventProcessor()
+        # Bounded worker pool for everything that is not an AI review; started in the app lifespan
+        self.event_queue = GitHubEventQueue(
+            self.processor,
+            maxsize=settings.EVENT_QUEUE_SIZE,
+            workers=settings.EVENT_QUEUE_WORKERS,
+        )
+        self.deduplicator = DeliveryDeduplicator()
 
     def _register_routes(self):
         self.router.add_api_route(
@@ -23,24 +50,102 @@ class GithubController:
             methods=["POST"]
         )
 
+        self.router.add_api_route(
+            "/stats",
+            self.stats,
+            methods=["GET"]
+        )
+
     async def get(self):
         logger.debug("Health check 'Hello World' endpoint called")
         return {"message": "Hello World"}
 
-    async def webhook(self, request: Request, x_github_event: str = Header(None)):
-        logger.info(f"Processing webhook for event '{x_github_event}'")
-        
-        # Parse payload
-        payload = await request.json()
-        
-        # For PULL_REQUEST events, offload to the Celery queue (guaranteed delivery, ordered, retries)
-        if x_github_event in ["pull_request", "pull_request_review"]:
-            from app.tasks.review import process_pull_request_review
-            process_pull_request_review.delay(payload)
+    async def stats(self, authorization: str | None = Header(default=None)):
+        """Ingress, queue and per-tenant scheduling internals. Requires the admin token."""
+        denied = admin_denied(authorization)
+        if denied is not None:
+            return denied
+        try:
+            review_lanes = await review_scheduler.stats()
+        except RedisError as e:
+            review_lanes = {"error": str(e)}
+        return {
+            "enqueue": task_publisher.stats(),
+            "review_lanes": review_lanes,
+            "deduplication": self.deduplicator.stats(),
+            "event_queue": self.event_queue.stats(),
+            "notifications": {
+                "emitted": notification_outbox.emitted,
+                "outbox_errors": notification_outbox.outbox_errors,
+            },
+            "discord": discord_dispatcher.stats(),
+        }
+
+    async def webhook(
+        self,
+        request: Request,
+        x_github_event: str = Header(None),
+        x_github_delivery: str = Header(None),
+    ):
+        logger.info("Processing webhook for event '%s' (delivery %s)", x_github_event, x_github_delivery)
+
+        # Redeliveries (timeouts or a manual "Redeliver") must not trigger a second review
+        if settings.DELIVERY_DEDUP_ENABLED and not await self.deduplicator.claim(x_github_delivery):
+            return {"status": "duplicate"}
+
+        # Body was already read, verified and parsed once by GitHubWebhookMiddleware
+        payload = request.state.github_payload
+
+        # Only PR actions that need an AI review go to the single-concurrency review queue
+        needs_review = x_github_event == "pull_request" and payload.get("action") in REVIEW_ACTIONS
+
+        # The 200 goes out before the task is published; if publishing gives up, let a redelivery in
+        async def release() -> None:
+            await self.deduplicator.release(x_github_delivery)
+
+        if needs_review:
+            accepted = await self._enqueue_review(payload, release)
+        elif settings.NOTIFICATION_ROUTE == "celery":
+            accepted = task_publisher.enqueue(NOTIFICATION_TASK_NAME, args=(x_github_event, payload), on_failure=release)
         else:
-            # Fallback for generic unmapped events running locally in background
-            logger.info("Routing generic unmapped event to local event loop.")
-            import asyncio
-            asyncio.create_task(self.processor.process_event(x_github_event, payload))
-            
-        return {"status": "ok"}
\ No newline at end of file
+            accepted = self.event_queue.submit(x_github_event, payload)
+
+        if not accepted:
+            if not needs_review and settings.EVENT_QUEUE_OVERFLOW == "shed":
+                logger.warning("Shedding '%s' event, notification path is full", x_github_event)
+                return {"status": "dropped"}
+            # Let a later redelivery through since this one was never queued
+            await self.deduplicator.release(x_github_delivery)
+            return JSONResponse(status_code=503, content={"detail": "Event queue is full, retry later"})
+
+        return {"status": "ok"}
+
+    async def _enqueue_review(self, payload: dict, on_failure: Callable[[], Awaitable[None]]) -> bool:
+        """Queue a review in its size lane plus a ticket for it, or straight on the review queue."""
+        slim = self._slim_payload(payload)
+        if settings.REVIEW_LANES_ENABLED:
+            try:
+                job = await review_scheduler.submit(slim, review_scheduler.estimate_cost(payload))
+            except RedisError as e:
+                logger.warning("Review lanes unavailable, enqueueing the review directly: %s", e)
+            else:
+                async def cancel() -> None:
+                    # A job without a ticket would only run once another ticket happens to pick it
+                    await review_scheduler.cancel(job)
+                    await on_failure()
+
+                if task_publisher.enqueue(REVIEW_TICKET_TASK_NAME, on_failure=cancel):
+                    return True
+                await review_scheduler.cancel(job)
+                return False
+        # Buffered publish: the broker round trip happens off the event loop
+        return task_publisher.enqueue(REVIEW_TASK_NAME, args=(slim,), on_failure=on_failure)
+
+    @staticmethod
+    def _slim_payload(payload: dict) -> dict:
+        """Only ship the fields the review task reads through the broker."""
+        try:
+            return PullRequestPayload.project(payload)
+        except ValidationError as e:
+            logger.warning("Could not project pull request payload, enqueueing it in full: %d errors", e.error_count())
+            return payload
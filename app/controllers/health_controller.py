@@ -0,0 +1,35 @@
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+
+from app.services.health import health_monitor
+
+
+class HealthController:
+    """
+    Liveness and readiness for orchestrators. Both only read state kept by the background
+    probes in app/services/health.py, so they answer in constant time.
+    """
+
+    def __init__(self):
+        self.router = APIRouter(prefix="/health", tags=["Health"])
+        self._register_routes()
+
+    def _register_routes(self):
+        self.router.add_api_route(
+            "/live",
+            self.live,
+            methods=["GET"]
+        )
+
+        self.router.add_api_route(
+            "/ready",
+            self.ready,
+            methods=["GET"]
+        )
+
+    async def live(self):
+        return health_monitor.liveness()
+
+    async def ready(self):
+        ready, report = health_monitor.readiness()
+        return JSONResponse(status_code=200 if ready else 503, content=report)
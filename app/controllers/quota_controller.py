@@ -0,0 +1,57 @@
+from fastapi import APIRouter, Header
+from fastapi.responses import JSONResponse
+from redis.exceptions import RedisError
+
+from app.controllers.admin_controller import admin_denied
+from app.core.logger import logger
+from app.core.settings import settings
+from app.services.ai.quota import quota_manager
+
+
+class QuotaController:
+    """
+    Read-only view of the per-repository and per-installation LLM budgets, guarded by the
+    admin token like /admin (the budgets tell which repositories are active).
+    """
+
+    def __init__(self):
+        self.router = APIRouter(prefix="/quota", tags=["Quota"])
+        self._register_routes()
+
+    def _register_routes(self):
+        self.router.add_api_route(
+            "/repos/{owner}/{repo}",
+            self.repo_usage,
+            methods=["GET"]
+        )
+
+        self.router.add_api_route(
+            "/installations/{installation_id}",
+            self.installation_usage,
+            methods=["GET"]
+        )
+
+    async def repo_usage(self, owner: str, repo: str, authorization: str | None = Header(default=None)):
+        denied = admin_denied(authorization)
+        if denied is not None:
+            return denied
+        return await self._usage(f"{owner}/{repo}", None, scope="repo")
+
+    async def installation_usage(self, installation_id: int, authorization: str | None = Header(default=None)):
+        denied = admin_denied(authorization)
+        if denied is not None:
+            return denied
+        return await self._usage("", installation_id, scope="installation")
+
+    async def _usage(self, repo: str, installation_id, scope: str):
+        buckets = [b for b in quota_manager.buckets_for(repo, installation_id) if b.scope == scope]
+        try:
+            usage = await quota_manager.usage(buckets)
+        except RedisError as e:
+            logger.error("Failed to read quota usage: %s", e)
+            return JSONResponse(status_code=503, content={"detail": "Quota store unavailable"})
+        return {
+            "enabled": quota_manager.enabled,
+            "action": settings.QUOTA_EXCEEDED_ACTION,
+            "buckets": usage,
+        }
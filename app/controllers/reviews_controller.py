@@ -0,0 +1,68 @@
+from fastapi import APIRouter, Header
+
+from app.controllers.admin_controller import admin_denied
+from app.infrastructure.review_store import review_store
+
+# Page size cap for the history listings
+MAX_LIMIT = 200
+
+
+class ReviewsController:
+    """
+    Read access to the review history (app/infrastructure/review_store.py). Guarded by the
+    same admin token as /admin, so every route answers 404 while ADMIN_TOKEN is unset.
+    """
+
+    def __init__(self):
+        self.router = APIRouter(prefix="/reviews", tags=["Reviews"])
+        self._register_routes()
+
+    def _register_routes(self):
+        self.router.add_api_route(
+            "/stats",
+            self.stats,
+            methods=["GET"]
+        )
+
+        self.router.add_api_route(
+            "/repos/{owner}/{repo}",
+            self.repo_reviews,
+            methods=["GET"]
+        )
+
+        self.router.add_api_route(
+            "/repos/{owner}/{repo}/pulls/{number}",
+            self.pull_request_reviews,
+            methods=["GET"]
+        )
+
+    async def repo_reviews(self, owner: str, repo: str, pr_number: int | None = None, head_sha: str | None = None,
+                           before: int | None = None, limit: int = 50, authorization: str | None = Header(default=None)):
+        """Reviewed files of a repository, newest first. Pass the last `id` as `before` for the next page."""
+        denied = admin_denied(authorization)
+        if denied is not None:
+            return denied
+        limit = max(1, min(limit, MAX_LIMIT))
+        rows = await review_store.query(
+            f"{owner}/{repo}", pr_number=pr_number, head_sha=head_sha, before_id=before, limit=limit
+        )
+        return {"reviews": rows, "next_before": rows[-1]["id"] if len(rows) == limit else None}
+
+    async def pull_request_reviews(self, owner: str, repo: str, number: int, head_sha: str | None = None,
+                                   authorization: str | None = Header(default=None)):
+        """Every reviewed file of one pull request, including the full model answers."""
+        denied = admin_denied(authorization)
+        if denied is not None:
+            return denied
+        rows = await review_store.query(
+            f"{owner}/{repo}", pr_number=number, head_sha=head_sha, limit=MAX_LIMIT, with_review=True
+        )
+        return {"reviews": rows}
+
+    async def stats(self, repo: str | None = None, since: float | None = None,
+                    authorization: str | None = Header(default=None)):
+        """Files, tokens, latency and verdicts per provider and model; `since` is a Unix timestamp."""
+        denied = admin_denied(authorization)
+        if denied is not None:
+            return denied
+        return {"providers": await review_store.stats(repo=repo, since=since)}
@@ -1,4 +1,22 @@
+import asyncio
+import os
+import time
+from contextlib import ExitStack
+from typing import Dict
+
 from celery import Celery
+from celery.signals import (
+    before_task_publish,
+    task_postrun,
+    task_prerun,
+    worker_init,
+    worker_process_init,
+    worker_process_shutdown,
+)
+from celery.worker.control import control_command
+
+from app.core import metrics, profiling, tracing
+from app.core.metrics import TASK_QUEUE_WAIT_SECONDS
 from app.core.settings import settings
 
 # Initialize the Celery application
@@ -8,33 +26,190 @@ celery = Celery(
     broker=settings.CELERY_BROKER_URL,
     backend=settings.CELERY_RESULT_BACKEND,
     # Automatically discover tasks in the app.tasks package
-    include=['app.tasks.review']
+    include=['app.tasks.review', 'app.tasks.notifications']
 )
 
 
 # 1. Serialization
-celery.conf.task_serializer = "json"
+# JSON by default. msgpack (optionally with zlib/bzip2 compression) can be enabled through
+# settings to cut broker memory and AOF volume; workers always accept both so the format
+# can be switched without draining the queue first.
+celery.conf.task_serializer = settings.CELERY_TASK_SERIALIZER
+celery.conf.task_compression = settings.CELERY_TASK_COMPRESSION
 celery.conf.result_serializer = "json"
-celery.conf.accept_content = ["json"]
+celery.conf.accept_content = ["json", "msgpack"]
 
-# 2. Concurrency & Ordering
+# 2. Routing
+# AI reviews and notification-only events live on separate queues so they scale independently:
+# run the review worker with `-Q reviews` and the notification worker with `-Q notifications`.
+celery.conf.task_default_queue = "reviews"
+celery.conf.task_routes = {
+    "app.tasks.review.*": {"queue": "reviews"},
+    "app.tasks.notifications.*": {"queue": "notifications"},
+}
+
+# 3. Concurrency & Ordering
 # Ensure workers process ONE review at a time to prevent hammering AI APIs
 # worker_prefetch_multiplier=1 guarantees true FIFO ordering because workers
 # won't buffer tasks locally—they only take one when they are completely free.
 celery.conf.worker_concurrency = 1
 celery.conf.worker_prefetch_multiplier = 1
 
-# 3. Reliability & State Tracking
+# 4. Reliability & State Tracking
 # Only acknowledge a task as 'done' after it has successfully finished returning or raised.
 # If the worker crashes mid-review, the task is sent back to Redis and re-assigned.
 celery.conf.task_acks_late = True
 # Track when tasks start so we can monitor them in the Flower UI
 celery.conf.task_track_started = True
 
-# 4. Expirations & Timeouts
+# 5. Expirations & Timeouts
 # Hard kill tasks after 6 minutes to free up the worker
 celery.conf.task_time_limit = 360
 # Raise SoftTimeLimitExceeded after 5 minutes so the task can clean up or catch it gracefully
 celery.conf.task_soft_time_limit = 300
 # Only store results in Redis for 1 hour to prevent memory bloat
 celery.conf.result_expires = 3600
+
+# 6. Logging
+# Keep the app's queue-based handlers (app/core/logger.py) instead of Celery's own root logger setup,
+# so worker output gets the same JSON format, request IDs and sampling as the API.
+celery.conf.worker_hijack_root_logger = False
+
+# 7. Metrics
+# Queue wait is measured from the `enqueued_at` header (stamped by the API's task publisher, or at
+# publish time for anything sent with .delay()) to task start. Workers export on METRICS_WORKER_PORT.
+@before_task_publish.connect
+def _stamp_enqueued_at(headers=None, **kwargs):
+    if headers is not None:
+        headers.setdefault("enqueued_at", time.time())
+
+
+@task_prerun.connect
+def _observe_queue_wait(task=None, **kwargs):
+    enqueued_at = getattr(task.request, "enqueued_at", None)
+    if enqueued_at:
+        TASK_QUEUE_WAIT_SECONDS.labels(task=task.name.rsplit(".", 1)[-1]).observe(max(0.0, time.time() - enqueued_at))
+
+
+@worker_init.connect
+def _start_metrics_in_main_process(**kwargs):
+    # With a multiprocess dir the main process aggregates what every pool process writes
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        metrics.start_worker_exporter()
+
+
+@worker_process_init.connect
+def _start_metrics_in_pool_process(**kwargs):
+    if not os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        metrics.start_worker_exporter()
+
+
+@worker_process_shutdown.connect
+def _mark_pool_process_dead(pid=None, **kwargs):
+    metrics.mark_process_dead(pid or os.getpid())
+
+
+# 8. Tracing
+# The trace parent and request ID travel in task headers (see app/core/tracing.py), so worker
+# spans and logs join the webhook that enqueued the task. Each pool process sets up its own
+# exporter because the span export thread does not survive the fork.
+_task_spans: Dict[str, ExitStack] = {}
+
+
+@before_task_publish.connect
+def _inject_trace_headers(headers=None, **kwargs):
+    if headers is not None:
+        for key, value in tracing.inject().items():
+            headers.setdefault(key, value)
+
+
+@task_prerun.connect
+def _continue_trace(task_id=None, task=None, **kwargs):
+    carrier = {
+        key: getattr(task.request, key)
+        for key in ("traceparent", "tracestate", tracing.REQUEST_ID_KEY)
+        if getattr(task.request, key, None)
+    }
+    stack = ExitStack()
+    stack.enter_context(tracing.continued(carrier, f"celery {task.name}", **{"celery.task_id": task_id}))
+    _task_spans[task_id] = stack
+
+
+@task_postrun.connect
+def _end_trace(task_id=None, **kwargs):
+    stack = _task_spans.pop(task_id, None)
+    if stack is not None:
+        stack.close()
+
+
+@worker_process_init.connect
+def _setup_tracing_in_pool_process(**kwargs):
+    tracing.setup_tracing("chief-worker")
+
+
+@worker_process_shutdown.connect
+def _flush_traces(**kwargs):
+    tracing.shutdown_tracing()
+
+
+# 9. Profiling
+# Every task runs under a stage timer (see app/core/profiling.py). The sampling profiler is armed
+# for the next N tasks with `celery -A app.core.celery_app control profile_tasks N`, or through
+# POST /admin/profile on the API, which broadcasts the same command.
+_task_profiles: Dict[str, ExitStack] = {}
+
+
+@control_command(args=[("tasks", int)], signature="<tasks>")
+def profile_tasks(state, tasks=1):
+    """Write a collapsed-stack profile for each of the next N tasks (0 disarms)."""
+    return {"ok": f"profiling the next {profiling.arm(tasks)} tasks"}
+
+
+@task_prerun.connect
+def _start_profile(task_id=None, task=None, **kwargs):
+    stack = ExitStack()
+    stack.enter_context(profiling.profiled(task.name, task_id))
+    _task_profiles[task_id] = stack
+
+
+@task_postrun.connect
+def _end_profile(task_id=None, **kwargs):
+    stack = _task_profiles.pop(task_id, None)
+    if stack is not None:
+        stack.close()
+
+
+@worker_process_init.connect
+def _start_tracemalloc_in_pool_process(**kwargs):
+    profiling.start_tracemalloc()
+
+
+# 10. Prewarm
+# Provider SDKs are imported once before the pool forks; each pool process then builds its
+# clients and fetches tokens before it takes a task (see app/tasks/prewarm.py). Celery waits
+# worker_proc_alive_timeout for a new pool process, so leave room for the token fetches.
+if settings.WORKER_PREWARM:
+    celery.conf.worker_proc_alive_timeout = max(4.0, settings.WORKER_PREWARM_TIMEOUT + 5.0)
+
+
+@worker_init.connect
+def _prewarm_imports(**kwargs):
+    if settings.WORKER_PREWARM:
+        from app.tasks import prewarm
+        prewarm.import_providers()
+
+
+@worker_process_init.connect
+def _prewarm_pool_process(**kwargs):
+    if settings.WORKER_PREWARM:
+        from app.tasks import prewarm
+        prewarm.warm_process()
+
+
+# 11. Review history
+# Rows older than REVIEW_HISTORY_RETENTION_DAYS are deleted when a worker starts, before the
+# pool forks (see app/infrastructure/review_store.py).
+@worker_init.connect
+def _prune_review_history(**kwargs):
+    from app.infrastructure.review_store import review_store
+    asyncio.run(review_store.prune())
@@ -1,15 +1,20 @@
+import atexit
+import copy
 import logging
-import sys
-from logging.handlers import RotatingFileHandler
+import os
+import queue
+import random
+import time
+from contextvars import ContextVar
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from pathlib import Path
+from typing import Dict
 
-from rich.logging import RichHandler
+import orjson
+from opentelemetry import trace
 
 from app.core.settings import settings
 
-
-from contextvars import ContextVar
-
 # Create logs directory if it doesn't exist
 LOGS_DIR = Path("logs")
 LOGS_DIR.mkdir(exist_ok=True)
@@ -18,55 +23,132 @@ LOGS_DIR.mkdir(exist_ok=True)
 request_id_ctx_var: ContextVar[str] = ContextVar("request_id", default="-")
 
 class RequestIdFilter(logging.Filter):
-    """Injects request_id from contextvars into log records."""
+    """Attaches request_id (and the active trace_id) from contextvars to every record as fields."""
     def filter(self, record):
-        req_id = request_id_ctx_var.get()
-        if req_id != "-":
-            # Prefix the actual message so RichHandler prints it on the console
-            record.msg = f"[{req_id}] {record.msg}"
+        record.request_id = request_id_ctx_var.get()
+        span_context = trace.get_current_span().get_span_context()
+        record.trace_id = format(span_context.trace_id, "032x") if span_context.is_valid else "-"
         return True
 
-# Define log format for files
-FILE_LOG_FORMAT = logging.Formatter(
-    "%(asctime)s | %(levelname)-8s | %(name)s:%(funcName)s:%(lineno)d - %(message)s"
-)
+class SamplingFilter(logging.Filter):
+    """
+    Keeps only a fraction of INFO-and-below records for the configured loggers.
+    Rates match on logger name prefix, e.g. {"chief_webhooks.ingress": 0.1}.
+    Warnings and errors are never sampled out.
+    """
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        self.rates = rates
+        self._cache: Dict[str, float] = {}
+
+    def _rate_for(self, name: str) -> float:
+        rate = self._cache.get(name)
+        if rate is None:
+            matches = [prefix for prefix in self.rates if name == prefix or name.startswith(prefix + ".")]
+            rate = self.rates[max(matches, key=len)] if matches else 1.0
+            self._cache[name] = rate
+        return rate
+
+    def filter(self, record):
+        if record.levelno > logging.INFO or not self.rates:
+            return True
+        rate = self._rate_for(record.name)
+        return rate >= 1.0 or random.random() < rate
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line with request_id as a structured field."""
+    def format(self, record):
+        entry = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created)) + f".{int(record.msecs):03d}Z",
+            "level": record.levelname,
+            "logger": record.name,
+            "request_id": getattr(record, "request_id", "-"),
+            "trace_id": getattr(record, "trace_id", "-"),
+            "message": record.getMessage(),
+            "func": record.funcName,
+            "line": record.lineno,
+        }
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return orjson.dumps(entry).decode()
+
+class _RecordQueueHandler(QueueHandler):
+    """
+    Hands records to the listener thread. The message is merged on the caller thread
+    (args may be mutated after the call returns), while exc_info is kept intact so
+    tracebacks are rendered by the listener, off the event loop.
+    """
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+def _parse_sample_rates(raw: str) -> Dict[str, float]:
+    rates = {}
+    for item in filter(None, (part.strip() for part in raw.split(","))):
+        name, _, rate = item.partition("=")
+        rates[name.strip()] = float(rate)
+    return rates
 
 def setup_logger() -> logging.Logger:
-    """Configure and return the application logger."""
-    
-    # Determine log level based on environment (you can add a setting for this)
-    # Default to INFO, but allow overriding via environment variables if added later
-    log_level = logging.INFO
-    
-    # Configure the root logger
-    logging.basicConfig(
-        level=log_level,
-        format="%(name)s:%(funcName)s:%(lineno)d - %(message)s",
-        datefmt="[%X]",
-        handlers=[
-            RichHandler(
-                rich_tracebacks=True,
-                markup=True,
-                show_time=True,
-                show_level=True,
-                show_path=False # We handle path in the format
-            )
-        ],
-    )
+    """
+    Configure and return the application logger.
 
-    logger = logging.getLogger("chief_webhooks")
-    logger.addFilter(RequestIdFilter())
+    Every record goes through a QueueHandler; console and file I/O happen on a
+    QueueListener thread so logging never stalls the event loop.
+    """
+    log_level = getattr(logging, settings.LOG_LEVEL.upper(), logging.INFO)
+
+    if settings.ENVIRONMENT == "development":
+        # Pretty console output only for local development; rich is slow to import, so only here
+        from rich.logging import RichHandler
+        console_handler = RichHandler(
+            rich_tracebacks=True,
+            markup=False,
+            show_time=True,
+            show_level=True,
+            show_path=False # We handle path in the format
+        )
+        console_handler.setFormatter(logging.Formatter(
+            "[%(request_id)s] %(name)s:%(funcName)s:%(lineno)d - %(message)s", datefmt="[%X]"
+        ))
+    else:
+        console_handler = logging.StreamHandler()
+        console_handler.setFormatter(JsonFormatter())
 
-    # Add Rotating File Handler (10MB per file, keep 5 backups)
+    # Add Rotating File Handler (10MB per file, keep 5 backups) for application records
     file_handler = RotatingFileHandler(
         LOGS_DIR / "app.log", maxBytes=10 * 1024 * 1024, backupCount=5
     )
-    file_handler.setFormatter(FILE_LOG_FORMAT)
-    file_handler.setLevel(log_level)
-    
-    # Avoid adding multiple handlers if setup_logger is called multiple times
-    if not logger.handlers:
-        logger.addHandler(file_handler)
+    file_handler.setFormatter(JsonFormatter())
+    file_handler.addFilter(logging.Filter("chief_webhooks"))
+
+    queue_handler = _RecordQueueHandler(queue.SimpleQueue())
+    queue_handler.addFilter(RequestIdFilter())
+    queue_handler.addFilter(SamplingFilter(_parse_sample_rates(settings.LOG_SAMPLE_RATES)))
+
+    listener = QueueListener(queue_handler.queue, console_handler, file_handler, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+
+    def _restart_listener_in_child():
+        # Forked Celery pool processes inherit the handler but not the listener thread
+        nonlocal listener
+        queue_handler.queue = queue.SimpleQueue()
+        listener = QueueListener(queue_handler.queue, console_handler, file_handler, respect_handler_level=True)
+        listener.start()
+        atexit.register(listener.stop)
+
+    os.register_at_fork(after_in_child=_restart_listener_in_child)
+
+    # Route everything (including third-party loggers) through the queue
+    root = logging.getLogger()
+    root.handlers = [queue_handler]
+    root.setLevel(log_level)
+
+    logger = logging.getLogger("chief_webhooks")
+    logger.setLevel(log_level)
 
     # Set third-party loggers to WARNING to avoid noise
     logging.getLogger("uvicorn.access").setLevel(logging.WARNING)
@@ -77,3 +159,7 @@ def setup_logger() -> logging.Logger:
 
 # Create a global logger instance to be imported across the app
 logger = setup_logger()
+
+def get_logger(name: str) -> logging.Logger:
+    """Child of the application logger, e.g. get_logger("ingress") -> "chief_webhooks.ingress"."""
+    return logger.getChild(name)
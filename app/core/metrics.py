@@ -0,0 +1,233 @@
+"""
+Prometheus metrics shared by the API and the Celery workers.
+
+The API serves them at /metrics. Workers expose them on METRICS_WORKER_PORT; with
+PROMETHEUS_MULTIPROC_DIR set (required for --concurrency > 1) every pool process
+writes to that directory and the exporter in the worker's main process aggregates them.
+The directory must exist and be empty when the worker starts (docker-compose mounts a tmpfs).
+"""
+import os
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    REGISTRY,
+    generate_latest,
+    multiprocess,
+    start_http_server,
+)
+from starlette.requests import Request
+from starlette.responses import Response
+
+from app.core.logger import logger
+from app.core.settings import settings
+
+# Fast in-process stages (HMAC, buffer handoff) vs network calls vs whole reviews
+FAST_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1)
+REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+PROVIDER_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0)
+QUEUE_WAIT_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 15.0, 30.0, 60.0, 300.0, 900.0, 3600.0)
+REVIEW_BUCKETS = (1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0, 180.0, 300.0, 360.0)
+
+# --- Ingress ---
+WEBHOOK_INGRESS_SECONDS = Histogram(
+    "webhook_ingress_seconds",
+    "Time from receiving a webhook to sending the response",
+    ["event", "status"],
+    buckets=REQUEST_BUCKETS,
+)
+HMAC_VERIFY_SECONDS = Histogram(
+    "webhook_hmac_verify_seconds",
+    "Time spent computing and comparing the webhook signature",
+    buckets=FAST_BUCKETS,
+)
+ENQUEUE_SECONDS = Histogram(
+    "task_enqueue_seconds",
+    "Time from handing a task to the publisher until the broker accepted it",
+    ["task"],
+    buckets=REQUEST_BUCKETS,
+)
+WEBHOOK_DUPLICATES_DROPPED = Counter(
+    "webhook_duplicate_deliveries_total",
+    "Webhook deliveries dropped because their X-GitHub-Delivery was already claimed",
+)
+ENQUEUE_BUFFER_DEPTH = Gauge(
+    "task_enqueue_buffer_depth",
+    "Tasks waiting in the in-memory publish buffer",
+    multiprocess_mode="livesum",
+)
+EVENT_QUEUE_DEPTH = Gauge(
+    "github_event_queue_depth",
+    "Notification events waiting in the in-process GitHub event queue",
+    multiprocess_mode="livesum",
+)
+EVENT_QUEUE_WAIT_SECONDS = Histogram(
+    "github_event_queue_wait_seconds",
+    "Time a notification event waited in the GitHub event queue before a worker took it",
+    ["event"],
+    buckets=QUEUE_WAIT_BUCKETS,
+)
+EVENT_QUEUE_RUN_SECONDS = Histogram(
+    "github_event_queue_run_seconds",
+    "Time the GitHub event queue spent processing one notification event",
+    ["event", "outcome"],
+    buckets=REQUEST_BUCKETS,
+)
+
+# --- Workers ---
+TASK_QUEUE_WAIT_SECONDS = Histogram(
+    "task_queue_wait_seconds",
+    "Time from enqueue until a worker started the task",
+    ["task"],
+    buckets=QUEUE_WAIT_BUCKETS,
+)
+TASK_STAGE_SECONDS = Histogram(
+    "task_stage_seconds",
+    "Self time per profiled stage of a task (app/core/profiling.py), plus its total and unattributed time",
+    ["task", "stage"],
+    buckets=PROVIDER_BUCKETS,
+)
+REVIEW_LANE_WAIT_SECONDS = Histogram(
+    "review_lane_wait_seconds",
+    "Time a review job spent in its scheduling lane before a worker claimed it",
+    ["lane"],
+    buckets=QUEUE_WAIT_BUCKETS,
+)
+REVIEW_TENANT_WAIT_SECONDS = Histogram(
+    "review_tenant_wait_seconds",
+    "Time a review job waited before a worker claimed it, per tenant with a configured weight (others are 'other')",
+    ["tenant"],
+    buckets=QUEUE_WAIT_BUCKETS,
+)
+REVIEW_LANE_CLAIMS = Counter(
+    "review_lane_claims_total",
+    "Review jobs claimed per lane, by why the lane was picked (weighted, aged, resumed)",
+    ["lane", "reason"],
+)
+REVIEW_DURATION_SECONDS = Histogram(
+    "review_duration_seconds",
+    "End-to-end duration of one pull request review",
+    ["verdict"],
+    buckets=REVIEW_BUCKETS,
+)
+REVIEW_OUTCOMES = Counter(
+    "review_outcomes_total",
+    "Finished pull request reviews by verdict",
+    ["verdict"],
+)
+REVIEW_CASCADE_FILES = Counter(
+    "review_cascade_files_total",
+    "Files routed by the review cascade, by tier outcome (triaged, escalated, skipped, triage_error, reviewed)",
+    ["outcome"],
+)
+
+# --- AI providers ---
+PROVIDER_LATENCY_SECONDS = Histogram(
+    "ai_provider_latency_seconds",
+    "Latency of a single provider call (one file)",
+    ["provider", "model", "kind", "outcome"],
+    buckets=PROVIDER_BUCKETS,
+)
+PROVIDER_TOKENS = Counter(
+    "ai_provider_tokens_total",
+    "Tokens sent to and received from AI providers",
+    ["provider", "model", "direction"],
+)
+PROVIDER_RATE_LIMITED = Counter(
+    "ai_provider_rate_limited_total",
+    "Provider calls answered with 429, by whether they were retried or gave up",
+    ["provider", "model", "action"],
+)
+
+# --- Caches ---
+CACHE_REQUESTS = Counter(
+    "cache_requests_total",
+    "Cache lookups by cache name and result (hit or miss)",
+    ["cache", "result"],
+)
+
+# --- GitHub API ---
+GITHUB_API_SECONDS = Histogram(
+    "github_api_request_seconds",
+    "Latency of GitHub REST API calls",
+    ["method", "endpoint", "status"],
+    buckets=REQUEST_BUCKETS,
+)
+GITHUB_RATE_LIMIT_REMAINING = Gauge(
+    "github_rate_limit_remaining",
+    "X-RateLimit-Remaining from the latest GitHub response",
+    ["resource"],
+    multiprocess_mode="mostrecent",
+)
+
+# --- Health probes (refreshed in the background by app/services/health.py) ---
+HEALTH_PROBE_UP = Gauge(
+    "health_probe_up",
+    "1 if the latest run of a dependency probe succeeded, 0 otherwise",
+    ["probe"],
+    multiprocess_mode="mostrecent",
+)
+HEALTH_PROBE_SECONDS = Gauge(
+    "health_probe_latency_seconds",
+    "Latency of the latest run of a dependency probe",
+    ["probe"],
+    multiprocess_mode="mostrecent",
+)
+BROKER_QUEUE_DEPTH = Gauge(
+    "celery_queue_depth",
+    "Messages waiting in a Celery queue, from the latest broker probe",
+    ["queue"],
+    multiprocess_mode="mostrecent",
+)
+
+
+def record_cache(cache: str, hit: bool) -> None:
+    CACHE_REQUESTS.labels(cache=cache, result="hit" if hit else "miss").inc()
+
+
+def record_github_call(method: str, endpoint: str, status: str, seconds: float, headers=None) -> None:
+    """Observe one GitHub API call. `endpoint` is the path template, never the concrete URL."""
+    GITHUB_API_SECONDS.labels(method=method, endpoint=endpoint, status=status).observe(seconds)
+    remaining = headers.get("X-RateLimit-Remaining") if headers is not None else None
+    if remaining is not None:
+        GITHUB_RATE_LIMIT_REMAINING.labels(resource=headers.get("X-RateLimit-Resource", "core")).set(int(remaining))
+
+
+def _multiprocess_dir() -> str | None:
+    return os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+
+
+def _registry() -> CollectorRegistry:
+    if _multiprocess_dir():
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return REGISTRY
+
+
+async def metrics_endpoint(request: Request) -> Response:
+    """Serves the Prometheus exposition format at /metrics."""
+    return Response(generate_latest(_registry()), media_type=CONTENT_TYPE_LATEST)
+
+
+def start_worker_exporter() -> None:
+    """Serve worker metrics over HTTP on METRICS_WORKER_PORT (0 disables it)."""
+    if settings.METRICS_WORKER_PORT <= 0:
+        return
+    try:
+        start_http_server(settings.METRICS_WORKER_PORT, registry=_registry())
+        logger.info("Worker metrics exporter listening on :%d", settings.METRICS_WORKER_PORT)
+    except OSError as e:
+        logger.warning(
+            "Worker metrics exporter could not bind :%d (%s). Set PROMETHEUS_MULTIPROC_DIR when running "
+            "more than one pool process", settings.METRICS_WORKER_PORT, e
+        )
+
+
+def mark_process_dead(pid: int) -> None:
+    if _multiprocess_dir():
+        multiprocess.mark_process_dead(pid)
+
@@ -0,0 +1,235 @@
+"""
+Per-task profiling for Celery workers.
+
+Three tools, from always-on to on-demand:
+  - StageTimer: every task gets one. Code marks its stages with `with stage("name"):` and the
+    timer records self time per stage (time spent in nested stages is attributed to those),
+    so the breakdown adds up to the task's wall time plus an "unattributed" remainder.
+    Outside a task `stage()` does nothing.
+  - tracemalloc (PROFILE_TRACEMALLOC=true): peak memory and the top allocation sites per task.
+  - StackSampler: a wall-clock sampling profiler armed for the next N tasks through the
+    `profile_tasks` Celery control command (or POST /admin/profile on the API). It writes
+    one collapsed-stack file per task to PROFILE_DIR, ready for flamegraph.pl or speedscope.
+    While disarmed no thread runs; each task start only reads a shared counter.
+"""
+import multiprocessing
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Any, Dict, Iterator, List, Optional
+
+from app.core.logger import logger
+from app.core.metrics import TASK_STAGE_SECONDS
+from app.core.settings import settings
+
+# Tasks left to profile. Created at import, i.e. in the worker's main process before the pool
+# forks, so the control command (handled by the main process) and every pool process share it.
+_armed = multiprocessing.Value("i", 0)
+
+
+class _Frame:
+    __slots__ = ("children",)
+
+    def __init__(self):
+        self.children = 0.0
+
+
+class StageTimer:
+    """Self time and call count per named stage of one task."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages: Dict[str, List[float]] = {}
+        self.memory: Optional[Dict[str, Any]] = None
+
+    def add(self, name: str, seconds: float) -> None:
+        entry = self.stages.get(name)
+        if entry is None:
+            self.stages[name] = [seconds, 1]
+        else:
+            entry[0] += seconds
+            entry[1] += 1
+
+    def summary(self) -> Dict[str, Any]:
+        wall = time.perf_counter() - self.started
+        attributed = sum(seconds for seconds, _ in self.stages.values())
+        report: Dict[str, Any] = {
+            "wall_seconds": round(wall, 4),
+            "stages": {
+                name: {"seconds": round(seconds, 4), "calls": int(calls)}
+                for name, (seconds, calls) in sorted(self.stages.items(), key=lambda item: -item[1][0])
+            },
+            "unattributed_seconds": round(max(0.0, wall - attributed), 4),
+        }
+        if self.memory is not None:
+            report["memory"] = self.memory
+        return report
+
+    def format(self) -> str:
+        summary = self.summary()
+        parts = [f"total={summary['wall_seconds']:.3f}s"]
+        parts += [f"{name}={s['seconds']:.3f}s/{s['calls']}" for name, s in summary["stages"].items()]
+        parts.append(f"unattributed={summary['unattributed_seconds']:.3f}s")
+        if self.memory is not None:
+            parts.append(f"peak_memory={self.memory['peak_bytes'] / 2 ** 20:.1f}MiB")
+        return " ".join(parts)
+
+
+_timer: ContextVar[Optional[StageTimer]] = ContextVar("stage_timer", default=None)
+_frame: ContextVar[Optional[_Frame]] = ContextVar("stage_frame", default=None)
+
+
+def current_timer() -> Optional[StageTimer]:
+    return _timer.get()
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Attribute the block's time to `name` on the current task's timer, if any."""
+    timer = _timer.get()
+    if timer is None:
+        yield
+        return
+    parent = _frame.get()
+    frame = _Frame()
+    token = _frame.set(frame)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        _frame.reset(token)
+        timer.add(name, max(0.0, elapsed - frame.children))
+        if parent is not None:
+            parent.children += elapsed
+
+
+@lru_cache(maxsize=4096)
+def _short_path(filename: str) -> str:
+    for root in sorted((p for p in sys.path if p), key=len, reverse=True):
+        if filename.startswith(root + os.sep):
+            return filename[len(root) + 1:]
+    return filename
+
+
+class StackSampler:
+    """Samples one thread's stack every `interval` seconds and counts collapsed stacks."""
+
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({_short_path(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                self.samples[";".join(reversed(stack))] += 1
+
+    def write(self, path: str) -> None:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+def arm(tasks: int) -> int:
+    """Profile the next `tasks` tasks (0 disarms). Returns the new count."""
+    with _armed.get_lock():
+        _armed.value = max(0, tasks)
+        return _armed.value
+
+
+def armed() -> int:
+    return _armed.value
+
+
+def _claim() -> bool:
+    if _armed.value <= 0:
+        return False
+    with _armed.get_lock():
+        if _armed.value <= 0:
+            return False
+        _armed.value -= 1
+        return True
+
+
+def start_tracemalloc() -> None:
+    if settings.PROFILE_TRACEMALLOC and not tracemalloc.is_tracing():
+        tracemalloc.start(settings.PROFILE_TRACEMALLOC_FRAMES)
+        logger.info("tracemalloc enabled (%d frames)", settings.PROFILE_TRACEMALLOC_FRAMES)
+
+
+def _observe(task_name: str, summary: Dict[str, Any]) -> None:
+    task = task_name.rsplit(".", 1)[-1]
+    TASK_STAGE_SECONDS.labels(task=task, stage="total").observe(summary["wall_seconds"])
+    TASK_STAGE_SECONDS.labels(task=task, stage="unattributed").observe(summary["unattributed_seconds"])
+    for name, entry in summary["stages"].items():
+        TASK_STAGE_SECONDS.labels(task=task, stage=name).observe(entry["seconds"])
+
+
+@contextmanager
+def profiled(task_name: str, task_id: str) -> Iterator[StageTimer]:
+    """Run one task with a stage timer, plus memory tracking and stack sampling when enabled."""
+    timer = StageTimer()
+    timer_token = _timer.set(timer)
+    frame_token = _frame.set(None)
+
+    snapshot = None
+    if tracemalloc.is_tracing():
+        tracemalloc.reset_peak()
+        snapshot = tracemalloc.take_snapshot()
+
+    sampler = None
+    if _claim():
+        sampler = StackSampler(threading.get_ident(), settings.PROFILE_SAMPLE_INTERVAL_MS / 1000)
+        sampler.start()
+
+    try:
+        yield timer
+    finally:
+        if sampler is not None:
+            sampler.stop()
+            path = os.path.join(settings.PROFILE_DIR, f"{task_name.rsplit('.', 1)[-1]}-{task_id}.folded")
+            try:
+                sampler.write(path)
+                logger.info("Wrote %d stack samples for task %s to %s", sum(sampler.samples.values()), task_id, path)
+            except OSError as e:
+                logger.error("Failed to write profile for task %s: %s", task_id, e)
+
+        if snapshot is not None:
+            stats = tracemalloc.take_snapshot().compare_to(snapshot, "lineno")
+            timer.memory = {
+                "peak_bytes": tracemalloc.get_traced_memory()[1],
+                "top_allocations": [str(stat) for stat in stats[:settings.PROFILE_TRACEMALLOC_TOP]],
+            }
+
+        if timer.stages:
+            logger.info("Task %s stage timings: %s", task_id, timer.format())
+            _observe(task_name, timer.summary())
+        if timer.memory is not None:
+            logger.info("Task %s top allocations:\n%s", task_id, "\n".join(timer.memory["top_allocations"]))
+        _frame.reset(frame_token)
+        _timer.reset(timer_token)
@@ -6,17 +6,40 @@ class Settings(BaseSettings):
     SECRET_KEY: str
     API_VERSION: str = os.getenv("API_VERSION", "v1")
     LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
+    # "development" logs to a Rich console; anything else logs JSON lines to stdout
+    ENVIRONMENT: str = os.getenv("ENVIRONMENT", "development")
+    # Per-logger sampling for INFO-and-below lines, e.g. "chief_webhooks.ingress=0.1,chief_webhooks.events=0.5"
+    LOG_SAMPLE_RATES: str = os.getenv("LOG_SAMPLE_RATES", "")
 
     # Discord Bot Configuration
     DISCORD_BOT_TOKEN: str = os.getenv("DISCORD_BOT_TOKEN", "")
     DISCORD_CHANNEL_ID: str = os.getenv("DISCORD_CHANNEL_ID", "")
+    # Bursts within this window are coalesced into digest embeds (up to 10 embeds per message)
+    DISCORD_COALESCE_WINDOW_SECONDS: float = float(os.getenv("DISCORD_COALESCE_WINDOW_SECONDS", "2.0"))
+    # Minimum number of messages with the same coalesce key before they become one digest embed
+    DISCORD_DIGEST_THRESHOLD: int = int(os.getenv("DISCORD_DIGEST_THRESHOLD", "3"))
+    DISCORD_QUEUE_SIZE: int = int(os.getenv("DISCORD_QUEUE_SIZE", "1000"))
+    # "outbox" pushes notifications to Redis for the `python -m app.services.notifications.outbox`
+    # consumer, "inline" fans them out from a background task in the emitting process
+    NOTIFICATION_DELIVERY: str = os.getenv("NOTIFICATION_DELIVERY", "outbox")
+    NOTIFICATION_EMIT_TIMEOUT: float = float(os.getenv("NOTIFICATION_EMIT_TIMEOUT", "1.0"))
     
     # AI Code Review System Configuration
     GITHUB_APP_ID: str | None = os.getenv("GITHUB_APP_ID")
     GITHUB_PRIVATE_KEY: str | None = os.getenv("GITHUB_PRIVATE_KEY")
+    # REST API root; point it at `python -m benchmarks.fake_github` for offline benchmarks
+    GITHUB_API_URL: str = os.getenv("GITHUB_API_URL", "https://api.github.com")
+    # Inline comments per POST /pulls/{n}/reviews call; larger reviews continue in follow-up reviews
+    GITHUB_REVIEW_MAX_COMMENTS: int = int(os.getenv("GITHUB_REVIEW_MAX_COMMENTS", "50"))
     AI_PROVIDER: str = os.getenv("AI_PROVIDER", "anthropic")
     AI_MODEL: str | None = os.getenv("AI_MODEL")
-    
+
+    # Review mode: "single" sends every file to AI_PROVIDER, "cascade" triages each
+    # file with the cheap AI_TRIAGE_* model first and only escalates risky files
+    AI_REVIEW_MODE: str = os.getenv("AI_REVIEW_MODE", "single")
+    AI_TRIAGE_PROVIDER: str = os.getenv("AI_TRIAGE_PROVIDER", "ollama")
+    AI_TRIAGE_MODEL: str | None = os.getenv("AI_TRIAGE_MODEL")
+
     # Provider API keys
     ANTHROPIC_API_KEY: str | None = os.getenv("ANTHROPIC_API_KEY")
     OPENAI_API_KEY: str | None = os.getenv("OPENAI_API_KEY")
@@ -24,9 +47,149 @@ class Settings(BaseSettings):
     GROQ_API_KEY: str | None = os.getenv("GROQ_API_KEY")
     OLLAMA_BASE_URL: str = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
 
+    # Retries of a provider call answered with 429, with exponential backoff from
+    # AI_RATE_LIMIT_BACKOFF seconds (a Retry-After from the provider takes precedence)
+    AI_RATE_LIMIT_RETRIES: int = int(os.getenv("AI_RATE_LIMIT_RETRIES", "3"))
+    AI_RATE_LIMIT_BACKOFF: float = float(os.getenv("AI_RATE_LIMIT_BACKOFF", "1.0"))
+
+    # AI_PROVIDER=fake: offline stand-in for benchmarks (see app/services/ai/fake.py)
+    FAKE_AI_LATENCY_MS: float = float(os.getenv("FAKE_AI_LATENCY_MS", "800"))
+    # Log-normal spread of the latency; 0 makes every call take exactly FAKE_AI_LATENCY_MS
+    FAKE_AI_LATENCY_SIGMA: float = float(os.getenv("FAKE_AI_LATENCY_SIGMA", "0.5"))
+    FAKE_AI_RATE_LIMIT_RATE: float = float(os.getenv("FAKE_AI_RATE_LIMIT_RATE", "0.0"))
+    FAKE_AI_RISKY_RATE: float = float(os.getenv("FAKE_AI_RISKY_RATE", "0.5"))
+    # JSON lines file of review answers played in order (cycled); empty uses a built-in answer
+    FAKE_AI_RESPONSES: str = os.getenv("FAKE_AI_RESPONSES", "")
+    FAKE_AI_SEED: int | None = int(os.environ["FAKE_AI_SEED"]) if os.getenv("FAKE_AI_SEED") else None
+
     # Celery Configuration
     CELERY_BROKER_URL: str = os.getenv("CELERY_BROKER_URL", "redis://localhost:6379/0")
     CELERY_RESULT_BACKEND: str = os.getenv("CELERY_RESULT_BACKEND", "redis://localhost:6379/0")
+    # Opt-in compact wire format, e.g. CELERY_TASK_SERIALIZER=msgpack and CELERY_TASK_COMPRESSION=zlib
+    CELERY_TASK_SERIALIZER: str = os.getenv("CELERY_TASK_SERIALIZER", "json")
+    CELERY_TASK_COMPRESSION: str | None = os.getenv("CELERY_TASK_COMPRESSION")
+
+    # Shared Redis used for coordination state (dedup, quotas, outbox); defaults to the broker
+    REDIS_URL: str = os.getenv("REDIS_URL", os.getenv("CELERY_BROKER_URL", "redis://localhost:6379/0"))
+    REDIS_SOCKET_TIMEOUT: float = float(os.getenv("REDIS_SOCKET_TIMEOUT", "2.0"))
+
+    # Webhook redelivery deduplication keyed on X-GitHub-Delivery
+    DELIVERY_DEDUP_ENABLED: bool = os.getenv("DELIVERY_DEDUP_ENABLED", "true").lower() == "true"
+    # GitHub allows manual redelivery for 3 days
+    DELIVERY_DEDUP_TTL_SECONDS: int = int(os.getenv("DELIVERY_DEDUP_TTL_SECONDS", str(3 * 24 * 3600)))
+    # Capacity of the in-process Bloom filter used when Redis is unreachable (0 disables it)
+    DELIVERY_DEDUP_BLOOM_CAPACITY: int = int(os.getenv("DELIVERY_DEDUP_BLOOM_CAPACITY", "100000"))
+
+    # Async enqueue buffer used by the webhook handler (see app/infrastructure/task_publisher.py)
+    ENQUEUE_BUFFER_SIZE: int = int(os.getenv("ENQUEUE_BUFFER_SIZE", "1000"))
+    ENQUEUE_BATCH_SIZE: int = int(os.getenv("ENQUEUE_BATCH_SIZE", "50"))
+    # Failed publishes are retried with exponential backoff until this long after they were
+    # buffered; after that the delivery's dedup claim is released so GitHub's redelivery gets in
+    ENQUEUE_PUBLISH_DEADLINE_SECONDS: float = float(os.getenv("ENQUEUE_PUBLISH_DEADLINE_SECONDS", "30"))
+    ENQUEUE_PUBLISH_BACKOFF: float = float(os.getenv("ENQUEUE_PUBLISH_BACKOFF", "0.5"))
+
+    # Size-aware review lanes (app/services/github/review_scheduler.py). A review costs
+    # additions + deletions + REVIEW_COST_PER_FILE per changed file; up to REVIEW_EXPRESS_MAX_COST it
+    # goes to the express lane, above it to bulk. Workers serve the lanes by weighted round robin,
+    # and a lane whose oldest job has waited REVIEW_LANE_MAX_WAIT_SECONDS is served next regardless.
+    REVIEW_LANES_ENABLED: bool = os.getenv("REVIEW_LANES_ENABLED", "true").lower() == "true"
+    REVIEW_COST_PER_FILE: int = int(os.getenv("REVIEW_COST_PER_FILE", "40"))
+    REVIEW_EXPRESS_MAX_COST: int = int(os.getenv("REVIEW_EXPRESS_MAX_COST", "400"))
+    REVIEW_LANE_WEIGHTS: str = os.getenv("REVIEW_LANE_WEIGHTS", "express=4,bulk=1")
+    REVIEW_LANE_MAX_WAIT_SECONDS: float = float(os.getenv("REVIEW_LANE_MAX_WAIT_SECONDS", "900"))
+    # Fair share inside each lane: one virtual queue per tenant ("repo" or "installation"), served by
+    # deficit round robin with REVIEW_DRR_QUANTUM cost units per turn times the tenant's weight,
+    # e.g. REVIEW_TENANT_WEIGHTS="acme/monorepo=1,acme/payments=3" (unlisted tenants weigh 1).
+    REVIEW_TENANT_KEY: str = os.getenv("REVIEW_TENANT_KEY", "repo")
+    REVIEW_TENANT_WEIGHTS: str = os.getenv("REVIEW_TENANT_WEIGHTS", "")
+    REVIEW_DRR_QUANTUM: int = int(os.getenv("REVIEW_DRR_QUANTUM", "200"))
+
+    # Where notification-only events go (push, issues, non-review PR actions):
+    # "local" uses the in-process event queue, "celery" uses the `notifications` Celery queue
+    NOTIFICATION_ROUTE: str = os.getenv("NOTIFICATION_ROUTE", "local")
+
+    # In-process queue for non-review events (push, issues, ...)
+    EVENT_QUEUE_SIZE: int = int(os.getenv("EVENT_QUEUE_SIZE", "500"))
+    EVENT_QUEUE_WORKERS: int = int(os.getenv("EVENT_QUEUE_WORKERS", "4"))
+    # What to do when the queue is full: "reject" answers 503, "shed" drops the event with a 200
+    EVENT_QUEUE_OVERFLOW: str = os.getenv("EVENT_QUEUE_OVERFLOW", "reject")
+
+    # Prometheus exporter port for Celery workers (0 disables it); the API serves /metrics itself
+    METRICS_WORKER_PORT: int = int(os.getenv("METRICS_WORKER_PORT", "9808"))
+
+    # Span export: "none", "file" (JSON lines in TRACING_FILE) or "otlp" (OTEL_EXPORTER_OTLP_ENDPOINT)
+    TRACING_EXPORTER: str = os.getenv("TRACING_EXPORTER", "none")
+    TRACING_FILE: str = os.getenv("TRACING_FILE", "logs/traces.jsonl")
+
+    # LLM budgets per repository and per GitHub App installation (Redis token buckets over a
+    # rolling window). A limit of 0 disables that budget.
+    QUOTA_ENABLED: bool = os.getenv("QUOTA_ENABLED", "false").lower() == "true"
+    QUOTA_WINDOW_SECONDS: int = int(os.getenv("QUOTA_WINDOW_SECONDS", str(24 * 3600)))
+    QUOTA_REPO_TOKENS: int = int(os.getenv("QUOTA_REPO_TOKENS", "500000"))
+    QUOTA_REPO_REQUESTS: int = int(os.getenv("QUOTA_REPO_REQUESTS", "500"))
+    QUOTA_INSTALLATION_TOKENS: int = int(os.getenv("QUOTA_INSTALLATION_TOKENS", "2000000"))
+    QUOTA_INSTALLATION_REQUESTS: int = int(os.getenv("QUOTA_INSTALLATION_REQUESTS", "2000"))
+    # What to do when a review doesn't fit: "degrade" to the cheaper QUOTA_DEGRADE_* model,
+    # "defer" the task until the budget refills, or "skip" it with a commit status message
+    QUOTA_EXCEEDED_ACTION: str = os.getenv("QUOTA_EXCEEDED_ACTION", "degrade")
+    QUOTA_DEGRADE_PROVIDER: str = os.getenv("QUOTA_DEGRADE_PROVIDER", os.getenv("AI_TRIAGE_PROVIDER", "ollama"))
+    QUOTA_DEGRADE_MODEL: str | None = os.getenv("QUOTA_DEGRADE_MODEL", os.getenv("AI_TRIAGE_MODEL"))
+    # Longest single deferral; keep it below the Redis broker's visibility timeout (1 hour)
+    QUOTA_MAX_DEFER_SECONDS: int = int(os.getenv("QUOTA_MAX_DEFER_SECONDS", "3000"))
+
+    # Worker prewarm (app/tasks/prewarm.py): provider SDKs are imported before the pool forks, and
+    # each pool process builds its clients and fetches tokens for these "owner/repo" entries
+    # before taking tasks. The timeout bounds the token fetches.
+    WORKER_PREWARM: bool = os.getenv("WORKER_PREWARM", "true").lower() == "true"
+    WORKER_PREWARM_REPOS: str = os.getenv("WORKER_PREWARM_REPOS", "")
+    WORKER_PREWARM_TIMEOUT: float = float(os.getenv("WORKER_PREWARM_TIMEOUT", "10.0"))
+
+    # Worker profiling (app/core/profiling.py). Collapsed-stack files from the sampling profiler go
+    # to PROFILE_DIR; arm it with `celery control profile_tasks N` or POST /admin/profile.
+    PROFILE_DIR: str = os.getenv("PROFILE_DIR", "logs/profiles")
+    PROFILE_SAMPLE_INTERVAL_MS: float = float(os.getenv("PROFILE_SAMPLE_INTERVAL_MS", "5"))
+    PROFILE_TRACEMALLOC: bool = os.getenv("PROFILE_TRACEMALLOC", "false").lower() == "true"
+    PROFILE_TRACEMALLOC_FRAMES: int = int(os.getenv("PROFILE_TRACEMALLOC_FRAMES", "1"))
+    PROFILE_TRACEMALLOC_TOP: int = int(os.getenv("PROFILE_TRACEMALLOC_TOP", "10"))
+
+    # Dependency probes behind /health/ready (app/services/health.py). They run in the background
+    # every HEALTH_PROBE_INTERVAL seconds; the endpoint answers 503 while a probe listed in
+    # HEALTH_READY_PROBES (redis, broker, ai, github, discord) fails or the results are stale.
+    HEALTH_PROBE_INTERVAL: float = float(os.getenv("HEALTH_PROBE_INTERVAL", "15"))
+    HEALTH_PROBE_TIMEOUT: float = float(os.getenv("HEALTH_PROBE_TIMEOUT", "5"))
+    HEALTH_PROBE_STALE_AFTER: float = float(os.getenv("HEALTH_PROBE_STALE_AFTER", "60"))
+    HEALTH_READY_PROBES: str = os.getenv("HEALTH_READY_PROBES", "redis,broker")
+
+    # Surrounding code in the review prompt: the enclosing function, class or block of each hunk,
+    # read from the file at the PR head (through the blob cache) and capped at this many tokens
+    REVIEW_CONTEXT_ENABLED: bool = os.getenv("REVIEW_CONTEXT_ENABLED", "true").lower() == "true"
+    REVIEW_CONTEXT_MAX_TOKENS: int = int(os.getenv("REVIEW_CONTEXT_MAX_TOKENS", "1500"))
+
+    # Content-addressed cache of git blobs (app/infrastructure/blob_cache.py), used to fetch the
+    # files around a patch. Entries never go stale; the disk tier is shared by the workers of a
+    # node and kept under BLOB_CACHE_MAX_BYTES, the optional Redis tier is shared across nodes.
+    BLOB_CACHE_ENABLED: bool = os.getenv("BLOB_CACHE_ENABLED", "true").lower() == "true"
+    BLOB_CACHE_DIR: str = os.getenv("BLOB_CACHE_DIR", "data/blobs")
+    BLOB_CACHE_MAX_BYTES: int = int(os.getenv("BLOB_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+    # Least often a process sweeps the disk tier, however much it wrote in between
+    BLOB_CACHE_SWEEP_INTERVAL_SECONDS: float = float(os.getenv("BLOB_CACHE_SWEEP_INTERVAL_SECONDS", "60"))
+    BLOB_CACHE_REDIS: bool = os.getenv("BLOB_CACHE_REDIS", "false").lower() == "true"
+    BLOB_CACHE_REDIS_MAX_BYTES: int = int(os.getenv("BLOB_CACHE_REDIS_MAX_BYTES", str(256 * 1024)))
+    BLOB_CACHE_REDIS_TTL: int = int(os.getenv("BLOB_CACHE_REDIS_TTL", str(7 * 86400)))
+
+    # Review history (app/infrastructure/review_store.py): one SQLite row per reviewed file, queried
+    # through /reviews. With reuse on, a file whose patch was already reviewed by the same provider,
+    # model and prompts gets the stored answer instead of a new provider call.
+    REVIEW_HISTORY_ENABLED: bool = os.getenv("REVIEW_HISTORY_ENABLED", "true").lower() == "true"
+    REVIEW_HISTORY_PATH: str = os.getenv("REVIEW_HISTORY_PATH", "data/reviews.db")
+    REVIEW_HISTORY_REUSE: bool = os.getenv("REVIEW_HISTORY_REUSE", "true").lower() == "true"
+    REVIEW_HISTORY_RETENTION_DAYS: int = int(os.getenv("REVIEW_HISTORY_RETENTION_DAYS", "90"))
+
+    # Bearer token for the /admin and /reviews routes; they answer 404 while it is empty
+    ADMIN_TOKEN: str = os.getenv("ADMIN_TOKEN", "")
+
+    # Append every verified webhook delivery to this gzip JSONL corpus for `python -m benchmarks.replay`
+    WEBHOOK_RECORD_PATH: str = os.getenv("WEBHOOK_RECORD_PATH", "")
 
     model_config = {"env_file": ".env", "env_file_encoding": "utf-8", "extra": "ignore"}
 
@@ -0,0 +1,114 @@
+"""
+OpenTelemetry tracing shared by the API, the Celery workers and the outbox consumer.
+
+TRACING_EXPORTER selects where spans go:
+  - "none" (default): the no-op tracer, spans cost next to nothing
+  - "file": one JSON span per line in TRACING_FILE, no external services needed
+  - "otlp": OTLP/HTTP to OTEL_EXPORTER_OTLP_ENDPOINT (needs opentelemetry-exporter-otlp-proto-http)
+
+Trace context and the request ID travel with the work: `inject()` returns a carrier dict that
+is stored in Celery task headers (or next to an in-process queue item), and `continued()` resumes
+it on the consumer side so worker logs and spans join the webhook that triggered them.
+"""
+import os
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional, Sequence
+
+from opentelemetry import context as otel_context
+from opentelemetry import propagate, trace
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import ReadableSpan, TracerProvider
+from opentelemetry.sdk.trace.export import BatchSpanProcessor, SpanExporter, SpanExportResult
+
+from app.core.logger import logger, request_id_ctx_var
+from app.core.settings import settings
+
+# Carrier key used next to the W3C traceparent/tracestate entries
+REQUEST_ID_KEY = "request_id"
+
+tracer = trace.get_tracer("chief_webhooks")
+
+_provider: Optional[TracerProvider] = None
+
+
+class JsonLinesSpanExporter(SpanExporter):
+    """Appends finished spans to a local file as OTLP-style JSON, one span per line."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def export(self, spans: Sequence[ReadableSpan]) -> SpanExportResult:
+        lines = [span.to_json(indent=None) for span in spans]
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        return SpanExportResult.SUCCESS
+
+    def shutdown(self) -> None:
+        pass
+
+
+def _build_exporter() -> Optional[SpanExporter]:
+    exporter = settings.TRACING_EXPORTER.lower()
+    if exporter == "file":
+        return JsonLinesSpanExporter(settings.TRACING_FILE)
+    if exporter == "otlp":
+        try:
+            from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        except ImportError:
+            logger.error("TRACING_EXPORTER=otlp requires opentelemetry-exporter-otlp-proto-http, tracing disabled")
+            return None
+        return OTLPSpanExporter()
+    return None
+
+
+def setup_tracing(service_name: str) -> None:
+    """
+    Install the tracer provider for this process. Call once per process after forking
+    (the batch processor's export thread does not survive a fork).
+    """
+    global _provider
+    if _provider is not None:
+        return
+    exporter = _build_exporter()
+    if exporter is None:
+        return
+
+    _provider = TracerProvider(resource=Resource.create({"service.name": service_name}))
+    _provider.add_span_processor(BatchSpanProcessor(exporter))
+    trace.set_tracer_provider(_provider)
+    logger.info("Tracing enabled for %s (exporter=%s)", service_name, settings.TRACING_EXPORTER)
+
+
+def shutdown_tracing() -> None:
+    """Flush buffered spans. Safe to call when tracing is disabled."""
+    if _provider is not None:
+        _provider.shutdown()
+
+
+def inject() -> Dict[str, str]:
+    """Carrier with the current trace context and request ID, captured on the producer side."""
+    carrier: Dict[str, str] = {}
+    propagate.inject(carrier)
+    request_id = request_id_ctx_var.get()
+    if request_id != "-":
+        carrier[REQUEST_ID_KEY] = request_id
+    return carrier
+
+
+@contextmanager
+def continued(carrier: Optional[Dict[str, str]], span_name: str, **attributes) -> Iterator[trace.Span]:
+    """Resume a carrier from `inject()` and run the block inside a child span of the producer."""
+    carrier = carrier or {}
+    context_token = otel_context.attach(propagate.extract(carrier))
+    request_id_token = request_id_ctx_var.set(carrier.get(REQUEST_ID_KEY, request_id_ctx_var.get()))
+    try:
+        with tracer.start_as_current_span(span_name, kind=trace.SpanKind.CONSUMER, attributes=attributes) as span:
+            yield span
+    finally:
+        request_id_ctx_var.reset(request_id_token)
+        otel_context.detach(context_token)
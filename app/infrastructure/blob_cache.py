@@ -0,0 +1,184 @@
+"""
+Content-addressed cache of git blobs, keyed by blob SHA.
+
+A blob SHA is the hash of the content, so an entry can never go stale and is never invalidated;
+the only policy needed is which entries to keep. Two tiers:
+
+  disk   BLOB_CACHE_DIR/<sha[:2]>/<sha[2:]>, shared by every worker process on the node. Writes
+         go to a temp file and are renamed into place, so concurrent workers never see a partial
+         blob. A hit bumps the file's mtime and once the directory grows past BLOB_CACHE_MAX_BYTES
+         the least recently used files are deleted (one process at a time, under a flock, in a
+         worker thread and at most every BLOB_CACHE_SWEEP_INTERVAL_SECONDS).
+  redis  optional (BLOB_CACHE_REDIS), for blobs up to BLOB_CACHE_REDIS_MAX_BYTES, so nodes share
+         what any of them fetched. Entries expire after BLOB_CACHE_REDIS_TTL.
+
+Content is checked against its SHA before it is stored. Cache errors are logged and treated as
+misses; the caller then fetches from GitHub.
+"""
+import asyncio
+import fcntl
+import hashlib
+import os
+import re
+import tempfile
+import time
+from typing import Optional
+
+from redis.exceptions import RedisError
+
+from app.core.logger import logger
+from app.core.metrics import record_cache
+from app.core.settings import settings
+from app.infrastructure.redis_client import get_redis
+
+_BLOB_SHA = re.compile(r"^[0-9a-f]{40}$")
+
+
+def blob_sha(content: bytes) -> str:
+    """The SHA git assigns to a blob with this content."""
+    return hashlib.sha1(b"blob %d\0" % len(content) + content).hexdigest()
+
+
+class BlobCache:
+    """Disk and optional Redis tiers in front of the GitHub blob API; see the module docstring."""
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.enabled = settings.BLOB_CACHE_ENABLED
+        # Bytes this process wrote since its last sweep; sweeping lists the whole directory
+        self._written = 0
+        self._last_sweep = 0.0
+
+    def _path(self, sha: str) -> str:
+        return os.path.join(self.directory, sha[:2], sha[2:])
+
+    async def get(self, sha: str) -> Optional[bytes]:
+        if not self.enabled or not _BLOB_SHA.match(sha):
+            return None
+        # Blobs are small and usually in the page cache; not worth a thread hop
+        content = self._read(sha)
+        record_cache("blob_disk", hit=content is not None)
+        if content is not None or not settings.BLOB_CACHE_REDIS:
+            return content
+
+        try:
+            content = await get_redis().get(f"blobs:{sha}")
+        except RedisError as e:
+            logger.warning("Blob cache Redis tier unavailable: %s", e)
+            return None
+        record_cache("blob_redis", hit=content is not None)
+        if content is not None:
+            self._write(sha, content)
+            await self._maybe_sweep()
+        return content
+
+    async def put(self, sha: str, content: bytes) -> None:
+        if not self.enabled or not _BLOB_SHA.match(sha):
+            return
+        if blob_sha(content) != sha:
+            logger.warning("Not caching blob %s: content does not match its SHA", sha)
+            return
+        self._write(sha, content)
+        await self._maybe_sweep()
+        if settings.BLOB_CACHE_REDIS and len(content) <= settings.BLOB_CACHE_REDIS_MAX_BYTES:
+            try:
+                await get_redis().set(f"blobs:{sha}", content, ex=settings.BLOB_CACHE_REDIS_TTL)
+            except RedisError as e:
+                logger.warning("Blob cache Redis tier unavailable: %s", e)
+
+    # --- Disk tier ---
+
+    def _read(self, sha: str) -> Optional[bytes]:
+        path = self._path(sha)
+        try:
+            with open(path, "rb") as f:
+                content = f.read()
+            # Recency for the LRU sweep
+            os.utime(path)
+            return content
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            logger.warning("Blob cache read of %s failed: %s", sha, e)
+            return None
+
+    def _write(self, sha: str, content: bytes) -> None:
+        path = self._path(sha)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(content)
+                os.replace(tmp, path)
+            except BaseException:
+                os.unlink(tmp)
+                raise
+        except OSError as e:
+            logger.warning("Blob cache write of %s failed: %s", sha, e)
+            return
+
+        self._written += len(content)
+
+    async def _maybe_sweep(self) -> None:
+        # Listing the directory takes a while on a full cache; keep it off the event loop
+        if self._written < self.max_bytes // 16:
+            return
+        if time.monotonic() - self._last_sweep < settings.BLOB_CACHE_SWEEP_INTERVAL_SECONDS:
+            return
+        self._written = 0
+        self._last_sweep = time.monotonic()
+        await asyncio.to_thread(self.sweep)
+
+    def sweep(self) -> int:
+        """Delete least recently used blobs until the directory is back under 90% of the cap."""
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(os.path.join(self.directory, ".sweep.lock"), "w") as lock:
+                try:
+                    fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    # Another worker is already sweeping
+                    return 0
+                return self._evict()
+        except OSError as e:
+            logger.warning("Blob cache sweep failed: %s", e)
+            return 0
+
+    def _evict(self) -> int:
+        started = time.perf_counter()
+        entries = []
+        for shard in os.scandir(self.directory):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        total = sum(size for _, size, _ in entries)
+        if total <= self.max_bytes:
+            return 0
+        target = self.max_bytes * 0.9
+        removed = 0
+        for _, size, path in sorted(entries):
+            if total <= target:
+                break
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+        logger.info(
+            "Blob cache sweep removed %d of %d blobs in %.3fs (%d bytes left)",
+            removed, len(entries), time.perf_counter() - started, total,
+        )
+        return removed
+
+
+# Global cache; every process on the node shares the directory
+blob_cache = BlobCache(settings.BLOB_CACHE_DIR, settings.BLOB_CACHE_MAX_BYTES)
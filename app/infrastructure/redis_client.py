@@ -0,0 +1,24 @@
+import asyncio
+import weakref
+
+from redis.asyncio import Redis
+
+from app.core.settings import settings
+
+# redis.asyncio connections are bound to the event loop that created them.
+# Celery tasks run each review inside a fresh asyncio.run() loop, so keep one client per loop.
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Redis]" = weakref.WeakKeyDictionary()
+
+
+def get_redis() -> Redis:
+    """Return the shared asyncio Redis client for the running event loop."""
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None:
+        client = Redis.from_url(
+            settings.REDIS_URL,
+            socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+            socket_connect_timeout=settings.REDIS_SOCKET_TIMEOUT,
+        )
+        _clients[loop] = client
+    return client
@@ -0,0 +1,251 @@
+"""
+Review history in an embedded SQLite database (REVIEW_HISTORY_PATH).
+
+One row per reviewed file: where it was reviewed (repo, PR, head SHA, file), what was
+reviewed (hashes of the patch with its surrounding code and of the prompt templates), by
+whom (provider, model), the result (verdict, score, issues and the full parsed answer) and
+what it cost (tokens, latency). The review workers write it; the API reads it through /reviews.
+
+Rows are reused: a file whose input, provider, model and prompts match an earlier row gets
+that row's answer instead of a new provider call, so redeliveries, task retries and pushes
+that leave a file untouched cost nothing.
+
+The database runs in WAL mode, so readers never block the writer, and is shared by every
+process on the node that points at the same file. Each thread keeps its own connection and
+all calls run through asyncio.to_thread. Errors are logged and swallowed: losing history
+must never fail a review.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from app.core.logger import logger
+from app.core.settings import settings
+from app.services.ai.prompt import REVIEW_PROMPT_TEMPLATE, REVIEW_SYSTEM_PROMPT
+
+# Answers produced with different prompts are not interchangeable
+PROMPT_HASH = hashlib.sha256((REVIEW_SYSTEM_PROMPT + REVIEW_PROMPT_TEMPLATE).encode()).hexdigest()[:16]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS reviews (
+    id INTEGER PRIMARY KEY,
+    created_at REAL NOT NULL,
+    repo TEXT NOT NULL,
+    pr_number INTEGER NOT NULL,
+    head_sha TEXT NOT NULL,
+    filename TEXT NOT NULL,
+    patch_hash TEXT NOT NULL,
+    prompt_hash TEXT NOT NULL,
+    provider TEXT NOT NULL,
+    model TEXT NOT NULL,
+    verdict TEXT,
+    score INTEGER,
+    issue_count INTEGER NOT NULL DEFAULT 0,
+    issues TEXT NOT NULL DEFAULT '[]',
+    review TEXT NOT NULL,
+    input_tokens INTEGER NOT NULL DEFAULT 0,
+    output_tokens INTEGER NOT NULL DEFAULT 0,
+    latency_ms REAL NOT NULL DEFAULT 0,
+    reused_from INTEGER
+);
+CREATE INDEX IF NOT EXISTS reviews_repo_pr ON reviews (repo, pr_number, id);
+CREATE INDEX IF NOT EXISTS reviews_head_sha ON reviews (head_sha);
+CREATE INDEX IF NOT EXISTS reviews_reuse ON reviews (patch_hash, provider, model, prompt_hash);
+"""
+
+# Columns returned by the query API; `review` (the full answer) only for single PRs
+_COLUMNS = (
+    "id, created_at, repo, pr_number, head_sha, filename, patch_hash, provider, model, verdict, "
+    "score, issue_count, issues, input_tokens, output_tokens, latency_ms, reused_from"
+)
+
+
+@dataclass
+class ReviewRecord:
+    """One reviewed file."""
+    repo: str
+    pr_number: int
+    head_sha: str
+    filename: str
+    patch_hash: str
+    provider: str
+    model: str
+    review: Dict[str, Any]
+    input_tokens: int = 0
+    output_tokens: int = 0
+    latency_ms: float = 0.0
+    # Row whose answer was reused instead of calling the provider
+    reused_from: Optional[int] = None
+
+    @property
+    def issues(self) -> List[Dict[str, Any]]:
+        return [issue for item in self.review.get("files", []) for issue in item.get("issues", [])]
+
+
+@dataclass
+class StoredReview:
+    id: int
+    review: Dict[str, Any]
+
+
+class ReviewStore:
+    """Thread-safe access to the review history database; see the module docstring."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.enabled = settings.REVIEW_HISTORY_ENABLED
+        self._local = threading.local()
+
+    @staticmethod
+    def patch_hash(filename: str, patch: str, surrounding_code: str = "") -> str:
+        """Identity of the reviewed input: the patch plus the surrounding code sent with it."""
+        return hashlib.sha256(f"{filename}\0{patch}\0{surrounding_code}".encode()).hexdigest()
+
+    def _connection(self) -> sqlite3.Connection:
+        # Keyed by PID too: a connection must not cross a fork into Celery's pool processes
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=10.0, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(_SCHEMA)
+        self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    async def _run(self, fn, *args, default=None):
+        if not self.enabled:
+            return default
+        try:
+            return await asyncio.to_thread(fn, *args)
+        except sqlite3.Error as e:
+            logger.warning("Review history unavailable (%s): %s", self.path, e)
+            return default
+
+    # --- Worker side ---
+
+    async def find_reusable(self, patch_hash: str, provider: str, model: str) -> Optional[StoredReview]:
+        """The newest answer for this patch from the same provider, model and prompts, if reuse is on."""
+        if not settings.REVIEW_HISTORY_REUSE:
+            return None
+        return await self._run(self._find_reusable, patch_hash, provider, model)
+
+    def _find_reusable(self, patch_hash: str, provider: str, model: str) -> Optional[StoredReview]:
+        row = self._connection().execute(
+            "SELECT id, review, reused_from FROM reviews"
+            " WHERE patch_hash = ? AND provider = ? AND model = ? AND prompt_hash = ?"
+            " ORDER BY id DESC LIMIT 1",
+            (patch_hash, provider, model, PROMPT_HASH),
+        ).fetchone()
+        if row is None:
+            return None
+        return StoredReview(id=row["reused_from"] or row["id"], review=json.loads(row["review"]))
+
+    async def record(self, record: ReviewRecord) -> None:
+        await self._run(self._record, record)
+
+    def _record(self, record: ReviewRecord) -> None:
+        issues = record.issues
+        self._connection().execute(
+            "INSERT INTO reviews (created_at, repo, pr_number, head_sha, filename, patch_hash, prompt_hash,"
+            " provider, model, verdict, score, issue_count, issues, review, input_tokens, output_tokens,"
+            " latency_ms, reused_from) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                time.time(), record.repo, record.pr_number, record.head_sha, record.filename,
+                record.patch_hash, PROMPT_HASH, record.provider, record.model,
+                record.review.get("verdict"), record.review.get("score"), len(issues), json.dumps(issues),
+                json.dumps(record.review), record.input_tokens, record.output_tokens,
+                round(record.latency_ms, 1), record.reused_from,
+            ),
+        )
+
+    async def prune(self) -> int:
+        """Delete rows older than REVIEW_HISTORY_RETENTION_DAYS (0 keeps everything)."""
+        if settings.REVIEW_HISTORY_RETENTION_DAYS <= 0:
+            return 0
+        return await self._run(self._prune, default=0)
+
+    def _prune(self) -> int:
+        cutoff = time.time() - settings.REVIEW_HISTORY_RETENTION_DAYS * 86400
+        deleted = self._connection().execute("DELETE FROM reviews WHERE created_at < ?", (cutoff,)).rowcount
+        if deleted:
+            logger.info("Pruned %d review history rows older than %d days", deleted, settings.REVIEW_HISTORY_RETENTION_DAYS)
+        return deleted
+
+    # --- Query API ---
+
+    async def query(self, repo: str, pr_number: Optional[int] = None, head_sha: Optional[str] = None,
+                    before_id: Optional[int] = None, limit: int = 50, with_review: bool = False) -> List[Dict[str, Any]]:
+        """Rows of one repository, newest first. Page with `before_id` = the last row's id."""
+        return await self._run(self._query, repo, pr_number, head_sha, before_id, limit, with_review, default=[])
+
+    def _query(self, repo: str, pr_number: Optional[int], head_sha: Optional[str], before_id: Optional[int],
+               limit: int, with_review: bool) -> List[Dict[str, Any]]:
+        sql = f"SELECT {_COLUMNS}{', review' if with_review else ''} FROM reviews WHERE repo = ?"
+        params: List[Any] = [repo]
+        if pr_number is not None:
+            sql += " AND pr_number = ?"
+            params.append(pr_number)
+        if head_sha:
+            sql += " AND head_sha = ?"
+            params.append(head_sha)
+        if before_id is not None:
+            sql += " AND id < ?"
+            params.append(before_id)
+        sql += " ORDER BY id DESC LIMIT ?"
+        params.append(limit)
+
+        rows = []
+        for row in self._connection().execute(sql, params):
+            item = dict(row)
+            item["issues"] = json.loads(item["issues"])
+            if with_review:
+                item["review"] = json.loads(item["review"])
+            rows.append(item)
+        return rows
+
+    async def stats(self, repo: Optional[str] = None, since: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Volume, cost, latency and outcome per provider and model."""
+        return await self._run(self._stats, repo, since, default=[])
+
+    def _stats(self, repo: Optional[str], since: Optional[float]) -> List[Dict[str, Any]]:
+        where, params = [], []
+        if repo:
+            where.append("repo = ?")
+            params.append(repo)
+        if since is not None:
+            where.append("created_at >= ?")
+            params.append(since)
+        rows = self._connection().execute(
+            "SELECT provider, model, COUNT(*) AS files, COUNT(DISTINCT repo || '#' || pr_number) AS pull_requests,"
+            " SUM(reused_from IS NOT NULL) AS reused, SUM(input_tokens) AS input_tokens,"
+            " SUM(output_tokens) AS output_tokens,"
+            " AVG(CASE WHEN reused_from IS NULL THEN latency_ms END) AS avg_latency_ms,"
+            " MAX(latency_ms) AS max_latency_ms, AVG(score) AS avg_score, SUM(issue_count) AS issues,"
+            " SUM(verdict = 'APPROVE') AS approve, SUM(verdict = 'COMMENT') AS comment,"
+            " SUM(verdict = 'REQUEST_CHANGES') AS request_changes"
+            f" FROM reviews {'WHERE ' + ' AND '.join(where) if where else ''}"
+            " GROUP BY provider, model ORDER BY files DESC",
+            params,
+        ).fetchall()
+        report = []
+        for row in rows:
+            item = dict(row)
+            for key in ("avg_latency_ms", "avg_score"):
+                item[key] = round(item[key], 1) if item[key] is not None else None
+            report.append(item)
+        return report
+
+
+# Global store shared by the review workers and the API of this node
+review_store = ReviewStore(settings.REVIEW_HISTORY_PATH)
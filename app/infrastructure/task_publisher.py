@@ -0,0 +1,209 @@
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from app.core import tracing
+from app.core.logger import logger
+from app.core.metrics import ENQUEUE_BUFFER_DEPTH, ENQUEUE_SECONDS
+from app.core.settings import settings
+
+
+@dataclass
+class _PendingTask:
+    name: str
+    args: Tuple[Any, ...] = ()
+    kwargs: Dict[str, Any] = field(default_factory=dict)
+    options: Dict[str, Any] = field(default_factory=dict)
+    buffered_at: float = field(default_factory=time.monotonic)
+    # Awaited on the event loop if the task could not be published before the deadline
+    on_failure: Optional[Callable[[], Awaitable[None]]] = None
+
+
+class TaskPublisher:
+    """
+    Non-blocking Celery enqueue path for async request handlers.
+
+    `enqueue` only appends to a bounded in-memory buffer and never touches the broker.
+    A single flusher task drains the buffer in batches and publishes each batch from a
+    worker thread over one pooled producer connection, so broker latency never blocks
+    the event loop.
+
+    The webhook has already been answered by the time a task is published, so a failed
+    publish is retried with backoff until ENQUEUE_PUBLISH_DEADLINE_SECONDS after the task
+    was buffered. Tasks that still fail run their `on_failure` callback, which undoes
+    whatever the handler recorded for the delivery so that GitHub's redelivery is accepted.
+    """
+
+    def __init__(self, maxsize: int, batch_size: int):
+        self.maxsize = maxsize
+        self.batch_size = batch_size
+        self._queue: Optional[asyncio.Queue] = None
+        self._flusher: Optional[asyncio.Task] = None
+        # Tasks of the batch being published that are not confirmed yet, given up by stop()
+        self._unpublished: List[_PendingTask] = []
+        ENQUEUE_BUFFER_DEPTH.set_function(lambda: self._queue.qsize() if self._queue else 0)
+
+        self.published = 0
+        self.failed = 0
+        self.rejected = 0
+        self.batches = 0
+        self.last_batch_size = 0
+        self.last_flush_seconds = 0.0
+        self.max_buffer_wait_seconds = 0.0
+
+    async def start(self) -> None:
+        if self._flusher is not None:
+            return
+        self._queue = asyncio.Queue(maxsize=self.maxsize)
+        self._flusher = asyncio.create_task(self._run(), name="task-publisher")
+        logger.info("Task publisher started (buffer=%d, batch=%d)", self.maxsize, self.batch_size)
+
+    async def stop(self, timeout: Optional[float] = None) -> None:
+        """
+        Flush whatever is still buffered, then stop the flusher. The default timeout lets a
+        failing publish run to its deadline; tasks still unpublished after it give up as if
+        their deadline had passed, so their deliveries are released.
+        """
+        if self._flusher is None:
+            return
+        if timeout is None:
+            timeout = settings.ENQUEUE_PUBLISH_DEADLINE_SECONDS + 5
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.error("Task publisher shutdown timed out with %d tasks still buffered", self._queue.qsize())
+
+        self._flusher.cancel()
+        try:
+            await self._flusher
+        except asyncio.CancelledError:
+            pass
+        self._flusher = None
+
+        # A batch caught mid-publish counts as unpublished: a duplicate review beats a lost one
+        abandoned, self._unpublished = self._unpublished, []
+        while not self._queue.empty():
+            abandoned.append(self._queue.get_nowait())
+            self._queue.task_done()
+        self.failed += len(abandoned)
+        for pending in abandoned:
+            await self._give_up(pending)
+        logger.info("Task publisher stopped")
+
+    def enqueue(self, name: str, args: Tuple[Any, ...] = (), kwargs: Dict[str, Any] | None = None,
+                on_failure: Optional[Callable[[], Awaitable[None]]] = None, **options) -> bool:
+        """
+        Buffer a task for publishing. Must be called from the event loop.
+        Returns False when the buffer is full so the caller can shed load.
+        """
+        if self._queue is None:
+            # Lazily start when used outside of the app lifespan
+            self._queue = asyncio.Queue(maxsize=self.maxsize)
+            self._flusher = asyncio.create_task(self._run(), name="task-publisher")
+
+        # Captured here rather than at publish time: queue wait must include buffering, and the
+        # flusher thread has no request context to take the trace parent and request ID from
+        options["headers"] = {"enqueued_at": time.time(), **tracing.inject(), **options.get("headers", {})}
+        try:
+            self._queue.put_nowait(_PendingTask(name=name, args=args, kwargs=kwargs or {}, options=options, on_failure=on_failure))
+            return True
+        except asyncio.QueueFull:
+            self.rejected += 1
+            logger.warning("Task publisher buffer is full (%d). Rejecting task '%s'", self.maxsize, name)
+            return False
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "buffer_depth": self._queue.qsize() if self._queue else 0,
+            "buffer_size": self.maxsize,
+            "published": self.published,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "batches": self.batches,
+            "last_batch_size": self.last_batch_size,
+            "last_flush_seconds": round(self.last_flush_seconds, 4),
+            "max_buffer_wait_seconds": round(self.max_buffer_wait_seconds, 4),
+        }
+
+    async def _run(self) -> None:
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except asyncio.QueueEmpty:
+                    break
+
+            started = time.monotonic()
+            self.max_buffer_wait_seconds = max(self.max_buffer_wait_seconds, started - batch[0].buffered_at)
+            self._unpublished = list(batch)
+            try:
+                failed = await self._publish_with_retries(batch)
+                self.failed += len(failed)
+                while self._unpublished:
+                    await self._give_up(self._unpublished.pop())
+            finally:
+                self.batches += 1
+                self.last_batch_size = len(batch)
+                self.last_flush_seconds = time.monotonic() - started
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _publish_with_retries(self, batch: List[_PendingTask]) -> List[_PendingTask]:
+        """Publish, retrying what failed until the deadline; returns the tasks that never made it."""
+        pending, attempt = batch, 0
+        while True:
+            try:
+                pending = await asyncio.to_thread(self._publish_batch, pending)
+            except Exception as e:
+                # Producer acquisition failed, nothing in the batch was sent
+                logger.error("Task publisher failed to publish batch of %d: %s", len(pending), e)
+            self._unpublished = list(pending)
+            if not pending:
+                return []
+            delay = settings.ENQUEUE_PUBLISH_BACKOFF * 2 ** attempt
+            deadline = min(task.buffered_at for task in pending) + settings.ENQUEUE_PUBLISH_DEADLINE_SECONDS
+            if time.monotonic() + delay > deadline:
+                return pending
+            attempt += 1
+            logger.warning("Retrying %d unpublished tasks in %.1fs (attempt %d)", len(pending), delay, attempt)
+            await asyncio.sleep(delay)
+
+    async def _give_up(self, pending: _PendingTask) -> None:
+        logger.error("Dropping task '%s' left unpublished for %.0fs", pending.name, time.monotonic() - pending.buffered_at)
+        if pending.on_failure is None:
+            return
+        try:
+            await pending.on_failure()
+        except Exception as e:
+            logger.error("Cleanup for unpublished task '%s' failed: %s", pending.name, e, exc_info=True)
+
+    def _publish_batch(self, batch: List[_PendingTask]) -> List[_PendingTask]:
+        """Runs in a worker thread. Publishes the whole batch over a single producer; returns the failures."""
+        # Imported on first publish so the API does not load the Celery app at startup
+        from app.core.celery_app import celery
+        failed = []
+        with celery.producer_or_acquire() as producer:
+            for pending in batch:
+                try:
+                    celery.send_task(
+                        pending.name,
+                        args=pending.args,
+                        kwargs=pending.kwargs,
+                        producer=producer,
+                        **pending.options,
+                    )
+                    self.published += 1
+                    ENQUEUE_SECONDS.labels(task=pending.name.rsplit(".", 1)[-1]).observe(time.monotonic() - pending.buffered_at)
+                except Exception as e:
+                    failed.append(pending)
+                    logger.error("Failed to publish task '%s': %s", pending.name, e)
+        return failed
+
+
+# Global publisher shared by the API process
+task_publisher = TaskPublisher(
+    maxsize=settings.ENQUEUE_BUFFER_SIZE,
+    batch_size=settings.ENQUEUE_BATCH_SIZE,
+)
@@ -0,0 +1,75 @@
+import gzip
+import queue
+import threading
+import time
+from typing import Dict, Optional
+
+import orjson
+
+from app.core.logger import logger
+from app.core.settings import settings
+
+# Headers worth keeping for replay. The signature is dropped on purpose: it is only valid for
+# the recording secret, and the replay tool re-signs every body.
+RECORDED_HEADERS = ("X-GitHub-Event", "X-GitHub-Delivery", "X-GitHub-Hook-ID", "Content-Type", "User-Agent")
+
+_STOP = object()
+
+
+class WebhookRecorder:
+    """
+    Opt-in recorder for verified webhook deliveries (WEBHOOK_RECORD_PATH).
+
+    The ingress path only puts the raw body on an in-memory queue; a background thread
+    appends one JSON line per delivery to a gzip file. The resulting corpus is what
+    `python -m benchmarks.replay` plays back.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.recorded = 0
+        self._queue: "queue.SimpleQueue" = queue.SimpleQueue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.path)
+
+    def record(self, headers: Dict[str, str], body: bytes) -> None:
+        """Never blocks and never raises on the request path."""
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="webhook-recorder", daemon=True)
+                    self._thread.start()
+        self._queue.put((time.time(), {h: headers[h] for h in RECORDED_HEADERS if h in headers}, body))
+
+    def close(self, timeout: float = 5.0) -> None:
+        if self._thread is not None:
+            self._queue.put(_STOP)
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self) -> None:
+        try:
+            # Appending starts a new gzip member; gzip readers treat the file as one stream
+            with gzip.open(self.path, "ab") as f:
+                while True:
+                    item = self._queue.get()
+                    if item is _STOP:
+                        return
+                    received_at, headers, body = item
+                    f.write(orjson.dumps({
+                        "received_at": received_at,
+                        "headers": headers,
+                        "body": body.decode("utf-8", errors="replace"),
+                    }) + b"\n")
+                    self.recorded += 1
+                    if self._queue.empty():
+                        f.flush()
+        except OSError as e:
+            logger.error("Webhook recorder stopped, cannot write %s: %s", self.path, e)
+
+
+webhook_recorder = WebhookRecorder(settings.WEBHOOK_RECORD_PATH)
@@ -4,8 +4,14 @@ from dotenv import load_dotenv
 from contextlib import asynccontextmanager
 
 from app.api import api_router
+from app.api.v1.github_routes import github_controller
 from app.core.logger import logger
-from app.core.celery_app import celery
+from app.core.metrics import metrics_endpoint
+from app.core import tracing
+from app.infrastructure.task_publisher import task_publisher
+from app.infrastructure.webhook_recorder import webhook_recorder
+from app.services.health import health_monitor
+from app.services.notifications.outbox import notification_outbox
 from app.middlewares.github.github_middleware import GitHubWebhookMiddleware
 from app.middlewares.request_logging_middleware import RequestLoggingMiddleware
 
@@ -14,8 +20,20 @@ load_dotenv()
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     logger.info("Starting Chief Webhooks service")
+    tracing.setup_tracing("chief-api")
+    await task_publisher.start()
+    await github_controller.event_queue.start()
+    await health_monitor.start()
     yield
     logger.info("Shutting down Chief Webhooks service")
+    # Fail readiness first so the load balancer stops routing here while queues drain
+    await health_monitor.stop()
+    # Drain queued local events, then flush buffered Celery publishes before the process exits
+    await github_controller.event_queue.stop()
+    await notification_outbox.drain()
+    await task_publisher.stop()
+    webhook_recorder.close()
+    tracing.shutdown_tracing()
 
 app = FastAPI(lifespan=lifespan)
 
@@ -25,3 +43,6 @@ app.add_middleware(RequestLoggingMiddleware)
 
 # Register all API routes
 app.include_router(api_router)
+
+# Prometheus scrape target, outside the versioned API prefix
+app.add_route("/metrics", metrics_endpoint, include_in_schema=False)
@@ -1,45 +1,135 @@
 import hashlib
 import hmac
+import time
 
-from fastapi import Request
-from fastapi.responses import JSONResponse
-from starlette.middleware.base import BaseHTTPMiddleware
+import orjson
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from opentelemetry.trace import SpanKind
 
 from app.core.settings import settings
-from app.core.logger import logger
+from app.core.logger import get_logger
+from app.core.metrics import HMAC_VERIFY_SECONDS, WEBHOOK_INGRESS_SECONDS
+from app.core.tracing import tracer
+from app.infrastructure.webhook_recorder import webhook_recorder
+
+logger = get_logger("ingress")
+
+
+def verify_signature(secret: bytes, body: bytes, signature: str) -> bool:
+    """Check an X-Hub-Signature-256 header against the HMAC-SHA256 of the raw body."""
+    expected_signature = "sha256=" + hmac.new(
+        key=secret,
+        msg=body,
+        digestmod=hashlib.sha256,
+    ).hexdigest()
+    # compare_digest prevents timing attacks
+    return hmac.compare_digest(expected_signature, signature)
 
 
-class GitHubWebhookMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
+class GitHubWebhookMiddleware:
+    """
+    Pure ASGI middleware guarding the GitHub webhook route.
+
+    The raw body is read exactly once: the HMAC is verified over those bytes, the
+    JSON is parsed with orjson and stored on the request state as `github_payload`,
+    and the same bytes are replayed to the downstream app.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self.secret = settings.SECRET_KEY.encode()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
         # Only validate requests hitting the github webhook route
-        if not request.url.path.endswith("/github/webhook"):
-            return await call_next(request)
+        if scope["type"] != "http" or not scope["path"].endswith("/github/webhook"):
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        # Label values are only taken from verified requests so forged headers can't add series
+        labels = {"event": "unverified", "status": "500"}
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                labels["status"] = str(message["status"])
+            await send(message)
+
+        try:
+            with tracer.start_as_current_span("webhook", kind=SpanKind.SERVER) as span:
+                await self._handle(scope, receive, send_wrapper, labels)
+                span.set_attributes({"github.event": labels["event"], "http.status_code": int(labels["status"])})
+        finally:
+            WEBHOOK_INGRESS_SECONDS.labels(**labels).observe(time.perf_counter() - started)
+
+    async def _handle(self, scope: Scope, receive: Receive, send: Send, labels: dict) -> None:
+        headers = Headers(scope=scope)
 
         # 1. Must have the signature header
-        signature = request.headers.get("X-Hub-Signature-256")
+        signature = headers.get("X-Hub-Signature-256")
         if not signature:
             logger.warning("Rejected webhook request: Missing X-Hub-Signature-256 header")
-            return JSONResponse(status_code=401, content={"detail": "Missing signature header"})
+            await JSONResponse(status_code=401, content={"detail": "Missing signature header"})(scope, receive, send)
+            return
 
         # 2. Must have the GitHub event header
-        event = request.headers.get("X-GitHub-Event")
+        event = headers.get("X-GitHub-Event")
         if not event:
             logger.warning("Rejected webhook request: Missing X-GitHub-Event header")
-            return JSONResponse(status_code=400, content={"detail": "Missing X-GitHub-Event header"})
+            await JSONResponse(status_code=400, content={"detail": "Missing X-GitHub-Event header"})(scope, receive, send)
+            return
+
+        # 3. Read the raw body once and validate the HMAC signature
+        body = await self._read_body(receive)
+
+        verify_started = time.perf_counter()
+        valid = verify_signature(self.secret, body, signature)
+        HMAC_VERIFY_SECONDS.observe(time.perf_counter() - verify_started)
+        if not valid:
+            logger.error("Rejected webhook request: Invalid signature for event '%s'", event)
+            await JSONResponse(status_code=401, content={"detail": "Invalid signature"})(scope, receive, send)
+            return
+        labels["event"] = event
+
+        # 4. Parse once so the handler never touches the raw body again
+        try:
+            payload = orjson.loads(body)
+        except orjson.JSONDecodeError:
+            logger.warning("Rejected webhook request: Body is not valid JSON for event '%s'", event)
+            await JSONResponse(status_code=400, content={"detail": "Invalid JSON payload"})(scope, receive, send)
+            return
+
+        scope.setdefault("state", {})["github_payload"] = payload
+        if webhook_recorder.enabled:
+            webhook_recorder.record(headers, body)
+
+        logger.info("Successfully validated GitHub webhook signature for event '%s'", event)
+        await self.app(scope, self._replay(body, receive), send)
 
-        # 3. Read the raw body and validate the HMAC signature
-        body = await request.body()
+    @staticmethod
+    async def _read_body(receive: Receive) -> bytes:
+        chunks = []
+        more_body = True
+        while more_body:
+            message = await receive()
+            if message["type"] != "http.request":
+                break
+            chunks.append(message.get("body", b""))
+            more_body = message.get("more_body", False)
+        return b"".join(chunks)
 
-        expected_signature = "sha256=" + hmac.new(
-            key=settings.SECRET_KEY.encode(),
-            msg=body,
-            digestmod=hashlib.sha256,
-        ).hexdigest()
+    @staticmethod
+    def _replay(body: bytes, receive: Receive) -> Receive:
+        """Hands the already-read body downstream, then defers to the real channel."""
+        sent = False
 
-        # 4. Use compare_digest to prevent timing attacks
-        if not hmac.compare_digest(expected_signature, signature):
-            logger.error(f"Rejected webhook request: Invalid signature for event '{event}'")
-            return JSONResponse(status_code=401, content={"detail": "Invalid signature"})
+        async def replay_receive() -> Message:
+            nonlocal sent
+            if not sent:
+                sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
 
-        logger.info(f"Successfully validated GitHub webhook signature for event '{event}'")
-        return await call_next(request)
\ No newline at end of file
+        return replay_receive
@@ -1,28 +1,40 @@
 import uuid
-from typing import Callable
 
-from fastapi import Request
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
-from app.core.logger import request_id_ctx_var, logger
+from app.core.logger import request_id_ctx_var, get_logger
 
+logger = get_logger("ingress")
+
+
+class RequestLoggingMiddleware:
+    """Pure ASGI middleware that binds a request ID to the logging context."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
 
-class RequestLoggingMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next: Callable):
         # Determine the request ID (check headers first, fallback to generating one)
-        request_id = request.headers.get("X-Request-ID")
+        request_id = Headers(scope=scope).get("X-Request-ID")
         if not request_id:
             request_id = str(uuid.uuid4())
 
         # Set the context variable so the logger picks it up
         token = request_id_ctx_var.set(request_id)
 
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                logger.info("Request completed with status %s", message["status"])
+            await send(message)
+
         try:
-            logger.info(f"Incoming request: {request.method} {request.url.path}")
-            response = await call_next(request)
-            
-            logger.info(f"Request completed with status {response.status_code}")
-            return response
+            logger.info("Incoming request: %s %s", scope["method"], scope["path"])
+            await self.app(scope, receive, send_wrapper)
         finally:
             # Reset the context variable to prevent leakage between requests
             request_id_ctx_var.reset(token)
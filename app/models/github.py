@@ -1,22 +1,46 @@
 from pydantic import BaseModel, Field
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
+
+# Pull request actions that trigger an AI review. Everything else only needs a notification.
+REVIEW_ACTIONS = ("opened", "synchronize", "reopened")
 
 class GitHubUser(BaseModel):
     login: str
 
+class CommitRef(BaseModel):
+    sha: str
+
 class PullRequestModel(BaseModel):
     number: int
     title: str
     html_url: str
     user: GitHubUser
+    head: Optional[CommitRef] = None
+    merged: Optional[bool] = None
 
 class RepositoryModel(BaseModel):
     full_name: str
+    name: Optional[str] = None
+    owner: Optional[GitHubUser] = None
+
+class InstallationModel(BaseModel):
+    id: int
 
 class PullRequestPayload(BaseModel):
     action: str
     pull_request: PullRequestModel
     repository: RepositoryModel
+    installation: Optional[InstallationModel] = None
+
+    @classmethod
+    def project(cls, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Project a raw webhook payload down to the fields the review pipeline reads.
+        Unknown keys are dropped and unset optionals are omitted, so the result keeps
+        the same nested dict shape the strategies already consume.
+        Raises pydantic.ValidationError if a required field is missing.
+        """
+        return cls.model_validate(payload).model_dump(exclude_none=True)
 
 class PRFile(BaseModel):
     filename: str
@@ -25,3 +49,5 @@ class PRFile(BaseModel):
     deletions: int
     changes: int
     patch: Optional[str] = None
+    # Blob SHA of the file at the PR head; fetch it with GitHubClient.get_blob
+    sha: Optional[str] = None
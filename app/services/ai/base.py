@@ -1,28 +1,169 @@
+import asyncio
+import itertools
+import random
+import time
 from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Any, Dict
+
+from app.core.logger import logger
+from app.core.metrics import PROVIDER_LATENCY_SECONDS, PROVIDER_RATE_LIMITED, PROVIDER_TOKENS
+from app.core.profiling import stage
+from app.core.settings import settings
+from app.core.tracing import tracer
+from app.services.ai.prompt import (
+    REVIEW_PROMPT_TEMPLATE,
+    REVIEW_SYSTEM_PROMPT,
+    TRIAGE_PROMPT_TEMPLATE,
+    TRIAGE_SYSTEM_PROMPT,
+)
+
+
+@dataclass
+class Completion:
+    """Text answer of one provider call plus the token usage reported by the API."""
+    text: str
+    input_tokens: int = 0
+    output_tokens: int = 0
+    # Wall time of the call including rate-limit retries, set by _complete
+    latency_seconds: float = 0.0
+
+
+class ProviderRateLimitError(Exception):
+    """Raised by `_generate` when the provider answered 429; `_complete` retries with backoff."""
+
+    def __init__(self, message: str, retry_after: float | None = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
 
 class AIProvider(ABC):
     """Abstract base class for all AI code review providers."""
 
-    @abstractmethod
-    async def review_code(self, diff: str, context: dict) -> str:
+    # Human readable provider name used in logs and error messages
+    name: str = "AI"
+
+    def __init__(self, model: str | None = None):
+        self.model = model
+
+    async def review_code(self, diff: str, context: Dict[str, Any]) -> str:
         """
         Analyze the pull request diff and return a markdown-formatted review.
-        
+
         Args:
             diff (str): The git patch/diff string for the file or chunks of files.
             context (dict): Additional context such as repo name, PR title, filename.
-            
+
         Returns:
             str: The PR review comment or feedback.
         """
+        try:
+            completion = await self.review(diff, context)
+            return completion.text
+        except Exception as e:
+            logger.error("%s API Error: %s", self.name, e)
+            return f"Error analyzing code with {self.name}: {str(e)}"
+
+    async def review(self, diff: str, context: Dict[str, Any]) -> Completion:
+        """
+        Same prompt as review_code, but returns the Completion with its token usage
+        and raises on provider errors (used for quota accounting).
+        """
+        prompt = self._build_prompt(diff, context)
+        return await self._complete("review", REVIEW_SYSTEM_PROMPT, prompt, max_tokens=4096)
+
+    async def triage_code(self, diff: str, context: Dict[str, Any]) -> str:
+        """
+        Run the short risk-classification prompt for a single file.
+
+        Unlike review_code, errors are raised so the caller can decide
+        how to fail (the cascade escalates to the full review).
+
+        Returns:
+            str: The raw model answer, expected to be "RISKY" or "SAFE".
+        """
+        prompt = TRIAGE_PROMPT_TEMPLATE.format(
+            repo=context.get('repo', 'Unknown'),
+            title=context.get('title', 'Unknown Title'),
+            filename=context.get('filename', 'Unknown File'),
+            diff=diff
+        )
+        completion = await self._complete("triage", TRIAGE_SYSTEM_PROMPT, prompt, max_tokens=8)
+        return completion.text
+
+    async def _complete(self, kind: str, system: str, prompt: str, max_tokens: int) -> Completion:
+        """
+        Calls _generate and records latency, token usage and a span for the provider and model.
+        Rate-limited calls are retried up to AI_RATE_LIMIT_RETRIES times with jittered
+        exponential backoff, or after the provider's Retry-After when it sent one.
+        """
+        with tracer.start_as_current_span(f"ai.{kind}", attributes={"ai.provider": self.name, "ai.model": self.model or ""}) as span, \
+                stage(f"ai.{kind}"):
+            call_started = time.perf_counter()
+            for attempt in itertools.count():
+                started = time.perf_counter()
+                outcome = "error"
+                try:
+                    completion = await self._generate(system, prompt, max_tokens=max_tokens)
+                    outcome = "ok"
+                    break
+                except ProviderRateLimitError as e:
+                    outcome = "rate_limited"
+                    if attempt >= settings.AI_RATE_LIMIT_RETRIES:
+                        PROVIDER_RATE_LIMITED.labels(provider=self.name, model=self.model, action="gave_up").inc()
+                        raise
+                    delay = e.retry_after if e.retry_after is not None else (
+                        settings.AI_RATE_LIMIT_BACKOFF * 2 ** attempt * random.uniform(0.5, 1.0)
+                    )
+                finally:
+                    PROVIDER_LATENCY_SECONDS.labels(
+                        provider=self.name, model=self.model, kind=kind, outcome=outcome
+                    ).observe(time.perf_counter() - started)
+
+                PROVIDER_RATE_LIMITED.labels(provider=self.name, model=self.model, action="retried").inc()
+                span.add_event("rate_limited", {"attempt": attempt + 1, "retry_in": delay})
+                logger.warning("%s rate limited (attempt %d), retrying in %.2fs", self.name, attempt + 1, delay)
+                await asyncio.sleep(delay)
+
+            completion.latency_seconds = time.perf_counter() - call_started
+            span.set_attributes({"ai.input_tokens": completion.input_tokens, "ai.output_tokens": completion.output_tokens})
+
+        PROVIDER_TOKENS.labels(provider=self.name, model=self.model, direction="input").inc(completion.input_tokens)
+        PROVIDER_TOKENS.labels(provider=self.name, model=self.model, direction="output").inc(completion.output_tokens)
+        return completion
+
+    @abstractmethod
+    async def _generate(self, system: str, prompt: str, max_tokens: int) -> Completion:
+        """
+        Send a single system + user prompt to the provider and return the answer
+        with its token usage. Implementations should raise on transport or API errors,
+        and ProviderRateLimitError when the provider throttles the call.
+        """
         pass
 
     @abstractmethod
     async def health_check(self) -> bool:
         """
         Check if the AI provider API is reachable and configured properly.
-        
+        Called periodically by the API's readiness probes, so it must not spend tokens
+        (e.g. fetch the configured model's metadata instead of completing a prompt).
+
         Returns:
             bool: True if healthy, False otherwise.
         """
         pass
+
+    def _build_prompt(self, diff: str, context: Dict[str, Any]) -> str:
+        repo = context.get('repo', 'Unknown')
+        title = context.get('title', 'Unknown Title')
+        filename = context.get('filename', 'Unknown File')
+        # Enclosing scopes from app/services/github/context_extractor.py, when available
+        surrounding_code = context.get('surrounding_code') or '(not available)'
+
+        return REVIEW_PROMPT_TEMPLATE.format(
+            repo=repo,
+            title=title,
+            filename=filename,
+            diff=diff,
+            surrounding_code=surrounding_code
+        )
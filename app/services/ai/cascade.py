@@ -0,0 +1,98 @@
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+from app.core.settings import settings
+from app.core.logger import logger
+from app.core.metrics import REVIEW_CASCADE_FILES
+from app.services.ai.base import AIProvider, Completion
+from app.services.ai.factory import get_ai_provider
+
+
+@dataclass
+class CascadeStats:
+    """Per-tier routing counters for a single review run."""
+    triaged: int = 0
+    escalated: int = 0
+    skipped: int = 0
+    triage_errors: int = 0
+    # Reviewer-tier usage, settled against the repo/installation quota after the run
+    reviewed: int = 0
+    review_tokens: int = 0
+
+    def summary(self) -> str:
+        return (
+            f"{self.triaged} triaged | {self.escalated} escalated | "
+            f"{self.skipped} low-risk skipped | {self.triage_errors} triage errors"
+        )
+
+
+class ReviewCascade:
+    """
+    Tiered review routing.
+    In "single" mode every file goes straight to the reviewer. In "cascade" mode a cheap
+    triage provider classifies each patch first and only RISKY files reach the reviewer.
+    Triage failures or unclear answers always escalate, so the cascade never loses coverage.
+    """
+
+    def __init__(self):
+        self.reviewer: AIProvider = get_ai_provider()
+        self.triage: Optional[AIProvider] = None
+        if settings.AI_REVIEW_MODE.lower() == "cascade":
+            self.triage = get_ai_provider(settings.AI_TRIAGE_PROVIDER, settings.AI_TRIAGE_MODEL)
+        self.stats = CascadeStats()
+        # Reviewer answer of the latest review_code call (None if it failed)
+        self.last_completion: Optional[Completion] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.triage is not None
+
+    async def needs_review(self, diff: str, context: Dict[str, Any]) -> bool:
+        """Triage tier: False if the file was rated low risk and needs no review. Always True in single mode."""
+        if self.triage is None:
+            return True
+        if not await self._is_risky(diff, context):
+            self.stats.skipped += 1
+            REVIEW_CASCADE_FILES.labels(outcome="skipped").inc()
+            return False
+        self.stats.escalated += 1
+        REVIEW_CASCADE_FILES.labels(outcome="escalated").inc()
+        return True
+
+    async def review_code(self, diff: str, context: Dict[str, Any]) -> str:
+        """
+        Reviewer tier: returns the reviewer output. Call needs_review first; `context` may gain
+        what only the reviewer needs (surrounding code) in between.
+        """
+        self.last_completion = None
+        self.stats.reviewed += 1
+        REVIEW_CASCADE_FILES.labels(outcome="reviewed").inc()
+        try:
+            completion = await self.reviewer.review(diff, context)
+        except Exception as e:
+            logger.error("%s API Error: %s", self.reviewer.name, e)
+            return f"Error analyzing code with {self.reviewer.name}: {str(e)}"
+        self.stats.review_tokens += completion.input_tokens + completion.output_tokens
+        self.last_completion = completion
+        return completion.text
+
+    def degrade(self) -> None:
+        """Switch the reviewer tier to the cheaper QUOTA_DEGRADE_* model."""
+        self.reviewer = get_ai_provider(settings.QUOTA_DEGRADE_PROVIDER, settings.QUOTA_DEGRADE_MODEL)
+
+    async def _is_risky(self, diff: str, context: Dict[str, Any]) -> bool:
+        self.stats.triaged += 1
+        REVIEW_CASCADE_FILES.labels(outcome="triaged").inc()
+        filename = context.get("filename")
+        try:
+            answer = await self.triage.triage_code(diff, context)
+        except Exception as e:
+            self.stats.triage_errors += 1
+            REVIEW_CASCADE_FILES.labels(outcome="triage_error").inc()
+            logger.warning("Triage failed for %s, escalating to reviewer: %s", filename, e)
+            return True
+
+        verdict = answer.strip().upper()
+        risky = not verdict.startswith("SAFE")
+        logger.info("Triage rated %s as %s", filename, "RISKY" if risky else "SAFE")
+        return risky
@@ -1,39 +1,61 @@
+from typing import Dict, List, Tuple
+
 from app.core.settings import settings
 from app.core.logger import logger
 from app.services.ai.base import AIProvider
 
-_provider_instance: AIProvider | None = None
+SUPPORTED_PROVIDERS = ("anthropic", "openai", "gemini", "groq", "ollama", "fake")
+
+def configured_providers() -> List[Tuple[str, str | None]]:
+    """(provider, model) pairs a review can use with the current settings."""
+    providers = [(settings.AI_PROVIDER, settings.AI_MODEL)]
+    if settings.AI_REVIEW_MODE.lower() == "cascade":
+        providers.append((settings.AI_TRIAGE_PROVIDER, settings.AI_TRIAGE_MODEL))
+    if settings.QUOTA_ENABLED and settings.QUOTA_EXCEEDED_ACTION == "degrade":
+        providers.append((settings.QUOTA_DEGRADE_PROVIDER, settings.QUOTA_DEGRADE_MODEL))
+    return list(dict.fromkeys((name.lower(), model) for name, model in providers))
+
+# One instance per (provider, model) pair so several tiers can coexist
+_provider_instances: Dict[Tuple[str, str | None], AIProvider] = {}
 
-def get_ai_provider() -> AIProvider:
+def get_ai_provider(provider_name: str | None = None, model: str | None = None) -> AIProvider:
     """
-    Factory function to instantiate and return the configured AI Provider.
-    Raises ValueError on startup if the requested AI_PROVIDER is unsupported.
-    It returns a singleton instance.
+    Factory function to instantiate and return an AI Provider.
+    Without arguments it returns the configured reviewer (AI_PROVIDER / AI_MODEL).
+    Raises ValueError if the requested provider is unsupported.
+    Instances are cached per (provider, model) pair.
     """
-    global _provider_instance
-    if _provider_instance is not None:
-        return _provider_instance
+    if provider_name is None:
+        provider_name = settings.AI_PROVIDER
+        model = model or settings.AI_MODEL
+
+    provider_name = provider_name.lower()
+    cache_key = (provider_name, model)
+    if cache_key in _provider_instances:
+        return _provider_instances[cache_key]
 
-    provider_name = settings.AI_PROVIDER.lower()
-    
     match provider_name:
         case "anthropic":
             from app.services.ai.anthropic import AnthropicProvider
-            _provider_instance = AnthropicProvider()
+            provider = AnthropicProvider(model)
         case "openai":
             from app.services.ai.openai import OpenAIProvider
-            _provider_instance = OpenAIProvider()
+            provider = OpenAIProvider(model)
         case "gemini":
             from app.services.ai.gemini import GeminiProvider
-            _provider_instance = GeminiProvider()
+            provider = GeminiProvider(model)
         case "groq":
             from app.services.ai.groq import GroqProvider
-            _provider_instance = GroqProvider()
+            provider = GroqProvider(model)
         case "ollama":
             from app.services.ai.ollama import OllamaProvider
-            _provider_instance = OllamaProvider()
+            provider = OllamaProvider(model)
+        case "fake":
+            from app.services.ai.fake import FakeProvider
+            provider = FakeProvider(model)
         case _:
-            raise ValueError(f"Unsupported AI_PROVIDER configured: '{provider_name}'. Must be one of: anthropic, openai, gemini, groq, ollama.")
-            
-    logger.info(f"Initialized AI Provider: {provider_name.capitalize()}")
-    return _provider_instance
+            raise ValueError(f"Unsupported AI provider: '{provider_name}'. Must be one of: {', '.join(SUPPORTED_PROVIDERS)}.")
+
+    _provider_instances[cache_key] = provider
+    logger.info("Initialized AI Provider: %s (%s)", provider_name.capitalize(), provider.model)
+    return provider
@@ -0,0 +1,103 @@
+import asyncio
+import itertools
+import json
+import math
+import random
+from typing import Any, Dict, List
+
+from app.core.logger import logger
+from app.core.settings import settings
+from app.services.ai.base import AIProvider, Completion, ProviderRateLimitError
+from app.services.ai.prompt import TRIAGE_SYSTEM_PROMPT
+
+# Used when FAKE_AI_RESPONSES is not set: one answer per verdict, played in turn. Findings sit on
+# new-file lines inside the hunk benchmarks/fake_github.py generates (lines 11-50), so they post inline.
+DEFAULT_RESPONSES: List[Dict[str, Any]] = [
+    {
+        "summary": "Fake review without findings.",
+        "file_type": "GENERAL",
+        "files": [{"filename": "fake", "issues": []}],
+        "verdict": "APPROVE",
+        "score": 95,
+    },
+    {
+        "summary": "Fake review with one medium finding.",
+        "file_type": "BACKEND",
+        "files": [{"filename": "fake", "issues": [{
+            "severity": "MEDIUM",
+            "line": 13,
+            "title": "Query inside loop",
+            "description": "Scripted finding from the fake provider.",
+            "suggestion": "batch = fetch_all(ids)",
+        }]}],
+        "verdict": "COMMENT",
+        "score": 70,
+    },
+    {
+        "summary": "Fake review with one high finding.",
+        "file_type": "BACKEND",
+        "files": [{"filename": "fake", "issues": [{
+            "severity": "HIGH",
+            "line": 11,
+            "title": "Unchecked None dereference",
+            "description": "Scripted finding from the fake provider.",
+            "suggestion": "if user is not None:\n    name = user.name",
+        }]}],
+        "verdict": "REQUEST_CHANGES",
+        "score": 40,
+    },
+]
+
+
+class FakeProvider(AIProvider):
+    """
+    Offline provider for benchmarks (AI_PROVIDER=fake). No network, no API key.
+
+    Review calls answer with scripted JSON (FAKE_AI_RESPONSES, cycled), triage calls answer
+    RISKY with probability FAKE_AI_RISKY_RATE. Each call sleeps for a log-normal latency with
+    mean FAKE_AI_LATENCY_MS, and fails with a 429 with probability FAKE_AI_RATE_LIMIT_RATE so the
+    retry and backoff path in `_complete` can be measured. Token usage is estimated from text length.
+    """
+    name = "Fake"
+
+    def __init__(self, model: str | None = None):
+        super().__init__(model or "fake-reviewer")
+        self._rng = random.Random(settings.FAKE_AI_SEED)
+        self._responses = itertools.cycle(self._load_responses(settings.FAKE_AI_RESPONSES))
+
+    @staticmethod
+    def _load_responses(path: str) -> List[str]:
+        if not path:
+            return [json.dumps(response) for response in DEFAULT_RESPONSES]
+        with open(path, encoding="utf-8") as f:
+            responses = [line.strip() for line in f if line.strip()]
+        if not responses:
+            raise ValueError(f"FAKE_AI_RESPONSES file {path} has no responses")
+        logger.info("Fake provider loaded %d scripted responses from %s", len(responses), path)
+        return responses
+
+    def _latency(self) -> float:
+        mean = settings.FAKE_AI_LATENCY_MS / 1000
+        sigma = settings.FAKE_AI_LATENCY_SIGMA
+        if sigma <= 0:
+            return mean
+        # Pick mu so the distribution's mean (not its median) is FAKE_AI_LATENCY_MS
+        return self._rng.lognormvariate(math.log(mean) - sigma ** 2 / 2, sigma) if mean > 0 else 0.0
+
+    async def _generate(self, system: str, prompt: str, max_tokens: int) -> Completion:
+        await asyncio.sleep(self._latency())
+        if self._rng.random() < settings.FAKE_AI_RATE_LIMIT_RATE:
+            raise ProviderRateLimitError("Fake provider rate limit")
+
+        if system == TRIAGE_SYSTEM_PROMPT:
+            text = "RISKY" if self._rng.random() < settings.FAKE_AI_RISKY_RATE else "SAFE"
+        else:
+            text = next(self._responses)
+        return Completion(
+            text=text,
+            input_tokens=(len(system) + len(prompt)) // 4,
+            output_tokens=max(1, len(text) // 4),
+        )
+
+    async def health_check(self) -> bool:
+        return True
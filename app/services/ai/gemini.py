@@ -1,55 +1,37 @@
 import google.generativeai as genai
-from typing import Dict, Any
 
 from app.core.settings import settings
 from app.core.logger import logger
-from app.services.ai.base import AIProvider
-from app.services.ai.prompt import REVIEW_PROMPT_TEMPLATE
-from app.services.ai.base import AIProvider
+from app.services.ai.base import AIProvider, Completion
 
 class GeminiProvider(AIProvider):
-    def __init__(self):
+    name = "Gemini"
+
+    def __init__(self, model: str | None = None):
+        super().__init__(model or "gemini-2.5-pro")
         self.api_key = settings.GEMINI_API_KEY
         if not self.api_key:
             logger.warning("GEMINI_API_KEY is not set but GeminiProvider was instantiated.")
             
         genai.configure(api_key=self.api_key)
-        self.model_name = settings.AI_MODEL or "gemini-2.5-pro"
-        
-        # We instantiate it directly
-        self.model = genai.GenerativeModel(
-            model_name=self.model_name
-        )
 
-    async def review_code(self, diff: str, context: Dict[str, Any]) -> str:
-        prompt = self._build_prompt(diff, context)
-        
-        try:
-            # Use async generation wrapper since standard generativeai sdk might be sync depending on the method
-            # For purely async, SDK has generate_content_async since v0.5.0
-            response = await self.model.generate_content_async(
-                contents=prompt,
-                generation_config=genai.GenerationConfig(
-                    temperature=0.2,
-                    max_output_tokens=4096,
-                )
+    async def _generate(self, system: str, prompt: str, max_tokens: int) -> Completion:
+        # The system instruction is bound to the GenerativeModel, so build one per prompt kind.
+        # For purely async, SDK has generate_content_async since v0.5.0
+        model = genai.GenerativeModel(model_name=self.model, system_instruction=system)
+        response = await model.generate_content_async(
+            contents=prompt,
+            generation_config=genai.GenerationConfig(
+                temperature=0.2,
+                max_output_tokens=max_tokens,
             )
-            return response.text
-        except Exception as e:
-            logger.error(f"Gemini API Error: {str(e)}")
-            return f"Error analyzing code with Gemini: {str(e)}"
+        )
+        usage = response.usage_metadata
+        return Completion(
+            text=response.text,
+            input_tokens=usage.prompt_token_count if usage else 0,
+            output_tokens=usage.candidates_token_count if usage else 0,
+        )
 
     async def health_check(self) -> bool:
         return bool(self.api_key)
-
-    def _build_prompt(self, diff: str, context: Dict[str, Any]) -> str:
-        repo = context.get('repo', 'Unknown')
-        title = context.get('title', 'Unknown Title')
-        filename = context.get('filename', 'Unknown File')
-        
-        return REVIEW_PROMPT_TEMPLATE.format(
-            repo=repo,
-            title=title,
-            filename=filename,
-            diff=diff
-        )
@@ -1,45 +1,42 @@
-from typing import Dict, Any
 import httpx
 
 from app.core.settings import settings
-from app.core.logger import logger
-from app.services.ai.base import AIProvider
-from app.services.ai.prompt import REVIEW_PROMPT_TEMPLATE
+from app.services.ai.base import AIProvider, Completion, ProviderRateLimitError
 
 class OllamaProvider(AIProvider):
-    def __init__(self):
+    name = "Ollama"
+
+    def __init__(self, model: str | None = None):
+        super().__init__(model or "codellama")
         self.base_url = settings.OLLAMA_BASE_URL.rstrip("/")
-        self.model = settings.AI_MODEL or "codellama"
-        
-    async def review_code(self, diff: str, context: Dict[str, Any]) -> str:
-        prompt = self._build_prompt(diff, context)
-        
+
+    async def _generate(self, system: str, prompt: str, max_tokens: int) -> Completion:
         # Ollama expects standard API format for chat
         payload = {
             "model": self.model,
             "messages": [
-                {"role": "system", "content": "You are a senior backend engineer performing a thorough code review. Focus on identifying bugs, security issues, performance bottlenecks, code smells, and missing error handling. Keep feedback concise, actionable, and formatted in markdown. No fluff, just real professional comments."},
+                {"role": "system", "content": system},
                 {"role": "user", "content": prompt}
             ],
             "stream": False,
             "options": {
                 "temperature": 0.2,
-                "num_predict": 4096
+                "num_predict": max_tokens
             }
         }
         
-        try:
-            async with httpx.AsyncClient(timeout=120.0) as client:
-                response = await client.post(f"{self.base_url}/api/chat", json=payload)
-                response.raise_for_status()
-                data = response.json()
-                return data.get("message", {}).get("content", "")
-        except httpx.HTTPError as e:
-            logger.error(f"Ollama API Error: {str(e)}")
-            return f"Error analyzing code with Ollama: {str(e)}"
-        except Exception as e:
-            logger.error(f"Ollama Unexpected Error: {str(e)}")
-            return f"Unexpected error with Ollama: {str(e)}"
+        async with httpx.AsyncClient(timeout=120.0) as client:
+            response = await client.post(f"{self.base_url}/api/chat", json=payload)
+            if response.status_code == 429:
+                retry_after = response.headers.get("Retry-After")
+                raise ProviderRateLimitError("Ollama returned 429", float(retry_after) if retry_after and retry_after.isdigit() else None)
+            response.raise_for_status()
+            data = response.json()
+            return Completion(
+                text=data.get("message", {}).get("content", ""),
+                input_tokens=data.get("prompt_eval_count", 0),
+                output_tokens=data.get("eval_count", 0),
+            )
 
     async def health_check(self) -> bool:
         try:
@@ -48,15 +45,3 @@ class OllamaProvider(AIProvider):
                 return response.status_code == 200
         except Exception:
             return False
-
-    def _build_prompt(self, diff: str, context: Dict[str, Any]) -> str:
-        repo = context.get('repo', 'Unknown')
-        title = context.get('title', 'Unknown Title')
-        filename = context.get('filename', 'Unknown File')
-        
-        return REVIEW_PROMPT_TEMPLATE.format(
-            repo=repo,
-            title=title,
-            filename=filename,
-            diff=diff
-        )
@@ -5,6 +5,8 @@
 ╚══════════════════════════════════════════════════════════════════════════════╝
 
 Edit REVIEW_PROMPT_TEMPLATE to adjust behavior.
+TRIAGE_PROMPT_TEMPLATE is the short risk-classification prompt used by the
+cheap first tier when AI_REVIEW_MODE=cascade.
 The template supports all change types:
   - React / Frontend (components, hooks, styles, state)
   - Backend (REST APIs, GraphQL, business logic)
@@ -15,6 +17,42 @@ The template supports all change types:
   - Documentation / Markdown
 """
 
+REVIEW_SYSTEM_PROMPT = (
+    "You are a senior backend engineer performing a thorough code review. "
+    "Focus on identifying bugs, security issues, performance bottlenecks, code smells, "
+    "and missing error handling. Keep feedback concise, actionable, and formatted in markdown. "
+    "No fluff, just real professional comments."
+)
+
+TRIAGE_SYSTEM_PROMPT = (
+    "You are a fast triage step in a code review pipeline. "
+    "You classify how risky a change is. You never review the code in detail."
+)
+
+TRIAGE_PROMPT_TEMPLATE = """
+Classify the risk of this single-file change in a pull request.
+
+Repository : {repo}
+File       : {filename}
+PR Title   : {title}
+
+```diff
+{diff}
+```
+
+Answer RISKY if the change touches ANY of: authentication, authorization,
+secrets, cryptography, payments or money, database schemas or migrations,
+SQL or query building, concurrency, input parsing or validation, network or
+file I/O, infrastructure or deployment config, or non-trivial business logic.
+
+Answer SAFE only for changes such as typo fixes, comments, documentation,
+formatting, renames with no behavior change, or trivial test data.
+
+When in doubt, answer RISKY.
+
+Output exactly one word: RISKY or SAFE.
+"""
+
 REVIEW_PROMPT_TEMPLATE = """
 ████████████████████████████████████████████████████████████████████████████████
 █                        MANDATORY CODE REVIEW TASK                           █
@@ -41,6 +79,14 @@ DIFF (lines with "+" are ADDED, lines with "-" are REMOVED, no prefix = context)
 {diff}
 ```
 
+SURROUNDING CODE (the unchanged function, class or block around each change, with
+new-file line numbers; use it to understand the change, but only report issues in
+the DIFF):
+
+```
+{surrounding_code}
+```
+
 ════════════════════════════════════════════════════════════════════════════════
 SECTION 2 — DETECT FILE TYPE
 ════════════════════════════════════════════════════════════════════════════════
@@ -417,7 +463,9 @@ FIELD RULES:
                      object per issue found. Do NOT group multiple issues into one.
   "severity"       → String. Must be exactly one of (all caps):
                      CRITICAL, HIGH, MEDIUM, LOW, SUGGESTION
-  "line"           → Integer. Line number in the diff where the issue appears.
+  "line"           → Integer. Line number in the NEW version of the file where
+                     the issue appears, counted from the "+" start of the @@
+                     hunk header (the number GitHub shows beside the line).
                      Use 0 if the issue applies to the whole file and has no
                      single line. Never use null or a string.
   "title"          → String. 10 words or fewer. Describes the issue, not the file.
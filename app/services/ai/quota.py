@@ -0,0 +1,203 @@
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from redis.exceptions import RedisError
+
+from app.core.logger import logger
+from app.core.settings import settings
+from app.infrastructure.redis_client import get_redis
+from app.services.ai.prompt import REVIEW_PROMPT_TEMPLATE, REVIEW_SYSTEM_PROMPT
+
+# Rough token estimate used for the up-front reservation; settle() corrects it with real usage
+CHARS_PER_TOKEN = 4
+PROMPT_OVERHEAD_TOKENS = (len(REVIEW_SYSTEM_PROMPT) + len(REVIEW_PROMPT_TEMPLATE)) // CHARS_PER_TOKEN
+EXPECTED_OUTPUT_TOKENS = 1024
+
+QUOTA_ACTIONS = ("degrade", "defer", "skip")
+
+# Atomic all-or-nothing debit of several token buckets.
+# KEYS: bucket hashes. ARGV: force flag, then capacity, refill rate (units/second), cost per key.
+# Returns {1} when debited, or {0, denied key index, seconds until it can be satisfied (-1 = never)}.
+# With force=1 the debit always happens (levels may go negative), which is how usage of degraded
+# reviews and settle() corrections are recorded.
+_DEBIT_SCRIPT = """
+local force = tonumber(ARGV[1])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local levels = {}
+local denied, wait = 0, 0
+for i = 1, #KEYS do
+  local cap = tonumber(ARGV[3 * i - 1])
+  local rate = tonumber(ARGV[3 * i])
+  local cost = tonumber(ARGV[3 * i + 1])
+  local state = redis.call('HMGET', KEYS[i], 'level', 'ts')
+  local level = tonumber(state[1]) or cap
+  local ts = tonumber(state[2]) or now
+  level = math.min(cap, level + math.max(0, now - ts) * rate)
+  levels[i] = level
+  if force == 0 and cost > 0 and level < cost then
+    local needed = -1
+    if cost <= cap then needed = (cost - level) / rate end
+    if denied == 0 or needed < 0 or (wait >= 0 and needed > wait) then
+      denied, wait = i, needed
+    end
+  end
+end
+if denied > 0 then
+  return {0, denied, tostring(wait)}
+end
+for i = 1, #KEYS do
+  local cap = tonumber(ARGV[3 * i - 1])
+  local rate = tonumber(ARGV[3 * i])
+  local cost = tonumber(ARGV[3 * i + 1])
+  local level = math.min(cap, levels[i] - cost)
+  redis.call('HSET', KEYS[i], 'level', tostring(level), 'ts', tostring(now))
+  redis.call('EXPIRE', KEYS[i], math.ceil(cap / rate) + 60)
+end
+return {1}
+"""
+
+
+@dataclass(frozen=True)
+class QuotaBucket:
+    """One rolling-window budget, e.g. the daily token budget of a single repository."""
+    scope: str       # "repo" or "installation"
+    scope_id: str
+    resource: str    # "tokens" or "requests"
+    limit: int
+
+    @property
+    def key(self) -> str:
+        return f"quota:{self.scope}:{self.scope_id}:{self.resource}"
+
+    @property
+    def refill_rate(self) -> float:
+        return self.limit / settings.QUOTA_WINDOW_SECONDS
+
+
+@dataclass
+class QuotaDecision:
+    allowed: bool
+    # The first bucket that could not cover the reservation
+    bucket: Optional[QuotaBucket] = None
+    # Seconds until the reservation fits again; None if it never will (larger than the budget)
+    retry_after: Optional[float] = None
+
+    @property
+    def reason(self) -> str:
+        if self.bucket is None:
+            return ""
+        return f"{self.bucket.scope} {self.bucket.resource} quota exhausted for {self.bucket.scope_id}"
+
+
+class ReviewDeferred(Exception):
+    """Raised by the review pipeline when QUOTA_EXCEEDED_ACTION=defer; the task retries later."""
+
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(reason)
+        self.retry_after = retry_after
+
+
+class QuotaManager:
+    """
+    Per-repository and per-installation budgets for LLM tokens and review requests.
+
+    Each budget is a Redis token bucket that refills continuously over QUOTA_WINDOW_SECONDS,
+    which gives a rolling window without storing individual calls. A review reserves its
+    estimated cost up front in one atomic script across all of its buckets, then `settle`
+    corrects the reservation with the real token usage reported by the provider.
+    Redis errors fail open: a broken quota store must not stop reviews.
+    """
+
+    def __init__(self):
+        self.enabled = settings.QUOTA_ENABLED
+        self._script = None
+
+    def buckets_for(self, repo: str, installation_id: Optional[Any]) -> List[QuotaBucket]:
+        buckets = [
+            QuotaBucket("repo", repo, "tokens", settings.QUOTA_REPO_TOKENS),
+            QuotaBucket("repo", repo, "requests", settings.QUOTA_REPO_REQUESTS),
+        ]
+        if installation_id:
+            buckets += [
+                QuotaBucket("installation", str(installation_id), "tokens", settings.QUOTA_INSTALLATION_TOKENS),
+                QuotaBucket("installation", str(installation_id), "requests", settings.QUOTA_INSTALLATION_REQUESTS),
+            ]
+        # A limit of 0 disables that budget
+        return [bucket for bucket in buckets if bucket.limit > 0]
+
+    @staticmethod
+    def estimate_tokens(patches: List[str]) -> int:
+        # Surrounding code is charged at its cap; settle() corrects to the real usage
+        context = settings.REVIEW_CONTEXT_MAX_TOKENS if settings.REVIEW_CONTEXT_ENABLED else 0
+        return sum(
+            PROMPT_OVERHEAD_TOKENS + len(patch) // CHARS_PER_TOKEN + context + EXPECTED_OUTPUT_TOKENS
+            for patch in patches
+        )
+
+    async def reserve(self, buckets: List[QuotaBucket], tokens: int, requests: int) -> QuotaDecision:
+        """Debit the estimated cost from every bucket, or from none if any of them can't cover it."""
+        if not self.enabled or not buckets:
+            return QuotaDecision(allowed=True)
+        try:
+            result = await self._debit(buckets, tokens, requests, force=False)
+        except RedisError as e:
+            logger.warning("Quota store unavailable, allowing review: %s", e)
+            return QuotaDecision(allowed=True)
+
+        if int(result[0]) == 1:
+            return QuotaDecision(allowed=True)
+        wait = float(result[2])
+        return QuotaDecision(
+            allowed=False,
+            bucket=buckets[int(result[1]) - 1],
+            retry_after=wait if wait >= 0 else None,
+        )
+
+    async def charge(self, buckets: List[QuotaBucket], tokens: int, requests: int) -> None:
+        """Record usage unconditionally. Negative amounts refund an over-estimated reservation."""
+        if not self.enabled or not buckets or (tokens == 0 and requests == 0):
+            return
+        try:
+            await self._debit(buckets, tokens, requests, force=True)
+        except RedisError as e:
+            logger.warning("Failed to record quota usage: %s", e)
+
+    async def settle(self, buckets: List[QuotaBucket], reserved_tokens: int, reserved_requests: int,
+                     used_tokens: int, used_requests: int) -> None:
+        await self.charge(buckets, used_tokens - reserved_tokens, used_requests - reserved_requests)
+
+    async def usage(self, buckets: List[QuotaBucket]) -> List[Dict[str, Any]]:
+        """Current level of each bucket, refilled up to now, for the quota API."""
+        redis = get_redis()
+        now = time.time()
+        report = []
+        for bucket in buckets:
+            level, ts = await redis.hmget(bucket.key, "level", "ts")
+            available = float(bucket.limit) if level is None else min(
+                bucket.limit, float(level) + max(0.0, now - float(ts)) * bucket.refill_rate
+            )
+            report.append({
+                "scope": bucket.scope,
+                "id": bucket.scope_id,
+                "resource": bucket.resource,
+                "limit": bucket.limit,
+                "window_seconds": settings.QUOTA_WINDOW_SECONDS,
+                "available": round(available, 2),
+                "used": round(bucket.limit - available, 2),
+            })
+        return report
+
+    async def _debit(self, buckets: List[QuotaBucket], tokens: int, requests: int, force: bool):
+        if self._script is None:
+            # register_script is client-agnostic; pass the per-loop client on every call
+            self._script = get_redis().register_script(_DEBIT_SCRIPT)
+        args: List[Any] = [1 if force else 0]
+        for bucket in buckets:
+            cost = tokens if bucket.resource == "tokens" else requests
+            args += [bucket.limit, bucket.refill_rate, cost]
+        return await self._script(keys=[bucket.key for bucket in buckets], args=args, client=get_redis())
+
+
+quota_manager = QuotaManager()
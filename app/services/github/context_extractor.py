@@ -0,0 +1,200 @@
+"""
+Enclosing-scope context for a patch: the function, class or block around each hunk, taken from
+the file at the PR head and rendered for the `{surrounding_code}` section of the review prompt.
+
+Scopes are found with `ast` for Python and with indentation or brace matching for everything
+else (Python that does not parse falls back to indentation). Lines the diff already shows are
+elided, the smallest scopes are added first, and rendering stops at the token budget; a scope
+that does not fit whole is cut down to its opening lines.
+
+Kept free of I/O like review_report.py.
+"""
+import ast
+import os
+import re
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+from app.services.ai.quota import CHARS_PER_TOKEN
+from app.services.github.diff_index import DiffIndex
+
+BRACE_EXTENSIONS = {
+    ".c", ".cc", ".cpp", ".cs", ".go", ".h", ".hpp", ".java", ".js", ".jsx", ".kt", ".mjs",
+    ".php", ".rs", ".scala", ".swift", ".ts", ".tsx",
+}
+PYTHON_EXTENSIONS = {".py", ".pyi"}
+
+# String literals and line comments, blanked out before counting braces
+_NOISE = re.compile(r'"(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\'|`[^`]*`|//.*$|#.*$')
+
+_PY_SCOPES = (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)
+
+
+@dataclass
+class Scope:
+    """1-based inclusive new-file line range of one enclosing scope."""
+    start: int
+    end: int
+    label: str
+
+    @property
+    def size(self) -> int:
+        return self.end - self.start + 1
+
+
+def _indent(line: str) -> int:
+    return len(line) - len(line.lstrip())
+
+
+def python_scopes(source: str, hunks: List[Tuple[int, int]]) -> Optional[List[Scope]]:
+    """Innermost def or class around each hunk; None if the source doesn't parse."""
+    try:
+        tree = ast.parse(source)
+    except (SyntaxError, ValueError):
+        return None
+    nodes = [
+        (min([node.lineno] + [d.lineno for d in node.decorator_list]), node.end_lineno, node)
+        for node in ast.walk(tree) if isinstance(node, _PY_SCOPES)
+    ]
+    scopes = []
+    for first, last in hunks:
+        around = [(start, end, node) for start, end, node in nodes if start <= first and last <= end]
+        if around:
+            start, end, node = max(around, key=lambda item: item[0])
+            kind = "class" if isinstance(node, ast.ClassDef) else "def"
+            scopes.append(Scope(start, end, f"{kind} {node.name}"))
+    return scopes
+
+
+def indent_scopes(lines: List[str], hunks: List[Tuple[int, int]]) -> List[Scope]:
+    """The block opened by the nearest less-indented line above each hunk, to where the indentation returns."""
+    scopes = []
+    for first, last in hunks:
+        body = next((i for i in range(first - 1, min(last, len(lines))) if lines[i].strip()), None)
+        if body is None or _indent(lines[body]) == 0:
+            continue
+        target = _indent(lines[body])
+        header = next((i for i in range(body - 1, -1, -1) if lines[i].strip() and _indent(lines[i]) < target), None)
+        if header is None:
+            continue
+        level = _indent(lines[header])
+        end = len(lines) - 1
+        for i in range(max(last, header + 1), len(lines)):
+            if lines[i].strip() and _indent(lines[i]) <= level:
+                # A closing "}" / "end" at the header's level still belongs to the block
+                end = i if lines[i].strip()[0] in "})]" or lines[i].strip() == "end" else i - 1
+                break
+        while end > header and not lines[end].strip():
+            end -= 1
+        scopes.append(Scope(header + 1, end + 1, lines[header].strip()[:60]))
+    return scopes
+
+
+def brace_scopes(lines: List[str], hunks: List[Tuple[int, int]]) -> List[Scope]:
+    """The innermost {...} block that contains each hunk."""
+    code = [_NOISE.sub("", line) for line in lines]
+    scopes = []
+    for first, last in hunks:
+        # Walk up from the line above the hunk to the "{" that is still open there
+        depth, opener = 0, None
+        for i in range(min(first - 1, len(code)) - 1, -1, -1):
+            for char in reversed(code[i]):
+                if char == "}":
+                    depth += 1
+                elif char == "{":
+                    if depth == 0:
+                        opener = i
+                        break
+                    depth -= 1
+            if opener is not None:
+                break
+        if opener is None:
+            continue
+
+        # Then down to the brace that closes it
+        depth, closer = 0, len(code) - 1
+        started = False
+        for i in range(opener, len(code)):
+            for char in code[i]:
+                if char == "{":
+                    depth += 1
+                    started = True
+                elif char == "}":
+                    depth -= 1
+            if started and depth <= 0:
+                closer = i
+                break
+        if closer + 1 < last:
+            # The hunk runs past the block; a brace inside the hunk opened it
+            continue
+        # Start at the signature when the brace sits on its own line
+        start = opener
+        if code[opener].strip() == "{" and opener > 0:
+            start = opener - 1
+        scopes.append(Scope(start + 1, closer + 1, lines[start].strip()[:60]))
+    return scopes
+
+
+def find_scopes(filename: str, source: str, hunks: List[Tuple[int, int]]) -> List[Scope]:
+    ext = os.path.splitext(filename)[1].lower()
+    lines = source.splitlines()
+    if ext in PYTHON_EXTENSIONS:
+        scopes = python_scopes(source, hunks)
+        if scopes is not None:
+            return scopes
+    elif ext in BRACE_EXTENSIONS:
+        return brace_scopes(lines, hunks)
+    return indent_scopes(lines, hunks)
+
+
+def _render(scope: Scope, lines: List[str], shown: List[Tuple[int, int]]) -> List[str]:
+    width = len(str(scope.end))
+    out = [f"# {scope.label} (lines {scope.start}-{scope.end})"]
+    line = scope.start
+    while line <= scope.end:
+        hunk = next(((a, b) for a, b in shown if a <= line <= b), None)
+        if hunk is not None:
+            out.append(f"{'':>{width}} | ... lines {line}-{min(hunk[1], scope.end)} are in the diff")
+            line = hunk[1] + 1
+            continue
+        out.append(f"{line:>{width}} | {lines[line - 1]}")
+        line += 1
+    return out
+
+
+def extract_context(filename: str, source: str, patch: str, max_tokens: int) -> str:
+    """Enclosing scopes of the patch's hunks in `source`, at most about `max_tokens` tokens; "" if none."""
+    if max_tokens <= 0:
+        return ""
+    hunks = DiffIndex(patch).hunks
+    lines = source.splitlines()
+    scopes: List[Scope] = []
+    for scope in find_scopes(filename, source, hunks):
+        scope.end = min(scope.end, len(lines))
+        # Several hunks in one function share its scope; keep the outermost once
+        if scope.start > scope.end or any(s.start <= scope.start and scope.end <= s.end for s in scopes):
+            continue
+        scopes = [s for s in scopes if not (scope.start <= s.start and s.end <= scope.end)] + [scope]
+
+    budget = max_tokens * CHARS_PER_TOKEN
+    sections = []
+    for scope in sorted(scopes, key=lambda s: s.size):
+        rendered = _render(scope, lines, hunks)
+        if not any(" | ... lines " not in line for line in rendered[1:]):
+            # Every line of the scope is already in the diff
+            continue
+        if sum(len(line) + 1 for line in rendered) > budget:
+            # Keep the opening lines (signature, docstring) that still fit
+            marker = "... rest of the scope omitted"
+            kept, used = [], len(marker) + 1
+            for line in rendered:
+                if used + len(line) + 1 > budget:
+                    break
+                kept.append(line)
+                used += len(line) + 1
+            if len(kept) < 2:
+                break
+            rendered = kept + [marker]
+        sections.append((scope.start, "\n".join(rendered)))
+        budget -= sum(len(line) + 1 for line in rendered)
+    return "\n\n".join(text for _, text in sorted(sections))
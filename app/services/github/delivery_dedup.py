@@ -0,0 +1,97 @@
+import hashlib
+import math
+from typing import Any, Dict, Optional
+
+from redis.exceptions import RedisError
+
+from app.core.logger import logger
+from app.core.metrics import WEBHOOK_DUPLICATES_DROPPED
+from app.core.settings import settings
+from app.infrastructure.redis_client import get_redis
+
+
+class BloomFilter:
+    """Small in-process Bloom filter over string keys (double hashing on one blake2b digest)."""
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key: str):
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.hash_count):
+            yield (h1 + i * h2) % self.size
+
+    def add(self, key: str) -> None:
+        for pos in self._positions(key):
+            self._bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, key: str) -> bool:
+        return all(self._bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+
+class DeliveryDeduplicator:
+    """
+    Idempotency guard keyed on the X-GitHub-Delivery header.
+
+    A delivery is claimed with a single `SET key 1 NX EX ttl`, so the hot path is one
+    Redis round trip whether the delivery is new or a redelivery. The optional Bloom
+    filter remembers deliveries seen by this process and is consulted only when Redis
+    is unreachable; a Bloom positive is never trusted over Redis because a false
+    positive would silently drop a legitimate delivery.
+    """
+
+    KEY_PREFIX = "github:delivery:"
+
+    def __init__(self):
+        self.ttl = settings.DELIVERY_DEDUP_TTL_SECONDS
+        self.bloom: Optional[BloomFilter] = None
+        if settings.DELIVERY_DEDUP_BLOOM_CAPACITY > 0:
+            self.bloom = BloomFilter(settings.DELIVERY_DEDUP_BLOOM_CAPACITY, error_rate=0.001)
+
+        self.accepted = 0
+        self.duplicates_dropped = 0
+        self.redis_errors = 0
+
+    async def claim(self, delivery_id: Optional[str]) -> bool:
+        """Returns True if this delivery should be processed, False if it is a duplicate."""
+        if not delivery_id:
+            return True
+
+        try:
+            is_new = bool(await get_redis().set(self.KEY_PREFIX + delivery_id, 1, nx=True, ex=self.ttl))
+        except RedisError as e:
+            self.redis_errors += 1
+            logger.warning("Delivery dedup falling back to local state, Redis unavailable: %s", e)
+            is_new = self.bloom is None or delivery_id not in self.bloom
+
+        if self.bloom is not None:
+            self.bloom.add(delivery_id)
+
+        if is_new:
+            self.accepted += 1
+        else:
+            self.duplicates_dropped += 1
+            WEBHOOK_DUPLICATES_DROPPED.inc()
+            logger.info("Dropping duplicate GitHub delivery %s", delivery_id)
+        return is_new
+
+    async def release(self, delivery_id: Optional[str]) -> None:
+        """Forget a claimed delivery so a redelivery is processed (used when enqueueing fails)."""
+        if not delivery_id:
+            return
+        try:
+            await get_redis().delete(self.KEY_PREFIX + delivery_id)
+        except RedisError as e:
+            logger.warning("Failed to release delivery %s: %s", delivery_id, e)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "accepted": self.accepted,
+            "duplicates_dropped": self.duplicates_dropped,
+            "redis_errors": self.redis_errors,
+            "bloom_enabled": self.bloom is not None,
+        }
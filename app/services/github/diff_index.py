@@ -0,0 +1,51 @@
+"""
+Line index of one unified-diff patch, as returned in the `patch` field of GET /pulls/{n}/files.
+
+Review comments are anchored by (line, side); the model reports new-file line numbers, so every
+anchor is a RIGHT one. Only lines inside a hunk (added or context lines) can carry a comment.
+A line the diff does not show has no anchor and its finding goes in the review body instead.
+
+Kept free of I/O like review_report.py.
+"""
+import re
+from typing import List, Optional, Set, Tuple
+
+_HUNK_HEADER = re.compile(r"^@@ -(\d+)(?:,\d+)? \+(\d+)(?:,(\d+))? @@")
+
+Anchor = Tuple[int, str]
+
+
+class DiffIndex:
+    """Commentable lines of a patch; see the module docstring."""
+
+    def __init__(self, patch: str):
+        # New-file lines present in the diff (added or context), commented on the RIGHT
+        self.right: Set[int] = set()
+        # New-file line range (first, last) covered by each hunk
+        self.hunks: List[Tuple[int, int]] = []
+
+        new = 0
+        in_hunk = False
+        for text in patch.splitlines():
+            header = _HUNK_HEADER.match(text)
+            if header:
+                in_hunk = True
+                new = int(header.group(2))
+                count = int(header.group(3)) if header.group(3) is not None else 1
+                self.hunks.append((max(new, 1), max(new, 1) + max(count, 1) - 1))
+                continue
+            # "-" lines only exist in the old file; "\ No newline at end of file" is not a line
+            if not in_hunk or text.startswith(("-", "\\")):
+                continue
+            self.right.add(new)
+            new += 1
+
+    def anchor(self, line: object) -> Optional[Anchor]:
+        """(line, "RIGHT") for a new-file line number reported by the model, or None when the diff doesn't show it."""
+        if isinstance(line, str) and line.strip().isdigit():
+            line = int(line)
+        if not isinstance(line, int) or isinstance(line, bool) or line <= 0:
+            return None
+        if line in self.right:
+            return line, "RIGHT"
+        return None
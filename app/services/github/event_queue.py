@@ -0,0 +1,126 @@
+import asyncio
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core import tracing
+from app.core.logger import get_logger
+from app.core.metrics import EVENT_QUEUE_DEPTH, EVENT_QUEUE_RUN_SECONDS, EVENT_QUEUE_WAIT_SECONDS
+from app.services.github.processor import GitHubEventProcessor
+
+logger = get_logger("events")
+
+
+class GitHubEventQueue:
+    """
+    Bounded in-process work queue in front of GitHubEventProcessor.
+
+    A fixed pool of worker tasks consumes the queue, so a burst of push events
+    can never fan out into an unbounded number of concurrent Discord calls.
+    `submit` never blocks: when the queue is full it returns False and the caller
+    decides whether to shed the event or answer 503. `stop` drains what is queued.
+    """
+
+    def __init__(self, processor: GitHubEventProcessor, maxsize: int, workers: int):
+        self.processor = processor
+        self.maxsize = maxsize
+        self.worker_count = workers
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self._accepting = False
+
+        self.submitted = 0
+        self.rejected = 0
+        self.processed = 0
+        self.failed = 0
+        self.wait_seconds_total = 0.0
+        self.max_wait_seconds = 0.0
+        self.run_seconds_total = 0.0
+        self.max_run_seconds = 0.0
+
+    async def start(self) -> None:
+        if self._workers:
+            return
+        self._queue = asyncio.Queue(maxsize=self.maxsize)
+        self._workers = [
+            asyncio.create_task(self._worker(), name=f"github-event-worker-{i}")
+            for i in range(self.worker_count)
+        ]
+        self._accepting = True
+        logger.info("GitHub event queue started (size=%d, workers=%d)", self.maxsize, self.worker_count)
+
+    async def stop(self, timeout: float = 30.0) -> None:
+        """Stop accepting events and let the workers finish what is already queued."""
+        if not self._workers:
+            return
+        self._accepting = False
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.error("GitHub event queue drain timed out, dropping %d queued events", self._queue.qsize())
+
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        EVENT_QUEUE_DEPTH.dec(self._queue.qsize())
+        self._workers = []
+        logger.info("GitHub event queue stopped")
+
+    def submit(self, event_type: Optional[str], payload: Dict[str, Any]) -> bool:
+        """Queue an event for processing. Returns False if it was not accepted."""
+        if not self._accepting:
+            self.rejected += 1
+            return False
+        try:
+            self._queue.put_nowait((event_type, payload, time.monotonic(), tracing.inject()))
+            self.submitted += 1
+            EVENT_QUEUE_DEPTH.inc()
+            return True
+        except asyncio.QueueFull:
+            self.rejected += 1
+            logger.warning("GitHub event queue is full (%d). Rejecting '%s' event", self.maxsize, event_type)
+            return False
+
+    def stats(self) -> Dict[str, Any]:
+        finished = self.processed + self.failed
+        return {
+            "depth": self._queue.qsize() if self._queue else 0,
+            "size": self.maxsize,
+            "workers": len(self._workers),
+            "submitted": self.submitted,
+            "rejected": self.rejected,
+            "processed": self.processed,
+            "failed": self.failed,
+            "avg_wait_seconds": round(self.wait_seconds_total / finished, 4) if finished else 0.0,
+            "max_wait_seconds": round(self.max_wait_seconds, 4),
+            "avg_run_seconds": round(self.run_seconds_total / finished, 4) if finished else 0.0,
+            "max_run_seconds": round(self.max_run_seconds, 4),
+        }
+
+    async def _worker(self) -> None:
+        while True:
+            item: Tuple[Optional[str], Dict[str, Any], float, Dict[str, str]] = await self._queue.get()
+            event_type, payload, queued_at, carrier = item
+            event_label = event_type or "unknown"
+            EVENT_QUEUE_DEPTH.dec()
+
+            started = time.monotonic()
+            wait = started - queued_at
+            self.wait_seconds_total += wait
+            self.max_wait_seconds = max(self.max_wait_seconds, wait)
+            EVENT_QUEUE_WAIT_SECONDS.labels(event=event_label).observe(wait)
+            outcome = "error"
+            try:
+                # Resume the webhook's trace and request ID so logs from this worker join it
+                with tracing.continued(carrier, "event_queue.process", **{"github.event": event_label}):
+                    await self.processor.process_event(event_type, payload)
+                self.processed += 1
+                outcome = "ok"
+            except Exception as e:
+                self.failed += 1
+                logger.error("Failed to process '%s' event: %s", event_type, e, exc_info=True)
+            finally:
+                run = time.monotonic() - started
+                self.run_seconds_total += run
+                self.max_run_seconds = max(self.max_run_seconds, run)
+                EVENT_QUEUE_RUN_SECONDS.labels(event=event_label, outcome=outcome).observe(run)
+                self._queue.task_done()
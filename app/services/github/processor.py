@@ -1,11 +1,23 @@
-from typing import Any, Dict, Optional
+import importlib
+from typing import Any, Dict, Iterable, Optional
 
-from app.core.logger import logger
+from app.core.logger import get_logger
+from app.core.tracing import tracer
 from app.services.github.strategies.base import GitHubEventStrategy
-from app.services.github.strategies.push import PushStrategy
-from app.services.github.strategies.pull_request import PullRequestStrategy
-from app.services.github.strategies.issues import IssuesStrategy
-from app.services.github.strategies.default import DefaultStrategy
+
+logger = get_logger("events")
+
+# Event name -> "module:Class". Strategies are imported and built on first use, so a process
+# never pays for clients (and their imports) of events it doesn't receive.
+STRATEGIES: Dict[str, str] = {
+    "push": "app.services.github.strategies.push:PushStrategy",
+    "pull_request": "app.services.github.strategies.pull_request:PullRequestStrategy",
+    # Review submissions only produce a notification through the same strategy
+    "pull_request_review": "app.services.github.strategies.pull_request:PullRequestStrategy",
+    "issues": "app.services.github.strategies.issues:IssuesStrategy",
+}
+# Fallback behaviour for unmapped events
+DEFAULT_STRATEGY = "app.services.github.strategies.default:DefaultStrategy"
 
 
 class GitHubEventProcessor:
@@ -15,19 +27,23 @@ class GitHubEventProcessor:
     """
     
     def __init__(self):
-        # Initialize and register the supported strategies
-        self._strategies: Dict[str, GitHubEventStrategy] = {
-            "push": PushStrategy(),
-            "pull_request": PullRequestStrategy(),
-            "issues": IssuesStrategy(),
-        }
-        
-        # Fallback behaviour for unmapped events
-        self._default_strategy = DefaultStrategy()
+        # One instance per strategy class, shared by the events mapped to it
+        self._instances: Dict[str, GitHubEventStrategy] = {}
 
     def _get_strategy(self, event_type: str) -> GitHubEventStrategy:
         """Retrieves the matching strategy or returns the default fallback."""
-        return self._strategies.get(event_type, self._default_strategy)
+        path = STRATEGIES.get(event_type, DEFAULT_STRATEGY)
+        strategy = self._instances.get(path)
+        if strategy is None:
+            module_name, class_name = path.split(":")
+            strategy = getattr(importlib.import_module(module_name), class_name)()
+            self._instances[path] = strategy
+        return strategy
+
+    def warm(self, events: Optional[Iterable[str]] = None) -> None:
+        """Build the strategies for `events` (default: all of them) ahead of the first delivery."""
+        for event in events if events is not None else [*STRATEGIES, "default"]:
+            self._get_strategy(event)
 
     async def process_event(self, event_type: Optional[str], payload: Dict[str, Any]) -> None:
         """
@@ -41,7 +57,8 @@ class GitHubEventProcessor:
         event_name = event_type.lower() if event_type else "unknown"
         strategy = self._get_strategy(event_name)
         
-        logger.debug(f"Routing event '{event_name}' to {strategy.__class__.__name__}")
+        logger.debug("Routing event '%s' to %s", event_name, strategy.__class__.__name__)
         
         # Execute the defined strategy
-        await strategy.execute(payload)
+        with tracer.start_as_current_span(f"strategy {strategy.__class__.__name__}", attributes={"github.event": event_name}):
+            await strategy.execute(payload)
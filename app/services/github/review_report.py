@@ -0,0 +1,112 @@
+"""
+Parsing of per-file model answers and aggregation into the pull request review.
+
+Kept free of I/O so the CPU-side cost of a review can be measured on its own
+(`python -m benchmarks.micro`).
+"""
+import json
+import re
+from typing import Any, Dict, List, Optional
+
+from app.services.github.diff_index import DiffIndex
+
+SEVERITIES = ("CRITICAL", "HIGH", "MEDIUM", "LOW", "SUGGESTION")
+
+# Models sometimes wrap the JSON answer in a markdown fence despite the prompt
+_JSON_FENCE = re.compile(r'```json\n?(.*?)\n?```', re.DOTALL)
+
+
+def strip_fences(raw: str) -> str:
+    """Remove ```json fences around the answer."""
+    return _JSON_FENCE.sub(r'\1', raw).strip()
+
+
+def parse_review(raw: str) -> Dict[str, Any]:
+    """Decode one model answer. Raises json.JSONDecodeError if it isn't JSON."""
+    return json.loads(strip_fences(raw))
+
+
+def render_issue(issue: Dict[str, Any], with_line: bool = True) -> str:
+    """Markdown of one finding; inline comments leave out the line, GitHub shows it."""
+    severity = issue.get("severity", "LOW")
+    issue_title = issue.get("title", "Issue")
+    heading = f"[{severity}] Line {issue.get('line', '?')}: {issue_title}" if with_line else f"[{severity}] {issue_title}"
+    text = f"**{heading}**\n{issue.get('description', '')}"
+    sugg = issue.get("suggestion", "")
+    if sugg:
+        text += f"\n\n*Suggestion:*\n```python\n{sugg}\n```"
+    return text
+
+
+class ReviewReport:
+    """
+    Aggregates the per-file answers of one pull request: the overall verdict
+    (REQUEST_CHANGES beats COMMENT beats APPROVE), the worst score, issue counts
+    per severity, inline comments for the findings that land inside the diff and
+    the markdown sections of the review body for the rest.
+    """
+
+    def __init__(self):
+        self.final_verdict = "APPROVE"
+        self.worst_score = 100
+        self.total_issues = 0
+        self.severity_counts: Dict[str, int] = {severity: 0 for severity in SEVERITIES}
+        self.sections: List[str] = []
+        # Review comments in the shape of POST /pulls/{n}/reviews `comments[]`
+        self.comments: List[Dict[str, Any]] = []
+
+    def add(self, filename: str, review_data: Dict[str, Any], index: Optional[DiffIndex] = None) -> None:
+        """Without a DiffIndex every finding goes into the review body."""
+        file_verdict = review_data.get("verdict", "COMMENT")
+        if file_verdict == "REQUEST_CHANGES":
+            self.final_verdict = "REQUEST_CHANGES"
+        elif file_verdict == "COMMENT" and self.final_verdict == "APPROVE":
+            self.final_verdict = "COMMENT"
+
+        file_score = review_data.get("score", 100)
+        if file_score < self.worst_score:
+            self.worst_score = file_score
+
+        for file_item in review_data.get("files", []):
+            issues = file_item.get("issues", [])
+            if not issues:
+                continue
+
+            unanchored = []
+            for issue in issues:
+                severity = issue.get("severity", "LOW")
+                self.severity_counts[severity] = self.severity_counts.get(severity, 0) + 1
+                self.total_issues += 1
+
+                anchor = index.anchor(issue.get("line")) if index is not None else None
+                if anchor is None:
+                    unanchored.append(issue)
+                    continue
+                line, side = anchor
+                self.comments.append({"path": filename, "line": line, "side": side, "body": render_issue(issue, with_line=False)})
+
+            if unanchored:
+                self.sections.append(f"### File: `{filename}`\n")
+                for issue in unanchored:
+                    self.sections.append(render_issue(issue))
+                    self.sections.append("\n---\n")
+
+    @property
+    def has_feedback(self) -> bool:
+        return bool(self.sections or self.comments)
+
+    def body(self) -> str:
+        """Markdown of the findings that are not posted inline, appended below the summary header."""
+        return "\n".join(self.sections)
+
+    def body_with_comments(self) -> str:
+        """body() plus the inline comments, for when GitHub refuses to anchor them."""
+        sections = list(self.sections)
+        for comment in self.comments:
+            sections.append(f"### File: `{comment['path']}` (line {comment['line']})\n")
+            sections.append(comment["body"])
+            sections.append("\n---\n")
+        return "\n".join(sections)
+
+    def severity_breakdown(self) -> str:
+        return " | ".join([f"**{k}**: {v}" for k, v in self.severity_counts.items() if v > 0])
@@ -0,0 +1,400 @@
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+import orjson
+from redis.exceptions import RedisError
+
+from app.core.logger import logger
+from app.core.metrics import REVIEW_LANE_CLAIMS, REVIEW_LANE_WAIT_SECONDS, REVIEW_TENANT_WAIT_SECONDS
+from app.core.settings import settings
+from app.infrastructure.redis_client import get_redis
+
+LANES = ("express", "bulk")
+
+# How long a claimed job stays attached to its ticket; covers every retry and quota deferral
+INFLIGHT_TTL_SECONDS = 24 * 3600
+
+# Append a job to its tenant's queue in a lane. KEYS: tenant queue, lane's active tenant list,
+# job hash, tenant weight hash. ARGV: job id, job body, cost, tenant, tenant weight.
+# Entries are "<enqueued_at>:<cost>:<job id>" so the claim script can age lanes and charge
+# deficits without reading bodies. Returns {entry, depth of the tenant queue}.
+_SUBMIT_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local entry = string.format('%.3f', now) .. ':' .. ARGV[3] .. ':' .. ARGV[1]
+redis.call('HSET', KEYS[3], ARGV[1], ARGV[2])
+redis.call('HSET', KEYS[4], ARGV[4], ARGV[5])
+local depth = redis.call('RPUSH', KEYS[1], entry)
+if depth == 1 then
+  redis.call('RPUSH', KEYS[2], ARGV[4])
+end
+return {entry, depth}
+"""
+
+# Remove a job whose ticket was never published. KEYS: tenant queue, lane's active tenant list,
+# job hash, lane deficit hash, lane turn key. ARGV: entry, job id, tenant.
+# A tenant whose queue runs empty leaves the active list as in the claim script's take(); left
+# there, the next submit would add it a second time and double its share. Returns 1 if removed.
+_CANCEL_SCRIPT = """
+local removed = redis.call('LREM', KEYS[1], -1, ARGV[1])
+redis.call('HDEL', KEYS[3], ARGV[2])
+if redis.call('LLEN', KEYS[1]) == 0 then
+  redis.call('LREM', KEYS[2], 0, ARGV[3])
+  redis.call('HDEL', KEYS[4], ARGV[3])
+  if redis.call('GET', KEYS[5]) == ARGV[3] then
+    redis.call('DEL', KEYS[5])
+  end
+end
+return removed
+"""
+
+# Pick the next job for a ticket. KEYS: the ticket's in-flight key, job hash, lane round-robin
+# state hash, tenant weight hash. ARGV: in-flight TTL, max wait (0 = never serve out of turn),
+# DRR quantum, then a key prefix and a weight per lane.
+# Returns nil when every lane is empty, else {lane index, reason, entry, tenant, now, body}.
+#
+# A retried ticket gets back the job it claimed before ("resumed"). Otherwise a lane whose oldest
+# job has waited max wait is served first, from the tenant holding that job ("aged"). Failing
+# that, the non-empty lanes are picked by smooth weighted round robin, and within the lane the
+# tenants by deficit round robin ("weighted"): the tenant at the head of the lane's active list
+# gets quantum * its weight of credit per turn and keeps the turn while its credit covers its
+# next job. Costs are capped at the quantum so every turn serves at least one job.
+# Tenant keys are derived inside the script, so the scheduler needs a single Redis node.
+_CLAIM_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local quantum = tonumber(ARGV[3])
+
+local function parse(entry)
+  local ts, cost, id = string.match(entry, '^([^:]+):([^:]+):(.+)$')
+  return tonumber(ts), math.min(tonumber(cost), quantum), id
+end
+
+local function result(lane, reason, entry, tenant)
+  local _, _, id = parse(entry)
+  return {lane, reason, entry, tenant, tostring(now), redis.call('HGET', KEYS[2], id)}
+end
+
+local held = redis.call('GET', KEYS[1])
+if held then
+  local lane, tenant, entry = string.match(held, '^(%d+)|([^|]*)|(.*)$')
+  return result(tonumber(lane), 'resumed', entry, tenant)
+end
+
+local lanes = (#ARGV - 3) / 2
+local prefix, oldest, oldest_tenant = {}, {}, {}
+for i = 1, lanes do
+  prefix[i] = ARGV[2 * i + 2]
+  for _, tenant in ipairs(redis.call('LRANGE', prefix[i] .. 'active', 0, -1)) do
+    local head = redis.call('LINDEX', prefix[i] .. 'tenant:' .. tenant, 0)
+    if head then
+      local ts = parse(head)
+      if oldest[i] == nil or ts < oldest[i] then
+        oldest[i], oldest_tenant[i] = ts, tenant
+      end
+    end
+  end
+end
+
+-- Pop the head job of a tenant and charge it. A tenant whose queue runs empty leaves the
+-- active list and forfeits its credit, as in classic DRR.
+local function take(i, tenant)
+  local queue = prefix[i] .. 'tenant:' .. tenant
+  local entry = redis.call('LPOP', queue)
+  local _, cost = parse(entry)
+  local deficit = redis.call('HINCRBY', prefix[i] .. 'deficit', tenant, -cost)
+  if redis.call('LLEN', queue) == 0 then
+    redis.call('LREM', prefix[i] .. 'active', 1, tenant)
+    redis.call('HDEL', prefix[i] .. 'deficit', tenant)
+    if redis.call('GET', prefix[i] .. 'turn') == tenant then
+      redis.call('DEL', prefix[i] .. 'turn')
+    end
+  end
+  return entry
+end
+
+local function next_tenant(i)
+  local active, turn = prefix[i] .. 'active', prefix[i] .. 'turn'
+  for _ = 1, 2 * redis.call('LLEN', active) + 1 do
+    local tenant = redis.call('LINDEX', active, 0)
+    if not tenant then
+      return nil
+    end
+    local head = redis.call('LINDEX', prefix[i] .. 'tenant:' .. tenant, 0)
+    if not head then
+      -- Emptied by a cancel
+      redis.call('LPOP', active)
+      redis.call('HDEL', prefix[i] .. 'deficit', tenant)
+    else
+      local deficit = tonumber(redis.call('HGET', prefix[i] .. 'deficit', tenant) or '0')
+      if redis.call('GET', turn) ~= tenant then
+        local weight = tonumber(redis.call('HGET', KEYS[4], tenant) or '1')
+        deficit = redis.call('HINCRBY', prefix[i] .. 'deficit', tenant, quantum * weight)
+        redis.call('SET', turn, tenant)
+      end
+      local _, cost = parse(head)
+      if cost <= deficit then
+        return tenant
+      end
+      -- Not enough credit left: end the turn, credit carries over to the next one
+      redis.call('RPUSH', active, redis.call('LPOP', active))
+      redis.call('DEL', turn)
+    end
+  end
+  -- Only reachable when aged claims left every tenant in debt; serve the head anyway
+  return redis.call('LINDEX', active, 0)
+end
+
+local max_wait = tonumber(ARGV[2])
+local picked = nil
+if max_wait > 0 then
+  for i = 1, lanes do
+    if oldest[i] and now - oldest[i] >= max_wait and (picked == nil or oldest[i] < oldest[picked]) then
+      picked = i
+    end
+  end
+end
+
+local reason, tenant = 'aged', nil
+if picked then
+  tenant = oldest_tenant[picked]
+else
+  reason = 'weighted'
+  local total, best = 0, nil
+  for i = 1, lanes do
+    if oldest[i] then
+      local weight = tonumber(ARGV[2 * i + 3])
+      total = total + weight
+      local current = redis.call('HINCRBY', KEYS[3], prefix[i], weight)
+      if picked == nil or current > best then
+        picked, best = i, current
+      end
+    end
+  end
+  if picked == nil then
+    return nil
+  end
+  redis.call('HINCRBY', KEYS[3], prefix[picked], -total)
+  tenant = next_tenant(picked)
+end
+
+local entry = take(picked, tenant)
+redis.call('SET', KEYS[1], picked .. '|' .. tenant .. '|' .. entry, 'EX', ARGV[1])
+return result(picked, reason, entry, tenant)
+"""
+
+
+@dataclass
+class ReviewJob:
+    id: str
+    lane: str
+    tenant: str
+    cost: int
+    payload: Dict[str, Any]
+    entry: str = ""
+    enqueued_at: float = 0.0
+    # Why the claim picked this job: weighted, aged or resumed
+    reason: str = ""
+
+
+class ReviewScheduler:
+    """
+    Size-aware priority lanes with fair sharing between tenants, in front of the Celery review queue.
+
+    The API estimates what a review costs from the webhook payload and appends the job to the
+    express or bulk lane. Inside a lane every tenant (repository or installation, per
+    REVIEW_TENANT_KEY) has its own queue (Redis lists). For every job the API enqueues one
+    argument-less ticket task. Tickets are interchangeable, so Celery's FIFO order no longer
+    decides which review runs next. A worker that picks up a ticket claims a job atomically at
+    that moment, when the lane contents are known:
+      - lanes by weighted round robin, so a hotfix queued behind a large refactor goes first
+        while bulk still gets its share and is served out of turn once its oldest job has
+        waited REVIEW_LANE_MAX_WAIT_SECONDS;
+      - tenants within a lane by deficit round robin over review cost, weighted per tenant by
+        REVIEW_TENANT_WEIGHTS, so one busy monorepo can't starve the other repositories.
+
+    A claimed job is kept under the ticket's task ID until `complete`, so a retried ticket
+    resumes the same job and a crashed worker's redelivered ticket doesn't lose it.
+    """
+
+    KEY_PREFIX = "reviews:"
+
+    def __init__(self):
+        self.weights = self._parse_weights(settings.REVIEW_LANE_WEIGHTS, LANES)
+        self.tenant_weights = self._parse_weights(settings.REVIEW_TENANT_WEIGHTS)
+        self._submit_script = None
+        self._cancel_script = None
+        self._claim_script = None
+
+        self.submitted = 0
+        self.cancelled = 0
+
+    @staticmethod
+    def _parse_weights(spec: str, names: Optional[Tuple[str, ...]] = None) -> Dict[str, int]:
+        """"name=weight,..." to a dict. With `names`, only those are accepted and default to 1."""
+        weights = dict.fromkeys(names, 1) if names else {}
+        for item in spec.split(","):
+            name, _, weight = item.rpartition("=")
+            name = name.strip()
+            if name and weight.strip() and (names is None or name in weights):
+                weights[name] = max(1, int(weight))
+        return weights
+
+    def _lane_prefix(self, lane: str) -> str:
+        return f"{self.KEY_PREFIX}lane:{lane}:"
+
+    @property
+    def _jobs_key(self) -> str:
+        return f"{self.KEY_PREFIX}jobs"
+
+    @property
+    def _tenant_weights_key(self) -> str:
+        return f"{self.KEY_PREFIX}tenant_weights"
+
+    def _inflight_key(self, ticket_id: str) -> str:
+        return f"{self.KEY_PREFIX}inflight:{ticket_id}"
+
+    @staticmethod
+    def estimate_cost(payload: Dict[str, Any]) -> int:
+        """Review cost of a pull_request webhook: changed lines plus a fixed cost per file (one AI call each)."""
+        pr = payload.get("pull_request") or {}
+        return (
+            (pr.get("additions") or 0)
+            + (pr.get("deletions") or 0)
+            + settings.REVIEW_COST_PER_FILE * (pr.get("changed_files") or 0)
+        )
+
+    @staticmethod
+    def lane_for(cost: int) -> str:
+        return "express" if cost <= settings.REVIEW_EXPRESS_MAX_COST else "bulk"
+
+    @staticmethod
+    def tenant_for(payload: Dict[str, Any]) -> str:
+        """The fair-share unit of a review: its repository, or its installation if REVIEW_TENANT_KEY=installation."""
+        repo = (payload.get("repository") or {}).get("full_name", "unknown")
+        if settings.REVIEW_TENANT_KEY == "installation":
+            installation = (payload.get("installation") or {}).get("id")
+            if installation:
+                return f"installation/{installation}"
+        return repo
+
+    def _metric_tenant(self, tenant: str) -> str:
+        # Only tenants with a configured weight get their own series, to bound label cardinality
+        return tenant if tenant in self.tenant_weights else "other"
+
+    async def submit(self, payload: Dict[str, Any], cost: int) -> ReviewJob:
+        """Append a review to its tenant's queue in its lane. Raises RedisError so the caller can fall back to direct enqueue."""
+        job = ReviewJob(
+            id=uuid.uuid4().hex, lane=self.lane_for(cost), tenant=self.tenant_for(payload), cost=cost, payload=payload,
+        )
+        if self._submit_script is None:
+            self._submit_script = get_redis().register_script(_SUBMIT_SCRIPT)
+        prefix = self._lane_prefix(job.lane)
+        body = orjson.dumps({"cost": cost, "payload": payload})
+        entry, depth = await self._submit_script(
+            keys=[prefix + "tenant:" + job.tenant, prefix + "active", self._jobs_key, self._tenant_weights_key],
+            args=[job.id, body, cost, job.tenant, self.tenant_weights.get(job.tenant, 1)],
+            client=get_redis(),
+        )
+        job.entry = entry.decode()
+        job.enqueued_at = float(job.entry.partition(":")[0])
+        self.submitted += 1
+        logger.info(
+            "Queued review job %s for %s in the %s lane (cost %d, %d queued for the tenant)",
+            job.id, job.tenant, job.lane, cost, depth,
+        )
+        return job
+
+    async def cancel(self, job: ReviewJob) -> None:
+        """Remove a submitted job whose ticket could not be enqueued."""
+        if self._cancel_script is None:
+            self._cancel_script = get_redis().register_script(_CANCEL_SCRIPT)
+        prefix = self._lane_prefix(job.lane)
+        try:
+            await self._cancel_script(
+                keys=[prefix + "tenant:" + job.tenant, prefix + "active", self._jobs_key, prefix + "deficit", prefix + "turn"],
+                args=[job.entry, job.id, job.tenant],
+                client=get_redis(),
+            )
+            self.cancelled += 1
+        except RedisError as e:
+            logger.error("Failed to cancel review job %s: %s", job.id, e)
+
+    async def claim(self, ticket_id: str) -> Optional[ReviewJob]:
+        """Take the next job for a ticket, or the job it already holds. None if every lane is empty."""
+        if self._claim_script is None:
+            self._claim_script = get_redis().register_script(_CLAIM_SCRIPT)
+        keys = [self._inflight_key(ticket_id), self._jobs_key, f"{self.KEY_PREFIX}wrr", self._tenant_weights_key]
+        args: List[Any] = [INFLIGHT_TTL_SECONDS, settings.REVIEW_LANE_MAX_WAIT_SECONDS, settings.REVIEW_DRR_QUANTUM]
+        for lane in LANES:
+            args += [self._lane_prefix(lane), self.weights[lane]]
+
+        result = await self._claim_script(keys=keys, args=args, client=get_redis())
+        if result is None:
+            return None
+        lane = LANES[int(result[0]) - 1]
+        reason, entry, tenant, now = (value.decode() for value in result[1:5])
+        enqueued_at, _, job_id = entry.split(":", 2)
+        if len(result) < 6 or result[5] is None:
+            logger.error("Review job %s was claimed from the %s lane but its body is missing", job_id, lane)
+            await get_redis().delete(self._inflight_key(ticket_id))
+            return None
+
+        body = orjson.loads(result[5])
+        job = ReviewJob(
+            id=job_id, lane=lane, tenant=tenant, cost=body["cost"], payload=body["payload"],
+            entry=entry, enqueued_at=float(enqueued_at), reason=reason,
+        )
+        REVIEW_LANE_CLAIMS.labels(lane=lane, reason=reason).inc()
+        if reason != "resumed":
+            wait = max(0.0, float(now) - job.enqueued_at)
+            REVIEW_LANE_WAIT_SECONDS.labels(lane=lane).observe(wait)
+            REVIEW_TENANT_WAIT_SECONDS.labels(tenant=self._metric_tenant(tenant)).observe(wait)
+        return job
+
+    async def complete(self, ticket_id: str, job: ReviewJob) -> None:
+        """Forget a finished (or finally failed) job."""
+        try:
+            async with get_redis().pipeline(transaction=True) as pipe:
+                pipe.delete(self._inflight_key(ticket_id))
+                pipe.hdel(self._jobs_key, job.id)
+                await pipe.execute()
+        except RedisError as e:
+            logger.warning("Failed to clear review job %s, it expires in %ds: %s", job.id, INFLIGHT_TTL_SECONDS, e)
+
+    async def stats(self) -> Dict[str, Any]:
+        """Per lane and tenant: queued jobs, DRR credit and age of the oldest job."""
+        redis = get_redis()
+        now = time.time()
+        lanes = {}
+        for lane in LANES:
+            prefix = self._lane_prefix(lane)
+            tenants = [tenant.decode() for tenant in await redis.lrange(prefix + "active", 0, -1)]
+            deficits = await redis.hgetall(prefix + "deficit")
+            async with redis.pipeline(transaction=False) as pipe:
+                for tenant in tenants:
+                    pipe.llen(prefix + "tenant:" + tenant)
+                    pipe.lindex(prefix + "tenant:" + tenant, 0)
+                replies = await pipe.execute()
+
+            report = {}
+            for tenant, depth, head in zip(tenants, replies[::2], replies[1::2]):
+                oldest = now - float(head.split(b":", 1)[0]) if head else 0.0
+                report[tenant] = {
+                    "depth": depth,
+                    "deficit": int(deficits.get(tenant.encode(), 0)),
+                    "oldest_seconds": round(max(0.0, oldest), 1),
+                }
+            lanes[lane] = {
+                "depth": sum(entry["depth"] for entry in report.values()),
+                "weight": self.weights[lane],
+                "oldest_seconds": max((entry["oldest_seconds"] for entry in report.values()), default=0.0),
+                "tenants": report,
+            }
+        return {"submitted": self.submitted, "cancelled": self.cancelled, "lanes": lanes}
+
+
+# Global scheduler shared by the API (submit) and the review workers (claim)
+review_scheduler = ReviewScheduler()
@@ -1,15 +1,17 @@
 from typing import Any, Dict
 
-from app.core.logger import logger
+from app.core.logger import get_logger
 from app.services.github.strategies.base import GitHubEventStrategy
-from app.services.notifications.discord import DiscordNotification
+from app.services.notifications.outbox import notification_outbox
+
+logger = get_logger("events")
 
 
 class IssuesStrategy(GitHubEventStrategy):
     """Handles GitHub Issue events."""
     
     def __init__(self):
-        self.discord = DiscordNotification()
+        self.notifications = notification_outbox
         
     async def execute(self, payload: Dict[str, Any]) -> None:
         action = payload.get("action", "unknown action")
@@ -20,17 +22,18 @@ class IssuesStrategy(GitHubEventStrategy):
         author = issue.get("user", {}).get("login", "Unknown user")
         repo_name = payload.get("repository", {}).get("full_name", "Unknown Repo")
         
-        logger.info(f"Processing ISSUES event: Issue #{number} was {action}: {title}")
+        logger.info("Processing ISSUES event: Issue #%s was %s: %s", number, action, title)
         
         color = 15105570 if action == "opened" else 10038562 # Orange open, Red closed
         
-        # Execute the Template Method
-        await self.discord.send_notification(
+        # Fire-and-forget: delivery happens in the notification pipeline
+        self.notifications.emit(
             title=f"🐛 Issue {action.capitalize()}",
             message=f"**[{repo_name}]** Issue #{number}: {title}\nAction by: {author}",
             metadata={
                 "color": color,
                 "author": author,
-                "url": issue_url
+                "url": issue_url,
+                "coalesce_key": f"issues:{repo_name}",
             }
         )
@@ -1,22 +1,40 @@
+import json
 import os
+import time
 from typing import Any, Dict
 
+import httpx
+
 from app.core.logger import logger
+from app.core.metrics import REVIEW_DURATION_SECONDS, REVIEW_OUTCOMES
+from app.core.profiling import stage
+from app.core.tracing import tracer
+from app.infrastructure.review_store import ReviewRecord, review_store
+from app.models.github import REVIEW_ACTIONS, PRFile
+from app.services.github.context_extractor import extract_context
+from app.services.github.diff_index import DiffIndex
+from app.services.github.review_report import ReviewReport, parse_review
 from app.services.github.strategies.base import GitHubEventStrategy
-from app.services.notifications.discord import DiscordNotification
+from app.services.notifications.outbox import notification_outbox
 from app.services.github_client import GitHubClient
-from app.services.ai.factory import get_ai_provider
+from app.services.ai.cascade import ReviewCascade
+from app.services.ai.quota import ReviewDeferred, quota_manager
 from app.core.settings import settings
 
 
+
 class PullRequestStrategy(GitHubEventStrategy):
     """Handles GitHub Pull Request events."""
     
     def __init__(self):
-        self.discord = DiscordNotification()
+        self.notifications = notification_outbox
         self.github_client = GitHubClient()
         
-    async def execute(self, payload: Dict[str, Any]) -> None:
+    async def execute(self, payload: Dict[str, Any], announce: bool = True) -> None:
+        """
+        Announce the event on Discord and, for reviewed actions, run the AI review.
+        `announce=False` skips the announcement, for review retries that already sent it.
+        """
         action = payload.get("action", "unknown action")
         pr = payload.get("pull_request", {})
         number = pr.get("number", "unknown")
@@ -28,7 +46,7 @@ class PullRequestStrategy(GitHubEventStrategy):
         repo_short = payload.get("repository", {}).get("name", "Unknown")
         commit_sha = pr.get("head", {}).get("sha", "")
         
-        logger.info(f"Processing PULL_REQUEST event: PR #{number} was {action}: {title}")
+        logger.info("Processing PULL_REQUEST event: PR #%s was %s: %s", number, action, title)
         
         # Configure color based on action
         color = 3447003 # Blue for open
@@ -39,24 +57,32 @@ class PullRequestStrategy(GitHubEventStrategy):
                 action = "merged"
 
         role_id = os.getenv("DISCORD_ROLE_ID")
-        # Execute the Template Method
-        await self.discord.send_notification(
-            title=f"🔀 Pull Request {action.capitalize()}",
-            message = f"<@&{role_id}>\n**[{repo_name}]** PR #{number}: {title}\nAction by: {author}",
-            metadata={
-                "color": color,
-                "author": author,
-                "url": pr_url
-            }
-        )
+        # Messages for reviewed actions are tracked so the review result can be edited into them
+        message_ref = f"pr:{repo_name}#{number}"
+        routing = {"message_ref": message_ref} if original_action in REVIEW_ACTIONS else {"coalesce_key": f"pull_request:{repo_name}"}
+        # Fire-and-forget: delivery happens in the notification pipeline
+        if announce:
+            self.notifications.emit(
+                title=f"🔀 Pull Request {action.capitalize()}",
+                message = f"<@&{role_id}>\n**[{repo_name}]** PR #{number}: {title}\nAction by: {author}",
+                metadata={
+                    "color": color,
+                    "author": author,
+                    "url": pr_url,
+                    **routing
+                }
+            )
         
         # --- AI CODE REVIEW PIPELINE ---
         
         # Proceed with AI Code Review only for open, sync, reopen
-        if original_action not in ["opened", "synchronize", "reopened"]:
+        if original_action not in REVIEW_ACTIONS:
             return
             
-        logger.info(f"Starting AI Code Review for PR #{number}")
+        logger.info("Starting AI Code Review for PR #%s", number)
+        review_started = time.perf_counter()
+        # (buckets, reserved tokens, reserved requests) once the budgets were charged; settled on every exit
+        reservation = None
         
         try:
             # Set commit status to pending so GitHub UI shows a loading state
@@ -70,126 +96,166 @@ class PullRequestStrategy(GitHubEventStrategy):
                     context="Chief AI / Code Review"
                 )
 
-            files = await self.github_client.get_pr_files(repo_owner, repo_short, number)
+            with tracer.start_as_current_span("pr.fetch_files") as span:
+                files = await self.github_client.get_pr_files(repo_owner, repo_short, number)
+                span.set_attribute("pr.files", len(files))
             
-            ai_provider = get_ai_provider()
+            cascade = ReviewCascade()
             provider_name = settings.AI_PROVIDER
-            model_name = settings.AI_MODEL or "default"
-            if model_name == "default":
-                defaults = {
-                    "anthropic": "claude-3-5-sonnet-20241022",
-                    "openai": "gpt-4o",
-                    "gemini": "gemini-1.5-pro",
-                    "groq": "llama-3.1-70b-versatile",
-                    "ollama": "codellama"
-                }
-                model_name = defaults.get(provider_name, "default-model")
-            
-            reviews_text = []
-            total_issues_found = 0
-            
-            # Aggregate severity counts for Discord embed
-            severity_counts = {
-                "CRITICAL": 0,
-                "HIGH": 0,
-                "MEDIUM": 0,
-                "LOW": 0,
-                "SUGGESTION": 0
-            }
-            
-            # We will default to APPROVE. If any file says REQUEST_CHANGES, we escalate the whole PR.
-            final_verdict = "APPROVE"
-            worst_score = 100
+
+            # Reserve the estimated cost against the repo and installation budgets before any provider call
+            reviewable = [f for f in files if f.status not in ["removed", "unchanged"] and f.patch]
+            quota_buckets = quota_manager.buckets_for(repo_name, payload.get("installation", {}).get("id"))
+            reserved_tokens = quota_manager.estimate_tokens([f.patch for f in reviewable])
+            reserved_requests = len(reviewable)
+            with stage("quota"):
+                quota = await quota_manager.reserve(quota_buckets, reserved_tokens, reserved_requests)
+            degraded_reason = None
+            if not quota.allowed:
+                exceeded_action = settings.QUOTA_EXCEEDED_ACTION
+                if exceeded_action == "degrade":
+                    logger.warning("PR #%s: %s, degrading to %s", number, quota.reason, settings.QUOTA_DEGRADE_PROVIDER)
+                    cascade.degrade()
+                    provider_name = settings.QUOTA_DEGRADE_PROVIDER
+                    degraded_reason = quota.reason
+                    # Nothing was reserved; the degraded usage is charged in full below
+                    reserved_tokens = reserved_requests = 0
+                elif exceeded_action == "defer" and quota.retry_after is not None:
+                    raise ReviewDeferred(quota.reason, min(quota.retry_after, settings.QUOTA_MAX_DEFER_SECONDS))
+                else:
+                    # "skip", or a deferral that could never fit the budget
+                    logger.warning("Skipping AI review for PR #%s: %s", number, quota.reason)
+                    if commit_sha:
+                        await self.github_client.create_commit_status(
+                            owner=repo_owner, repo=repo_short, sha=commit_sha,
+                            state="success", description=f"Review skipped: {quota.reason}", context="Chief AI / Code Review"
+                        )
+                    self._record_outcome("QUOTA_SKIPPED", review_started)
+                    return
+
+            reservation = (quota_buckets, reserved_tokens, reserved_requests)
+
+            model_name = cascade.reviewer.model
+            report = ReviewReport()
             
-            import json
-            import re
+            reused = 0
             
-            for f in files:
-                if f.status in ["removed", "unchanged"] or not f.patch:
-                    continue
-                    
+            for f in reviewable:
                 context = {
                     "repo": repo_name,
                     "title": title,
                     "filename": f.filename
                 }
+                # Triage comes first so files it rates low risk skip the blob fetch too
+                if not await cascade.needs_review(f.patch, context):
+                    continue
+                # Maps the model's line numbers to comment anchors inside this patch
+                index = DiffIndex(f.patch)
+                with stage("review.context"):
+                    context["surrounding_code"] = await self._surrounding_code(repo_owner, repo_short, f)
+                history = ReviewRecord(
+                    repo=repo_name, pr_number=number, head_sha=commit_sha, filename=f.filename,
+                    patch_hash=review_store.patch_hash(f.filename, f.patch, context["surrounding_code"]),
+                    provider=provider_name, model=model_name, review={},
+                )
+
+                # Same patch already reviewed by this model and prompt: reuse the stored answer
+                with stage("review.history"):
+                    stored = await review_store.find_reusable(history.patch_hash, provider_name, model_name)
+                if stored is not None:
+                    reused += 1
+                    history.review, history.reused_from = stored.review, stored.id
+                    await review_store.record(history)
+                    with stage("review.aggregate"):
+                        report.add(f.filename, stored.review, index)
+                    continue
                 
-                raw_review_response = await ai_provider.review_code(f.patch, context)
+                with tracer.start_as_current_span("pr.review_file", attributes={"code.filepath": f.filename}):
+                    raw_review_response = await cascade.review_code(f.patch, context)
                 if not raw_review_response:
                     continue
                     
-                # Clean potential markdown wrapping around JSON output before parsing
-                json_str = re.sub(r'```json\n?(.*?)\n?```', r'\1', raw_review_response, flags=re.DOTALL).strip()
                 try:
-                    review_data = json.loads(json_str)
-                    
-                    file_verdict = review_data.get("verdict", "COMMENT")
-                    if file_verdict == "REQUEST_CHANGES":
-                        final_verdict = "REQUEST_CHANGES"
-                    elif file_verdict == "COMMENT" and final_verdict == "APPROVE":
-                        final_verdict = "COMMENT"
-                        
-                    file_score = review_data.get("score", 100)
-                    if file_score < worst_score:
-                        worst_score = file_score
-                        
-                    files_reviewed = review_data.get("files", [])
-                    for file_item in files_reviewed:
-                        issues = file_item.get("issues", [])
-                        if not issues:
-                            continue
-                            
-                        reviews_text.append(f"### File: `{f.filename}`\n")
-                        for issue in issues:
-                            severity = issue.get("severity", "LOW")
-                            line = issue.get("line", "?")
-                            issue_title = issue.get("title", "Issue")
-                            desc = issue.get("description", "")
-                            sugg = issue.get("suggestion", "")
-                            
-                            severity_counts[severity] = severity_counts.get(severity, 0) + 1
-                            total_issues_found += 1
-                            
-                            reviews_text.append(f"**[{severity}] Line {line}: {issue_title}**\n{desc}")
-                            if sugg:
-                                reviews_text.append(f"\n*Suggestion:*\n```python\n{sugg}\n```")
-                            reviews_text.append("\n---\n")
-                
+                    with stage("review.parse"):
+                        review_data = parse_review(raw_review_response)
                 except json.JSONDecodeError:
-                    logger.error(f"Failed to parse AI JSON response for {f.filename}. Raw Output: {raw_review_response[:100]}...")
+                    logger.error("Failed to parse AI JSON response for %s. Raw Output: %s...", f.filename, raw_review_response[:100])
                     continue
+                with stage("review.aggregate"):
+                    report.add(f.filename, review_data, index)
+
+                completion = cascade.last_completion
+                if completion is not None:
+                    history.review = review_data
+                    history.input_tokens, history.output_tokens = completion.input_tokens, completion.output_tokens
+                    history.latency_ms = completion.latency_seconds * 1000
+                    with stage("review.history"):
+                        await review_store.record(history)
+
+            if reused:
+                logger.info("PR #%s: reused stored reviews for %s/%s files", number, reused, len(reviewable))
                     
-            if not reviews_text:
+            if cascade.enabled:
+                logger.info("Review cascade for PR #%s: %s", number, cascade.stats.summary())
+
+            if not report.has_feedback:
                 logger.info("No actionable feedback generated by AI. Skipping GitHub comment.")
                 if commit_sha:
                     await self.github_client.create_commit_status(
                         owner=repo_owner, repo=repo_short, sha=commit_sha, 
                         state="success", description="AI review complete. No issues found.", context="Chief AI / Code Review"
                     )
+                self._record_outcome("NO_ISSUES", review_started)
                 return
                 
+            final_verdict = report.final_verdict
+            worst_score = report.worst_score
             summary_content = f"## 🤖 AI Code Review Summary\n\nReviewed by **{provider_name.capitalize()}** (`{model_name}`).\n\n**Verdict**: {final_verdict}\n**Score**: {worst_score}/100\n\n"
-            full_review = summary_content + "\n".join(reviews_text)
-            
-            # Post review to GitHub using the aggregated VERDICT
-            await self.github_client.post_pr_review(repo_owner, repo_short, number, full_review, event=final_verdict)
+            if degraded_reason:
+                summary_content += f"**Note**: reviewed with the fallback model because the {degraded_reason}.\n\n"
+            if cascade.enabled:
+                summary_content += f"**Triage** ({cascade.triage.name} `{cascade.triage.model}`): {cascade.stats.summary()}\n\n"
+            if report.comments:
+                summary_content += f"**Inline comments**: {len(report.comments)} of {report.total_issues} findings are posted on the diff.\n\n"
+            with stage("review.render"):
+                full_review = summary_content + report.body()
             
-            if commit_sha:
-                status_state = "failure" if final_verdict == "REQUEST_CHANGES" else "success"
-                status_desc = f"Score: {worst_score}/100 | {total_issues_found} issues found"
-                await self.github_client.create_commit_status(
-                    owner=repo_owner, repo=repo_short, sha=commit_sha, 
-                    state=status_state, description=status_desc, context="Chief AI / Code Review"
-                )
+            with tracer.start_as_current_span("pr.publish_review", attributes={"review.verdict": final_verdict}):
+                # Post review to GitHub using the aggregated VERDICT, with the anchored findings inline
+                try:
+                    await self.github_client.post_pr_review(
+                        repo_owner, repo_short, number, full_review, event=final_verdict,
+                        comments=report.comments, commit_id=commit_sha or None,
+                    )
+                except httpx.HTTPStatusError as e:
+                    # 422 when a comment can't be resolved, e.g. the PR moved past commit_sha. Only the
+                    # first call raises, so nothing has been posted yet and the fallback can't duplicate it.
+                    if e.response.status_code != 422 or not report.comments:
+                        raise
+                    logger.warning("GitHub rejected the inline comments for PR #%s, posting them in the review body", number)
+                    await self.github_client.post_pr_review(
+                        repo_owner, repo_short, number, summary_content + report.body_with_comments(), event=final_verdict,
+                    )
+
+                if commit_sha:
+                    status_state = "failure" if final_verdict == "REQUEST_CHANGES" else "success"
+                    status_desc = f"Score: {worst_score}/100 | {report.total_issues} issues found"
+                    await self.github_client.create_commit_status(
+                        owner=repo_owner, repo=repo_short, sha=commit_sha, 
+                        state=status_state, description=status_desc, context="Chief AI / Code Review"
+                    )
+            self._record_outcome(final_verdict, review_started)
             
             # Construct Discord notification mapping
-            severity_breakdown = " | ".join([f"**{k}**: {v}" for k, v in severity_counts.items() if v > 0])
+            severity_breakdown = report.severity_breakdown()
             embed_msg = (
                 f"**Provider:** {provider_name.capitalize()} | **Model:** {model_name}\n"
                 f"**Verdict:** {final_verdict} | **Score:** {worst_score}/100\n"
-                f"**Total Issues:** {total_issues_found}\n\n"
+                f"**Total Issues:** {report.total_issues}\n\n"
                 f"{severity_breakdown}"
             )
+            if cascade.enabled:
+                embed_msg += f"\n**Triage:** {cascade.stats.summary()}"
             
             embed_color = 3447003 # Default Blue Map
             if final_verdict == "REQUEST_CHANGES":
@@ -197,18 +263,31 @@ class PullRequestStrategy(GitHubEventStrategy):
             elif final_verdict == "APPROVE":
                 embed_color = 3066993 # Green
                 
-            await self.discord.send_notification(
+            self.notifications.emit(
                 title=f"🤖 AI Code Review Completed: PR #{number}",
                 message=embed_msg,
                 metadata={
                     "color": embed_color,
                     "author": author,
-                    "url": pr_url
+                    "url": pr_url,
+                    # Edit the "PR opened" message in place instead of posting a second one
+                    "edit_ref": message_ref
                 }
             )
             
+        except ReviewDeferred as e:
+            logger.warning("Deferring AI review for PR #%s by %.0fs: %s", number, e.retry_after, e)
+            self._record_outcome("QUOTA_DEFERRED", review_started)
+            if commit_sha:
+                await self.github_client.create_commit_status(
+                    owner=repo_owner, repo=repo_short, sha=commit_sha,
+                    state="pending", description=f"Review deferred: {str(e)}", context="Chief AI / Code Review"
+                )
+            raise
+
         except Exception as e:
-            logger.error(f"Error during AI Code Review pipeline: {str(e)}", exc_info=True)
+            logger.error("Error during AI Code Review pipeline: %s", e, exc_info=True)
+            self._record_outcome("ERROR", review_started)
             if commit_sha:
                 try:
                     await self.github_client.create_commit_status(
@@ -218,3 +297,30 @@ class PullRequestStrategy(GitHubEventStrategy):
                 except Exception:
                     pass
             raise e
+
+        finally:
+            # Failed attempts too: refund what wasn't used, or every retry would pay the estimate again
+            if reservation is not None:
+                with stage("quota"):
+                    await quota_manager.settle(
+                        *reservation, used_tokens=cascade.stats.review_tokens, used_requests=cascade.stats.reviewed,
+                    )
+
+    async def _surrounding_code(self, owner: str, repo: str, f: PRFile) -> str:
+        """Enclosing scopes of the file's hunks at the PR head; "" when disabled or unavailable."""
+        if not settings.REVIEW_CONTEXT_ENABLED or not f.sha or f.status == "added":
+            return ""
+        try:
+            content = await self.github_client.get_blob(owner, repo, f.sha)
+            # Binary files have no scopes worth sending
+            if b"\0" in content[:8192]:
+                return ""
+            return extract_context(f.filename, content.decode("utf-8", errors="replace"), f.patch, settings.REVIEW_CONTEXT_MAX_TOKENS)
+        except Exception as e:
+            logger.warning("Reviewing %s without surrounding code: %s", f.filename, e)
+            return ""
+
+    @staticmethod
+    def _record_outcome(verdict: str, started: float) -> None:
+        REVIEW_OUTCOMES.labels(verdict=verdict).inc()
+        REVIEW_DURATION_SECONDS.labels(verdict=verdict).observe(time.perf_counter() - started)
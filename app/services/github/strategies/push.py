@@ -1,15 +1,17 @@
 from typing import Any, Dict
 
-from app.core.logger import logger
+from app.core.logger import get_logger
 from app.services.github.strategies.base import GitHubEventStrategy
-from app.services.notifications.discord import DiscordNotification
+from app.services.notifications.outbox import notification_outbox
+
+logger = get_logger("events")
 
 
 class PushStrategy(GitHubEventStrategy):
     """Handles GitHub Push events."""
     
     def __init__(self):
-        self.discord = DiscordNotification()
+        self.notifications = notification_outbox
     
     async def execute(self, payload: Dict[str, Any]) -> None:
         ref = payload.get("ref", "unknown branch")
@@ -17,7 +19,7 @@ class PushStrategy(GitHubEventStrategy):
         repo_name = payload.get("repository", {}).get("full_name", "Unknown Repo")
         commits = payload.get("commits", [])
         
-        logger.info(f"Processing PUSH event: Push to {ref} by {pusher}")
+        logger.info("Processing PUSH event: Push to %s by %s", ref, pusher)
         
         # Build the Discord message
         title = f"🚀 New Push to {repo_name}"
@@ -29,12 +31,14 @@ class PushStrategy(GitHubEventStrategy):
         if len(commits) > 3:
             message += f"...and {len(commits) - 3} more commits."
             
-        # Execute the Template Method!
-        await self.discord.send_notification(
+        # Fire-and-forget: delivery happens in the notification pipeline
+        self.notifications.emit(
             title=title, 
             message=message, 
             metadata={
                 "color": 3066993, # A nice GitHub-esque green
                 "author": pusher,
+                # Bursts of pushes to the same repo become one digest message
+                "coalesce_key": f"push:{repo_name}",
             }
         )
@@ -5,6 +5,7 @@ from typing import Dict, Any, Optional
 
 from app.core.settings import settings
 from app.core.logger import logger
+from app.core.metrics import record_cache, record_github_call
 
 class GitHubAppAuth:
     """
@@ -14,7 +15,7 @@ class GitHubAppAuth:
     def __init__(self):
         self.app_id = settings.GITHUB_APP_ID
         self.private_key = settings.GITHUB_PRIVATE_KEY
-        self.base_url = "https://api.github.com"
+        self.base_url = settings.GITHUB_API_URL.rstrip("/")
         
         # Simple memory cache mapping "owner/repo" -> {"token": str, "expires_at": float}
         # In a highly distributed env, use Redis. For standard API usage, memory is often fine.
@@ -51,10 +52,12 @@ class GitHubAppAuth:
         url = f"{self.base_url}/repos/{owner}/{repo}/installation"
         
         async with httpx.AsyncClient() as client:
+            started = time.perf_counter()
             response = await client.get(url, headers=headers)
+            record_github_call("GET", "/repos/{owner}/{repo}/installation", str(response.status_code), time.perf_counter() - started, response.headers)
             
             if response.status_code == 404:
-                logger.error(f"GitHub App is not installed on repository: {owner}/{repo}")
+                logger.error("GitHub App is not installed on repository: %s/%s", owner, repo)
                 return None
                 
             response.raise_for_status()
@@ -71,7 +74,9 @@ class GitHubAppAuth:
         
         # Use cached token if it has more than 5 minutes of validity remaining
         if cached and cached["expires_at"] > (time.time() + 300):
+            record_cache("installation_token", hit=True)
             return cached["token"]
+        record_cache("installation_token", hit=False)
             
         # Fetch actual installation ID first
         installation_id = await self._get_app_installation_id(owner, repo)
@@ -89,7 +94,9 @@ class GitHubAppAuth:
         url = f"{self.base_url}/app/installations/{installation_id}/access_tokens"
         
         async with httpx.AsyncClient() as client:
+            started = time.perf_counter()
             response = await client.post(url, headers=headers)
+            record_github_call("POST", "/app/installations/{installation_id}/access_tokens", str(response.status_code), time.perf_counter() - started, response.headers)
             response.raise_for_status()
             
             token_data = response.json()
@@ -101,6 +108,20 @@ class GitHubAppAuth:
                 "token": token,
                 "expires_at": expires_at
             }
-            logger.info(f"Generated new GitHub Installation Token for {owner}/{repo}")
+            logger.info("Generated new GitHub Installation Token for %s/%s", owner, repo)
             
             return token
+
+    async def get_app(self) -> Dict[str, Any]:
+        """Fetch the App's own metadata with a fresh JWT, which proves the App ID and key are accepted."""
+        headers = {
+            "Authorization": f"Bearer {self._generate_jwt()}",
+            "Accept": "application/vnd.github.v3+json",
+        }
+
+        async with httpx.AsyncClient() as client:
+            started = time.perf_counter()
+            response = await client.get(f"{self.base_url}/app", headers=headers)
+            record_github_call("GET", "/app", str(response.status_code), time.perf_counter() - started, response.headers)
+            response.raise_for_status()
+            return response.json()
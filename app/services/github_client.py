@@ -1,8 +1,14 @@
 import httpx
 from typing import List, Dict, Any, Optional
 import asyncio
+import time
 
 from app.core.logger import logger
+from app.core.settings import settings
+from app.core.metrics import record_github_call
+from app.core.profiling import stage
+from app.core.tracing import tracer
+from app.infrastructure.blob_cache import blob_cache
 from app.models.github import PRFile
 from app.services.github_auth import GitHubAppAuth
 
@@ -13,72 +19,129 @@ class GitHubClient:
     Uses dynamic GitHub App Installation Tokens for authentication.
     """
     def __init__(self):
-        self.base_url = "https://api.github.com"
+        self.base_url = settings.GITHUB_API_URL.rstrip("/")
         self.auth_service = GitHubAppAuth()
         self.base_headers = {
             "Accept": "application/vnd.github.v3+json",
             "X-GitHub-Api-Version": "2022-11-28",
         }
 
-    async def _request(self, method: str, url: str, owner: str, repo: str, **kwargs) -> httpx.Response:
-        """Helper to centralize HTTP calls, token injection, and retry logic."""
+    async def _request(self, method: str, url: str, owner: str, repo: str, endpoint: str, **kwargs) -> httpx.Response:
+        """
+        Helper to centralize HTTP calls, token injection, and retry logic.
+        `endpoint` is the path template (e.g. "/repos/{owner}/{repo}/statuses/{sha}") used as the metrics label.
+        """
         
-        # 1. Fetch Installation access token dynamically for this specific repository
-        try:
-            installation_token = await self.auth_service.get_installation_token(owner, repo)
-        except Exception as e:
-            logger.error(f"Failed to fetch installation token: {str(e)}")
-            raise
+        with tracer.start_as_current_span(f"github {method} {endpoint}", attributes={"http.method": method, "github.endpoint": endpoint}) as span, \
+                stage(f"github {method} {endpoint}"):
+            # 1. Fetch Installation access token dynamically for this specific repository
+            try:
+                with stage("github.token"):
+                    installation_token = await self.auth_service.get_installation_token(owner, repo)
+            except Exception as e:
+                logger.error("Failed to fetch installation token: %s", e)
+                raise
 
-        headers = self.base_headers.copy()
-        headers["Authorization"] = f"Bearer {installation_token}"
+            headers = self.base_headers.copy()
+            headers["Authorization"] = f"Bearer {installation_token}"
         
-        # Allow override of headers from kwargs
-        if "headers" in kwargs:
-            headers.update(kwargs.pop("headers"))
+            # Allow override of headers from kwargs
+            if "headers" in kwargs:
+                headers.update(kwargs.pop("headers"))
             
-        max_retries = 3
-        for attempt in range(max_retries):
-            try:
-                async with httpx.AsyncClient() as client:
-                    response = await client.request(method, url, headers=headers, **kwargs)
+            max_retries = 3
+            for attempt in range(max_retries):
+                try:
+                    async with httpx.AsyncClient() as client:
+                        started = time.perf_counter()
+                        response = await client.request(method, url, headers=headers, **kwargs)
+                        record_github_call(method, endpoint, str(response.status_code), time.perf_counter() - started, response.headers)
+                        span.set_attribute("http.status_code", response.status_code)
                     
-                    if response.status_code == 429:
-                        retry_after = int(response.headers.get("Retry-After", 5))
-                        logger.warning(f"GitHub API Rate Limit Exceeded (429). Retrying in {retry_after}s...")
-                        await asyncio.sleep(retry_after)
-                        continue
+                        if response.status_code == 429:
+                            retry_after = int(response.headers.get("Retry-After", 5))
+                            logger.warning("GitHub API Rate Limit Exceeded (429). Retrying in %ss...", retry_after)
+                            await asyncio.sleep(retry_after)
+                            continue
                         
-                    response.raise_for_status()
-                    return response
-            except httpx.HTTPStatusError as e:
-                logger.error(f"GitHub API Error: {e.response.status_code} - {e.response.text}")
-                raise
-            except httpx.RequestError as e:
-                logger.error(f"GitHub API Network Error: {str(e)}")
-                raise
+                        response.raise_for_status()
+                        return response
+                except httpx.HTTPStatusError as e:
+                    logger.error("GitHub API Error: %s - %s", e.response.status_code, e.response.text)
+                    raise
+                except httpx.RequestError as e:
+                    record_github_call(method, endpoint, "network_error", time.perf_counter() - started)
+                    logger.error("GitHub API Network Error: %s", e)
+                    raise
                 
-        raise Exception("Max retries exceeded for GitHub API.")
+            raise Exception("Max retries exceeded for GitHub API.")
 
     async def get_pr_files(self, owner: str, repo: str, pull_number: int) -> List[PRFile]:
         """Fetch the list of changed files for a pull request."""
         url = f"{self.base_url}/repos/{owner}/{repo}/pulls/{pull_number}/files?per_page=100"
         
-        response = await self._request("GET", url, owner=owner, repo=repo)
+        response = await self._request("GET", url, owner=owner, repo=repo, endpoint="/repos/{owner}/{repo}/pulls/{pull_number}/files")
         data = response.json()
         
         return [PRFile(**file_data) for file_data in data]
 
-    async def post_pr_review(self, owner: str, repo: str, pull_number: int, review_body: str, event: str = "COMMENT") -> None:
-        """Post a review comment to the Pull Request with an explicit verdict."""
+    async def get_blob(self, owner: str, repo: str, sha: str) -> bytes:
+        """Raw content of a git blob, through the node's blob cache (blob content never changes)."""
+        content = await blob_cache.get(sha)
+        if content is not None:
+            return content
+
+        url = f"{self.base_url}/repos/{owner}/{repo}/git/blobs/{sha}"
+        response = await self._request(
+            "GET", url, owner=owner, repo=repo, endpoint="/repos/{owner}/{repo}/git/blobs/{file_sha}",
+            headers={"Accept": "application/vnd.github.raw+json"},
+        )
+        await blob_cache.put(sha, response.content)
+        return response.content
+
+    async def post_pr_review(self, owner: str, repo: str, pull_number: int, review_body: str, event: str = "COMMENT",
+                             comments: Optional[List[Dict[str, Any]]] = None, commit_id: Optional[str] = None) -> int:
+        """
+        Post a review to the Pull Request with an explicit verdict and inline `comments`
+        ({path, line, side, body}) anchored to `commit_id`. Everything goes out in one call
+        unless there are more than GITHUB_REVIEW_MAX_COMMENTS comments; the rest then follow
+        as plain COMMENT reviews so the verdict is only submitted once.
+
+        Only a failure of the first call (the one with the verdict) raises, and then nothing
+        was posted. A failed continuation is logged and skipped: raising would make the task
+        retry and post the verdict again. Returns the number of inline comments posted.
+        """
         url = f"{self.base_url}/repos/{owner}/{repo}/pulls/{pull_number}/reviews"
-        payload = {
-            "body": review_body,
-            "event": event
-        }
-        
-        await self._request("POST", url, owner=owner, repo=repo, json=payload)
-        logger.info(f"Successfully posted PR review ({event}) to {owner}/{repo}#{pull_number} using GitHub App token")
+        comments = comments or []
+        size = max(1, settings.GITHUB_REVIEW_MAX_COMMENTS)
+        chunks = [comments[i:i + size] for i in range(0, len(comments), size)] or [[]]
+
+        posted = 0
+        for i, chunk in enumerate(chunks):
+            payload: Dict[str, Any] = {
+                "body": review_body if i == 0 else f"Inline findings, continued ({i + 1}/{len(chunks)})",
+                "event": event if i == 0 else "COMMENT",
+            }
+            if chunk:
+                payload["comments"] = chunk
+            if commit_id:
+                payload["commit_id"] = commit_id
+            try:
+                await self._request("POST", url, owner=owner, repo=repo, endpoint="/repos/{owner}/{repo}/pulls/{pull_number}/reviews", json=payload)
+            except httpx.HTTPError as e:
+                if i == 0:
+                    raise
+                logger.error(
+                    "Failed to post inline comments %d/%d for %s/%s#%s, %d comments dropped: %s",
+                    i + 1, len(chunks), owner, repo, pull_number, len(chunk), e,
+                )
+                continue
+            posted += len(chunk)
+        logger.info(
+            "Successfully posted PR review (%s) with %d/%d inline comments in %d call(s) to %s/%s#%s using GitHub App token",
+            event, posted, len(comments), len(chunks), owner, repo, pull_number,
+        )
+        return posted
 
     async def create_commit_status(self, owner: str, repo: str, sha: str, state: str, description: str, context: str) -> None:
         """
@@ -93,14 +156,14 @@ class GitHubClient:
         }
         
         try:
-            await self._request("POST", url, owner=owner, repo=repo, json=payload)
-            logger.info(f"Successfully set commit {sha} status to {state} ({context})")
+            await self._request("POST", url, owner=owner, repo=repo, endpoint="/repos/{owner}/{repo}/statuses/{sha}", json=payload)
+            logger.info("Successfully set commit %s status to %s (%s)", sha, state, context)
         except httpx.HTTPStatusError as e:
             if e.response.status_code == 403:
                 logger.warning(
-                    f"Skipping commit status for {sha}: GitHub App lacks 'Commit statuses' (Read & write) permissions. "
-                    "Please update permissions in GitHub App settings."
+                    "Skipping commit status for %s: GitHub App lacks 'Commit statuses' (Read & write) permissions. "
+                    "Please update permissions in GitHub App settings.", sha
                 )
             else:
-                logger.error(f"Failed to set commit status {sha}: {str(e)}")
+                logger.error("Failed to set commit status %s: %s", sha, e)
                 # We don't raise here because we don't want to fail the entire AI review pipeline just for a missing status dot
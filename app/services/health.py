@@ -0,0 +1,230 @@
+"""
+Dependency probes behind /health/ready.
+
+Probes run in a background task every HEALTH_PROBE_INTERVAL seconds and the endpoints only
+read the cached results, so a slow or hanging dependency never adds latency to a health
+check. Each probe is bounded by HEALTH_PROBE_TIMEOUT.
+
+  redis    PING on the coordination Redis (dedup, quotas, outbox)
+  broker   depth of every Celery queue on the Redis broker, plus this pod's enqueue buffer
+  ai       health_check() and its latency for each provider a review can use
+  github   GET /app signed with a fresh App JWT, i.e. the App ID and private key are accepted
+  discord  GET /users/@me with the bot token
+
+Probes for integrations that are not configured pass with `"configured": false`.
+The pod is ready while every probe listed in HEALTH_READY_PROBES passes and the results are
+fresh; a failure of any other probe only marks the response "degraded".
+"""
+import asyncio
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import httpx
+from redis.asyncio import Redis
+
+from app.core.logger import logger
+from app.core.metrics import BROKER_QUEUE_DEPTH, HEALTH_PROBE_SECONDS, HEALTH_PROBE_UP
+from app.core.settings import settings
+from app.infrastructure.redis_client import get_redis
+from app.infrastructure.task_publisher import task_publisher
+from app.services.ai.factory import configured_providers, get_ai_provider
+from app.services.github_auth import GitHubAppAuth
+from app.services.notifications.discord_dispatcher import DISCORD_API_BASE
+
+Probe = Callable[[], Awaitable[Tuple[bool, Dict[str, Any]]]]
+
+
+@dataclass
+class ProbeResult:
+    ok: bool
+    latency_ms: float
+    checked_at: float
+    detail: Dict[str, Any] = field(default_factory=dict)
+    error: Optional[str] = None
+
+
+class HealthMonitor:
+    """Runs the dependency probes in the background and keeps the latest result of each."""
+
+    def __init__(self):
+        self.started_at = time.time()
+        self.results: Dict[str, ProbeResult] = {}
+        self.draining = False
+        self.probes: Dict[str, Probe] = {
+            "redis": self._probe_redis,
+            "broker": self._probe_broker,
+            "ai": self._probe_ai,
+            "github": self._probe_github,
+            "discord": self._probe_discord,
+        }
+        self._runner: Optional[asyncio.Task] = None
+        self._broker: Optional[Redis] = None
+        self._discord: Optional[httpx.AsyncClient] = None
+        self._github = GitHubAppAuth()
+
+    @property
+    def required(self) -> List[str]:
+        return [name.strip() for name in settings.HEALTH_READY_PROBES.split(",") if name.strip()]
+
+    async def start(self) -> None:
+        if self._runner is not None:
+            return
+        self.draining = False
+        self._runner = asyncio.create_task(self._run(), name="health-probes")
+        logger.info("Health probes started (every %.0fs, required: %s)", settings.HEALTH_PROBE_INTERVAL, ", ".join(self.required))
+
+    async def stop(self) -> None:
+        """Report not ready from now on, then stop probing."""
+        self.draining = True
+        if self._runner is None:
+            return
+        self._runner.cancel()
+        await asyncio.gather(self._runner, return_exceptions=True)
+        self._runner = None
+        if self._broker is not None:
+            await self._broker.aclose()
+            self._broker = None
+        if self._discord is not None:
+            await self._discord.aclose()
+            self._discord = None
+
+    async def refresh(self) -> None:
+        """Run every probe once, concurrently."""
+        names = list(self.probes)
+        results = await asyncio.gather(*(self._run_probe(name) for name in names))
+        self.results.update(zip(names, results))
+
+    def liveness(self) -> Dict[str, Any]:
+        return {"status": "ok", "uptime_seconds": round(time.time() - self.started_at, 1)}
+
+    def readiness(self) -> Tuple[bool, Dict[str, Any]]:
+        """(ready, report) from the cached results. Never runs a probe."""
+        required = self.required
+        reasons = []
+        if self.draining:
+            reasons.append("shutting down")
+        elif not self.results:
+            reasons.append("probes have not completed yet")
+        else:
+            age = time.time() - min(result.checked_at for result in self.results.values())
+            if age > settings.HEALTH_PROBE_STALE_AFTER:
+                reasons.append(f"probe results are {age:.0f}s old")
+            reasons += [f"{name} probe failing" for name in required if name in self.results and not self.results[name].ok]
+
+        degraded = [name for name, result in self.results.items() if not result.ok and name not in required]
+        status = "unavailable" if reasons else "degraded" if degraded else "ok"
+        return not reasons, {
+            "status": status,
+            "reasons": reasons,
+            "degraded": degraded,
+            "probes": {name: asdict(result) for name, result in self.results.items()},
+        }
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.error("Health probe round failed: %s", e, exc_info=True)
+            await asyncio.sleep(settings.HEALTH_PROBE_INTERVAL)
+
+    async def _run_probe(self, name: str) -> ProbeResult:
+        started = time.perf_counter()
+        error = None
+        try:
+            ok, detail = await asyncio.wait_for(self.probes[name](), timeout=settings.HEALTH_PROBE_TIMEOUT)
+        except asyncio.TimeoutError:
+            ok, detail, error = False, {}, f"timed out after {settings.HEALTH_PROBE_TIMEOUT:g}s"
+        except Exception as e:
+            ok, detail, error = False, {}, str(e) or type(e).__name__
+        latency = time.perf_counter() - started
+
+        HEALTH_PROBE_UP.labels(probe=name).set(1 if ok else 0)
+        HEALTH_PROBE_SECONDS.labels(probe=name).set(latency)
+        previous = self.results.get(name)
+        if not ok and (previous is None or previous.ok):
+            logger.warning("Health probe '%s' failing: %s", name, error or detail)
+        elif ok and previous is not None and not previous.ok:
+            logger.info("Health probe '%s' recovered", name)
+        return ProbeResult(ok, round(latency * 1000, 1), time.time(), detail, error)
+
+    # --- Probes ---
+
+    async def _probe_redis(self) -> Tuple[bool, Dict[str, Any]]:
+        await get_redis().ping()
+        return True, {}
+
+    @staticmethod
+    def queues() -> List[str]:
+        # Imported here so the API does not load the Celery app at startup
+        from app.core.celery_app import celery
+        routes = celery.conf.task_routes or {}
+        return sorted({celery.conf.task_default_queue, *(route["queue"] for route in routes.values())})
+
+    async def _probe_broker(self) -> Tuple[bool, Dict[str, Any]]:
+        if self._broker is None:
+            self._broker = Redis.from_url(
+                settings.CELERY_BROKER_URL,
+                socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+                socket_connect_timeout=settings.REDIS_SOCKET_TIMEOUT,
+            )
+        queues = self.queues()
+        # The Redis transport keeps each queue as a list named after it
+        async with self._broker.pipeline(transaction=False) as pipe:
+            for queue in queues:
+                pipe.llen(queue)
+            depths = await pipe.execute()
+        for queue, depth in zip(queues, depths):
+            BROKER_QUEUE_DEPTH.labels(queue=queue).set(depth)
+
+        buffer = task_publisher.stats()
+        detail = {
+            "queues": dict(zip(queues, depths)),
+            "buffer_depth": buffer["buffer_depth"],
+            "buffer_size": buffer["buffer_size"],
+        }
+        # A full enqueue buffer means this pod is already turning webhooks away
+        return buffer["buffer_depth"] < buffer["buffer_size"], detail
+
+    async def _probe_ai(self) -> Tuple[bool, Dict[str, Any]]:
+        async def check(name: str, model: Optional[str]) -> Dict[str, Any]:
+            started = time.perf_counter()
+            result: Dict[str, Any] = {"provider": name, "model": model}
+            try:
+                # The first call imports the provider SDK; keep that off the event loop
+                provider = await asyncio.to_thread(get_ai_provider, name, model)
+                result["model"] = provider.model
+                result["ok"] = await provider.health_check()
+            except Exception as e:
+                result["ok"], result["error"] = False, str(e)
+            result["latency_ms"] = round((time.perf_counter() - started) * 1000, 1)
+            return result
+
+        checks = await asyncio.gather(*(check(name, model) for name, model in configured_providers()))
+        return all(check["ok"] for check in checks), {"providers": checks}
+
+    async def _probe_github(self) -> Tuple[bool, Dict[str, Any]]:
+        if not (self._github.app_id and self._github.private_key):
+            return True, {"configured": False}
+        app = await self._github.get_app()
+        return True, {"configured": True, "app": app.get("slug")}
+
+    async def _probe_discord(self) -> Tuple[bool, Dict[str, Any]]:
+        if not settings.DISCORD_BOT_TOKEN:
+            return True, {"configured": False}
+        if self._discord is None:
+            self._discord = httpx.AsyncClient(
+                base_url=DISCORD_API_BASE,
+                headers={"Authorization": f"Bot {settings.DISCORD_BOT_TOKEN}"},
+                timeout=settings.HEALTH_PROBE_TIMEOUT,
+            )
+        response = await self._discord.get("/users/@me")
+        if response.status_code == 401:
+            return False, {"configured": True, "error": "bot token rejected"}
+        response.raise_for_status()
+        return True, {"configured": True, "bot": response.json().get("username")}
+
+
+# Global monitor, started and stopped by the API lifespan
+health_monitor = HealthMonitor()
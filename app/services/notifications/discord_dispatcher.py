@@ -0,0 +1,335 @@
+import asyncio
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+
+from app.core.logger import logger
+from app.core.settings import settings
+from app.core.tracing import tracer
+
+DISCORD_API_BASE = "https://discord.com/api/v10"
+
+# Discord limits per message
+MAX_EMBEDS_PER_MESSAGE = 10
+MAX_EMBED_CHARS_PER_MESSAGE = 6000
+MAX_EMBED_DESCRIPTION = 4096
+
+MAX_SEND_ATTEMPTS = 5
+# Upper bound on messages collected into one coalescing window
+MAX_BATCH = 100
+# How many message refs to remember for in-place edits
+MAX_TRACKED_MESSAGES = 1000
+
+
+@dataclass
+class DiscordMessage:
+    """A queued Discord send plus the routing hints the dispatcher acts on."""
+    embeds: List[Dict[str, Any]]
+    # Messages sharing a coalesce key may be merged into one digest embed
+    coalesce_key: Optional[str] = None
+    # Remember the posted message under this ref so it can be edited later
+    message_ref: Optional[str] = None
+    # Edit the message remembered under this ref instead of posting a new one
+    edit_ref: Optional[str] = None
+
+
+@dataclass
+class _Bucket:
+    remaining: int = 1
+    reset_at: float = 0.0
+
+
+class DiscordDispatcher:
+    """
+    Single rate-aware send loop for the Discord channel.
+
+    All sends go through one queue consumed by one task, which keeps per-bucket state from
+    the X-RateLimit-* headers and waits for a bucket to reset instead of hitting 429s.
+    Bursts that arrive within DISCORD_COALESCE_WINDOW_SECONDS are merged: messages that
+    share a coalesce key become one digest embed, and embeds are packed up to 10 per message.
+
+    The loop, queue and HTTP client are bound to the running event loop and recreated when
+    a new loop uses the dispatcher (each Celery task runs in its own asyncio.run).
+    Rate-limit state and message refs survive across loops.
+    """
+
+    def __init__(self):
+        self._buckets: Dict[str, _Bucket] = {}
+        self._route_buckets: Dict[str, str] = {}
+        self._global_reset_at = 0.0
+        self._messages: "OrderedDict[str, Tuple[str, List[Dict[str, Any]]]]" = OrderedDict()
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._runner: Optional[asyncio.Task] = None
+        self._client: Optional[httpx.AsyncClient] = None
+
+        self.sent_messages = 0
+        self.coalesced = 0
+        self.edited = 0
+        self.rate_limited = 0
+        self.failed = 0
+
+    @property
+    def channel_path(self) -> str:
+        return f"/channels/{settings.DISCORD_CHANNEL_ID}/messages"
+
+    def submit(self, message: DiscordMessage) -> bool:
+        """Queue a message for the send loop. Never blocks."""
+        self._ensure_running()
+        try:
+            self._queue.put_nowait(message)
+            return True
+        except asyncio.QueueFull:
+            logger.error("Discord dispatcher queue is full, dropping notification")
+            return False
+
+    async def flush(self) -> None:
+        """Wait until everything queued on this loop has been sent or given up on, keeping the loop task."""
+        if self._loop is not asyncio.get_running_loop() or self._runner is None:
+            return
+        await self._queue.join()
+
+    async def drain(self, timeout: float = 30.0) -> None:
+        """Wait until everything queued on this loop has been sent, then stop the loop task."""
+        if self._loop is not asyncio.get_running_loop() or self._runner is None:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.error("Discord dispatcher drain timed out with %d messages pending", self._queue.qsize())
+
+        self._runner.cancel()
+        await asyncio.gather(self._runner, return_exceptions=True)
+        await self._client.aclose()
+        self._loop = self._queue = self._runner = self._client = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pending": self._queue.qsize() if self._queue else 0,
+            "sent_messages": self.sent_messages,
+            "coalesced": self.coalesced,
+            "edited": self.edited,
+            "rate_limited": self.rate_limited,
+            "failed": self.failed,
+        }
+
+    def _ensure_running(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and self._runner is not None and not self._runner.done():
+            return
+        self._loop = loop
+        self._queue = asyncio.Queue(maxsize=settings.DISCORD_QUEUE_SIZE)
+        self._client = httpx.AsyncClient(
+            base_url=DISCORD_API_BASE,
+            headers={"Authorization": f"Bot {settings.DISCORD_BOT_TOKEN}"},
+            timeout=10.0,
+        )
+        self._runner = loop.create_task(self._run(), name="discord-dispatcher")
+
+    # --- Send loop ---
+
+    async def _run(self) -> None:
+        while True:
+            batch = await self._next_batch()
+            try:
+                await self._deliver(batch)
+            except Exception as e:
+                self.failed += len(batch)
+                logger.error("Discord dispatcher failed to deliver %d messages: %s", len(batch), e, exc_info=True)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _next_batch(self) -> List[DiscordMessage]:
+        """Take one message, then keep collecting for the coalesce window if it can be merged."""
+        batch = [await self._queue.get()]
+        if batch[0].coalesce_key is None:
+            return batch
+
+        deadline = time.monotonic() + settings.DISCORD_COALESCE_WINDOW_SECONDS
+        while len(batch) < MAX_BATCH:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout=remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _deliver(self, batch: List[DiscordMessage]) -> None:
+        groups: "OrderedDict[str, List[Dict[str, Any]]]" = OrderedDict()
+        for message in batch:
+            # Messages that are (or will be) edited in place always travel alone, in order
+            if message.message_ref or message.edit_ref:
+                await self._deliver_tracked(message)
+            else:
+                groups.setdefault(message.coalesce_key or f"_single_{id(message)}", []).append(message.embeds)
+
+        embeds: List[Dict[str, Any]] = []
+        for group in groups.values():
+            if len(group) >= settings.DISCORD_DIGEST_THRESHOLD:
+                embeds.append(self._digest(group))
+                self.coalesced += len(group) - 1
+            else:
+                embeds.extend(e for message_embeds in group for e in message_embeds)
+
+        for chunk in self._pack(embeds):
+            if await self._send("POST", self.channel_path, {"embeds": chunk}) is not None:
+                self.sent_messages += 1
+
+    async def _deliver_tracked(self, message: DiscordMessage) -> None:
+        tracked = self._messages.get(message.edit_ref) if message.edit_ref else None
+        if tracked is not None:
+            message_id, base_embeds = tracked
+            embeds = (base_embeds + message.embeds)[:MAX_EMBEDS_PER_MESSAGE]
+            if await self._send("PATCH", f"{self.channel_path}/{message_id}", {"embeds": embeds}) is not None:
+                self.edited += 1
+                return
+            # The original message is gone or not editable; fall back to a new post
+
+        data = await self._send("POST", self.channel_path, {"embeds": message.embeds[:MAX_EMBEDS_PER_MESSAGE]})
+        if data is None:
+            return
+        self.sent_messages += 1
+        if message.message_ref and data.get("id"):
+            self._messages[message.message_ref] = (data["id"], message.embeds)
+            self._messages.move_to_end(message.message_ref)
+            while len(self._messages) > MAX_TRACKED_MESSAGES:
+                self._messages.popitem(last=False)
+
+    @staticmethod
+    def _digest(group: List[List[Dict[str, Any]]]) -> Dict[str, Any]:
+        """Merge several single-embed notifications into one digest embed."""
+        embeds = [e for message_embeds in group for e in message_embeds]
+        first = embeds[0]
+        lines = []
+        for embed in embeds:
+            summary = (embed.get("description") or "").strip().splitlines()
+            line = f"• **{embed.get('title', '')}**"
+            if summary:
+                line += f" — {summary[-1][:200]}"
+            lines.append(line)
+
+        description = "\n".join(lines)
+        if len(description) > MAX_EMBED_DESCRIPTION:
+            description = description[:MAX_EMBED_DESCRIPTION - 1] + "…"
+
+        digest = {
+            "title": f"{first.get('title', 'Update')} (+{len(embeds) - 1} more)",
+            "description": description,
+            "color": first.get("color", 3447003),
+        }
+        if "author" in first:
+            digest["author"] = first["author"]
+        return digest
+
+    @staticmethod
+    def _embed_chars(embed: Dict[str, Any]) -> int:
+        return (
+            len(embed.get("title", ""))
+            + len(embed.get("description", ""))
+            + len(embed.get("author", {}).get("name", ""))
+        )
+
+    def _pack(self, embeds: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+        """Pack embeds into messages within Discord's per-message embed count and size limits."""
+        chunks: List[List[Dict[str, Any]]] = []
+        current: List[Dict[str, Any]] = []
+        current_chars = 0
+        for embed in embeds:
+            chars = self._embed_chars(embed)
+            if current and (len(current) >= MAX_EMBEDS_PER_MESSAGE or current_chars + chars > MAX_EMBED_CHARS_PER_MESSAGE):
+                chunks.append(current)
+                current, current_chars = [], 0
+            current.append(embed)
+            current_chars += chars
+        if current:
+            chunks.append(current)
+        return chunks
+
+    # --- Rate limiting ---
+
+    async def _send(self, method: str, path: str, body: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Send one request, honouring bucket state and retrying on 429. Returns the JSON body or None."""
+        with tracer.start_as_current_span(f"discord {method}", attributes={"discord.embeds": len(body.get("embeds", []))}) as span:
+            data = await self._send_with_retries(method, path, body)
+            span.set_attribute("discord.delivered", data is not None)
+            return data
+
+    async def _send_with_retries(self, method: str, path: str, body: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        # Buckets are shared by all messages of a channel for the same method
+        route = f"{method} {self.channel_path}"
+
+        for attempt in range(MAX_SEND_ATTEMPTS):
+            await self._wait_for_bucket(route)
+            try:
+                response = await self._client.request(method, path, json=body)
+            except httpx.RequestError as e:
+                logger.error("Network error while reaching Discord API: %s", e)
+                self.failed += 1
+                return None
+
+            self._update_bucket(route, response)
+
+            if response.status_code == 429:
+                self.rate_limited += 1
+                try:
+                    data = response.json() if response.content else {}
+                except ValueError:
+                    # e.g. an HTML page from Cloudflare in front of Discord
+                    data = {}
+                if not isinstance(data, dict):
+                    data = {}
+                try:
+                    retry_after = float(data.get("retry_after") or response.headers.get("Retry-After", 1))
+                except ValueError:
+                    retry_after = 1.0
+                if data.get("global") or response.headers.get("X-RateLimit-Global"):
+                    self._global_reset_at = time.monotonic() + retry_after
+                logger.warning("Discord rate limited %s (attempt %d), retrying in %.2fs", route, attempt + 1, retry_after)
+                await asyncio.sleep(retry_after)
+                continue
+
+            if response.is_success:
+                return response.json() if response.content else {}
+
+            logger.error("Discord API returned %s: %s", response.status_code, response.text)
+            self.failed += 1
+            return None
+
+        logger.error("Giving up on Discord %s after %d rate-limited attempts", route, MAX_SEND_ATTEMPTS)
+        self.failed += 1
+        return None
+
+    async def _wait_for_bucket(self, route: str) -> None:
+        now = time.monotonic()
+        wait = self._global_reset_at - now
+
+        bucket = self._buckets.get(self._route_buckets.get(route, ""))
+        if bucket is not None and bucket.remaining <= 0:
+            wait = max(wait, bucket.reset_at - now)
+
+        if wait > 0:
+            logger.info("Waiting %.2fs for Discord rate limit bucket on %s", wait, route)
+            await asyncio.sleep(wait)
+
+    def _update_bucket(self, route: str, response: httpx.Response) -> None:
+        bucket_id = response.headers.get("X-RateLimit-Bucket")
+        if not bucket_id:
+            return
+        self._route_buckets[route] = bucket_id
+        bucket = self._buckets.setdefault(bucket_id, _Bucket())
+        try:
+            bucket.remaining = int(response.headers.get("X-RateLimit-Remaining", bucket.remaining))
+            bucket.reset_at = time.monotonic() + float(response.headers.get("X-RateLimit-Reset-After", 0))
+        except ValueError:
+            pass
+
+
+# One dispatcher per process so every notification shares the same rate-limit state
+discord_dispatcher = DiscordDispatcher()
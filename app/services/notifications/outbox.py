@@ -0,0 +1,194 @@
+"""
+Fire-and-forget notification pipeline.
+
+Strategies call `notification_outbox.emit(...)`, which never blocks and never raises.
+With NOTIFICATION_DELIVERY=outbox (the default) the event is pushed to a Redis list and
+delivered by a separate consumer process:
+
+    python -m app.services.notifications.outbox
+
+With NOTIFICATION_DELIVERY=inline the event is fanned out from a background task in the
+emitting process instead.
+"""
+import asyncio
+import signal
+import time
+from typing import Any, Dict, List, Optional, Set
+
+import orjson
+from redis.exceptions import RedisError
+
+from app.core import tracing
+from app.core.logger import logger
+from app.core.settings import settings
+from app.infrastructure.redis_client import get_redis
+from app.services.notifications.discord import DiscordNotification
+from app.services.notifications.discord_dispatcher import discord_dispatcher
+from app.services.notifications.template import NotificationTemplate
+
+OUTBOX_KEY = "notifications:outbox"
+PROCESSING_KEY = "notifications:outbox:processing"
+# Events taken per round; the round is acknowledged only after Discord has sent all of it
+BATCH_SIZE = 50
+
+
+class NotificationFanout:
+    """Delivers one notification event to every configured sink concurrently."""
+
+    def __init__(self, sinks: Optional[List[NotificationTemplate]] = None):
+        self.sinks = sinks if sinks is not None else [DiscordNotification()]
+
+    async def deliver(self, event: Dict[str, Any]) -> None:
+        results = await asyncio.gather(
+            *(
+                sink.send_notification(event["title"], event["message"], event.get("metadata"))
+                for sink in self.sinks
+            ),
+            return_exceptions=True,
+        )
+        for sink, result in zip(self.sinks, results):
+            if isinstance(result, Exception):
+                logger.error("Notification sink %s raised: %s", sink.__class__.__name__, result)
+
+
+class NotificationOutbox:
+    """Producer side of the notification pipeline."""
+
+    def __init__(self):
+        self.fanout = NotificationFanout()
+        self._pending: Set[asyncio.Task] = set()
+
+        self.emitted = 0
+        self.outbox_errors = 0
+
+    def emit(self, title: str, message: str, metadata: Optional[Dict[str, Any]] = None) -> None:
+        """Schedule a notification without waiting for it. Must be called from the event loop."""
+        event = {
+            "title": title,
+            "message": message,
+            "metadata": metadata or {},
+            "emitted_at": time.time(),
+            "trace": tracing.inject(),
+        }
+        task = asyncio.get_running_loop().create_task(self._publish(event))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+        self.emitted += 1
+
+    async def drain(self, timeout: float = 30.0) -> None:
+        """Wait for scheduled emits (and the Discord send loop) before the event loop closes."""
+        if self._pending:
+            await asyncio.wait(list(self._pending), timeout=timeout)
+        await discord_dispatcher.drain(timeout=timeout)
+
+    async def _publish(self, event: Dict[str, Any]) -> None:
+        if settings.NOTIFICATION_DELIVERY == "outbox":
+            try:
+                await asyncio.wait_for(
+                    get_redis().lpush(OUTBOX_KEY, orjson.dumps(event)),
+                    timeout=settings.NOTIFICATION_EMIT_TIMEOUT,
+                )
+                return
+            except (RedisError, asyncio.TimeoutError) as e:
+                self.outbox_errors += 1
+                logger.warning("Notification outbox unavailable, delivering inline: %s", str(e) or type(e).__name__)
+
+        try:
+            await self.fanout.deliver(event)
+        except Exception as e:
+            logger.error("Failed to deliver notification '%s': %s", event["title"], e, exc_info=True)
+
+
+class OutboxConsumer:
+    """
+    Consumer side: moves a batch of events from the outbox into a processing list, fans
+    them out, waits for the Discord dispatcher to send them, then acknowledges them.
+    Events left in the processing list by a crash are requeued on startup. Run a single
+    replica so in-place Discord edits find their original message.
+    """
+
+    def __init__(self):
+        self.fanout = NotificationFanout()
+        self._stopping = asyncio.Event()
+
+    def stop(self) -> None:
+        self._stopping.set()
+
+    async def run(self) -> None:
+        redis = get_redis()
+        requeued = 0
+        while await redis.lmove(PROCESSING_KEY, OUTBOX_KEY, "LEFT", "RIGHT"):
+            requeued += 1
+        logger.info("Notification outbox consumer started (%d events requeued)", requeued)
+
+        while not self._stopping.is_set():
+            try:
+                batch = await self._read_batch(redis)
+            except RedisError as e:
+                logger.error("Notification outbox read failed: %s", e)
+                await asyncio.sleep(1)
+                continue
+            if not batch:
+                continue
+
+            for raw in batch:
+                try:
+                    event = orjson.loads(raw)
+                    with tracing.continued(event.get("trace"), "notification.deliver"):
+                        await self.fanout.deliver(event)
+                except Exception as e:
+                    logger.error("Dropping undeliverable notification event: %s", e, exc_info=True)
+            # Sinks only queue the message; ack once the dispatcher has actually sent it
+            await discord_dispatcher.flush()
+            for raw in batch:
+                await self._ack(redis, raw)
+
+        await discord_dispatcher.drain()
+        logger.info("Notification outbox consumer stopped")
+
+    async def _read_batch(self, redis) -> List[bytes]:
+        """Block for one event, then take whatever else is already waiting, up to BATCH_SIZE."""
+        raw = await redis.blmove(OUTBOX_KEY, PROCESSING_KEY, 1, "RIGHT", "LEFT")
+        if raw is None:
+            return []
+        batch = [raw]
+        while len(batch) < BATCH_SIZE:
+            try:
+                raw = await redis.lmove(OUTBOX_KEY, PROCESSING_KEY, "RIGHT", "LEFT")
+            except RedisError:
+                break
+            if raw is None:
+                break
+            batch.append(raw)
+        return batch
+
+    async def _ack(self, redis, raw: bytes) -> None:
+        """Remove a handled event from the processing list, retrying so a restart does not replay it."""
+        while True:
+            try:
+                await redis.lrem(PROCESSING_KEY, 1, raw)
+                return
+            except RedisError as e:
+                logger.error("Notification outbox ack failed: %s", e)
+                if self._stopping.is_set():
+                    return
+                await asyncio.sleep(1)
+
+
+notification_outbox = NotificationOutbox()
+
+
+async def _main() -> None:
+    tracing.setup_tracing("chief-notifications")
+    consumer = OutboxConsumer()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, consumer.stop)
+    try:
+        await consumer.run()
+    finally:
+        tracing.shutdown_tracing()
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
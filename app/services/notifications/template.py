@@ -17,7 +17,7 @@ class NotificationTemplate(ABC):
         This method should generally not be overridden by subclasses.
         """
         if not self._is_enabled():
-            logger.debug(f"Skipping notification for {self.__class__.__name__}: Service is disabled")
+            logger.debug("Skipping notification for %s: Service is disabled", self.__class__.__name__)
             return False
 
         try:
@@ -31,14 +31,14 @@ class NotificationTemplate(ABC):
             success = await self._dispatch(payload)
             
             if success:
-                logger.debug(f"Successfully dispatched notification via {self.__class__.__name__}")
+                logger.debug("Successfully dispatched notification via %s", self.__class__.__name__)
             else:
-                logger.error(f"Failed to dispatch notification via {self.__class__.__name__}")
+                logger.error("Failed to dispatch notification via %s", self.__class__.__name__)
                 
             return success
 
         except Exception as e:
-            logger.error(f"Exception while sending notification via {self.__class__.__name__}: {str(e)}", exc_info=True)
+            logger.error("Exception while sending notification via %s: %s", self.__class__.__name__, e, exc_info=True)
             return False
 
     # --- Abstract Steps (Subclasses MUST implement these) ---
@@ -0,0 +1,39 @@
+import asyncio
+from celery import shared_task
+
+from app.core.logger import logger
+from app.services.github.processor import GitHubEventProcessor
+from app.services.notifications.outbox import notification_outbox
+
+
+# Shared by every task in this worker process; strategies are built on first use
+processor = GitHubEventProcessor()
+
+
+async def _execute(event_type: str, payload: dict) -> None:
+    try:
+        await processor.process_event(event_type, payload)
+    finally:
+        # Flush emitted notifications before asyncio.run closes the loop
+        await notification_outbox.drain()
+
+
+@shared_task(
+    name="app.tasks.notifications.process_github_event",
+    bind=True,
+    autoretry_for=(Exception,),
+    max_retries=3,
+    retry_backoff=True,
+    retry_jitter=True,
+    ignore_result=True,
+    # Notifications are cheap; anything slower than this is stuck
+    soft_time_limit=60,
+    time_limit=90
+)
+def process_github_event(self, event_type: str, payload: dict) -> None:
+    """
+    Celery task for notification-only GitHub events, consumed from the `notifications` queue.
+    Used when NOTIFICATION_ROUTE=celery instead of the API's in-process event queue.
+    """
+    logger.info("Celery Task [%s] received notification event '%s'", self.request.id, event_type)
+    asyncio.run(_execute(event_type, payload))
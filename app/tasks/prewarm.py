@@ -0,0 +1,72 @@
+"""
+Worker prewarm, run from Celery signals before a worker takes its first task.
+
+`import_providers` runs once in the worker's main process before the pool forks, so the
+configured provider SDKs are imported a single time and shared copy-on-write by every pool
+process. `warm_process` runs in each pool process: it builds the review strategy and the
+provider clients, signs a GitHub App JWT and fetches installation tokens for
+WORKER_PREWARM_REPOS into the strategy's token cache.
+
+Tasks run on a fresh event loop each (asyncio.run), so sockets can't be kept open across
+tasks; prewarming covers everything else. A failing step is logged and skipped, never fatal.
+"""
+import asyncio
+import importlib
+import time
+from typing import Callable, Dict, List
+
+from app.core.logger import logger
+from app.core.settings import settings
+from app.services.ai.factory import configured_providers, get_ai_provider
+
+
+def _timed(steps: Dict[str, float], name: str, fn: Callable[[], object]) -> None:
+    started = time.perf_counter()
+    try:
+        fn()
+    except Exception as e:
+        logger.warning("Prewarm step '%s' failed: %s", name, e)
+    steps[name] = round(time.perf_counter() - started, 3)
+
+
+def import_providers() -> Dict[str, float]:
+    """Import the provider modules (and their SDKs) in the parent process."""
+    steps: Dict[str, float] = {}
+    for name, _ in configured_providers():
+        _timed(steps, f"import.{name}", lambda name=name: importlib.import_module(f"app.services.ai.{name}"))
+    logger.info("Prewarmed provider imports: %s", steps)
+    return steps
+
+
+async def _fetch_tokens(auth, repos: List[str]) -> None:
+    async def fetch(full_name: str) -> None:
+        owner, _, repo = full_name.partition("/")
+        await auth.get_installation_token(owner, repo)
+
+    results = await asyncio.wait_for(
+        asyncio.gather(*(fetch(repo) for repo in repos), return_exceptions=True),
+        timeout=settings.WORKER_PREWARM_TIMEOUT,
+    )
+    for repo, result in zip(repos, results):
+        if isinstance(result, Exception):
+            logger.warning("Prewarm could not fetch an installation token for %s: %s", repo, result)
+
+
+def warm_process() -> Dict[str, float]:
+    """Build clients and fetch tokens in a pool process before it accepts tasks."""
+    from app.tasks.review import get_strategy
+
+    steps: Dict[str, float] = {}
+    _timed(steps, "strategy", get_strategy)
+    for name, model in configured_providers():
+        _timed(steps, f"provider.{name}", lambda name=name, model=model: get_ai_provider(name, model))
+
+    auth = get_strategy().github_client.auth_service
+    if auth.app_id and auth.private_key:
+        _timed(steps, "github.jwt", auth._generate_jwt)
+        repos = [repo.strip() for repo in settings.WORKER_PREWARM_REPOS.split(",") if repo.strip()]
+        if repos:
+            _timed(steps, "github.tokens", lambda: asyncio.run(_fetch_tokens(auth, repos)))
+
+    logger.info("Prewarmed worker process in %.3fs: %s", sum(steps.values()), steps)
+    return steps
@@ -1,53 +1,148 @@
 import asyncio
 from celery import shared_task
-from celery.exceptions import SoftTimeLimitExceeded
+from celery.exceptions import Retry, SoftTimeLimitExceeded
+from celery.utils.time import get_exponential_backoff_interval
 
+from app.core import profiling
 from app.core.logger import logger
+from app.core.settings import settings
+from app.services.ai.quota import ReviewDeferred
+from app.services.github.review_scheduler import review_scheduler
 from app.services.github.strategies.pull_request import PullRequestStrategy
+from app.services.notifications.outbox import notification_outbox
 
-@shared_task(
-    name="app.tasks.review.process_pull_request_review",
+
+_strategy: PullRequestStrategy | None = None
+
+
+def get_strategy() -> PullRequestStrategy:
+    """
+    One strategy per worker process, so its GitHub client (and the installation token
+    cache behind it) survives from one review to the next.
+    """
+    global _strategy
+    if _strategy is None:
+        _strategy = PullRequestStrategy()
+    return _strategy
+
+
+async def _execute(strategy: PullRequestStrategy, payload: dict, announce: bool) -> None:
+    try:
+        await strategy.execute(payload, announce=announce)
+    finally:
+        # Emitted notifications run as tasks on this loop; flush them before asyncio.run closes it.
+        # Bounded so Discord latency (inline delivery or the outbox fallback) stays off the time limit.
+        await notification_outbox.drain(timeout=settings.NOTIFICATION_EMIT_TIMEOUT)
+
+
+# Both review tasks share these: standard exponential backoff on Exception, no result written to
+# Redis for every review. Stage timings are logged and exported as task_stage_seconds by the
+# profiling hooks; enqueue with ignore_result=False to also keep them as the task result.
+# Quota deferrals are not errors: they retry without limit and don't use up max_retries.
+REVIEW_TASK_OPTIONS = dict(
     bind=True,
-    # Standard exponential backoff parameters on Exception
     autoretry_for=(Exception,),
     max_retries=3,
     retry_backoff=True,
     retry_backoff_max=600,
     retry_jitter=True,
+    ignore_result=True,
     # Override time limits defined in CeleryApp if needed
     soft_time_limit=300,
-    time_limit=360
+    time_limit=360,
 )
-def process_pull_request_review(self, payload: dict) -> None:
+
+
+def _retry_error(task, exc: Exception, deferrals: int):
     """
-    Synchronous Celery task that processes a GitHub pull request event.
-    It encapsulates the existing async PullRequestStrategy using an event loop.
-    Enqueued by API endpoints explicitly when needed.
+    Retry after a failure with the task's own backoff, counting only failed attempts against
+    max_retries (request.retries also counts deferrals). Re-raises `exc` once the budget is spent.
+    """
+    countdown = get_exponential_backoff_interval(
+        factor=1, retries=task.request.retries - deferrals, maximum=task.retry_backoff_max,
+        full_jitter=task.retry_jitter,
+    )
+    return task.retry(exc=exc, countdown=countdown, max_retries=task.max_retries + deferrals)
+
+
+def _review(task, payload: dict, deferrals: int = 0) -> dict | None:
+    """
+    Run one review inside the calling task. Returns the per-stage timing summary.
+    Raises Retry when the task will run again and any other exception when it has failed for good.
     """
     pr_number = payload.get("pull_request", {}).get("number", "Unknown")
     repo = payload.get("repository", {}).get("full_name", "Unknown Repo")
     action = payload.get("action", "unknown action")
     
-    logger.info(f"Celery Task [{self.request.id}] received PR #{pr_number} action '{action}' on {repo}")
+    logger.info("Celery Task [%s] received PR #%s action '%s' on %s", task.request.id, pr_number, action, repo)
     
     try:
         # Re-use the existing architectural approach, just wrap the async execute
         # method in a fresh sync entry point event loop
-        strategy = PullRequestStrategy()
+        strategy = get_strategy()
         
-        logger.info(f"Celery Task [{self.request.id}] starting async execution loop...")
-        asyncio.run(strategy.execute(payload))
-        logger.info(f"Celery Task [{self.request.id}] successfully finished PR #{pr_number}.")
+        logger.info("Celery Task [%s] starting async execution loop...", task.request.id)
+        # The "Pull Request Opened" message went out on the first attempt
+        asyncio.run(_execute(strategy, payload, announce=task.request.retries == 0))
+        logger.info("Celery Task [%s] successfully finished PR #%s.", task.request.id, pr_number)
+        timer = profiling.current_timer()
+        return timer.summary() if timer else None
+
+    except ReviewDeferred as deferred:
+        # The repo or installation budget is exhausted; try again once it has refilled
+        logger.info("Celery Task [%s] deferring PR #%s for %.0fs", task.request.id, pr_number, deferred.retry_after)
+        raise task.retry(
+            exc=deferred, countdown=deferred.retry_after, max_retries=task.request.retries + 1,
+            kwargs={**(task.request.kwargs or {}), "deferrals": deferrals + 1},
+        )
 
     except SoftTimeLimitExceeded as timeout_exc:
         # A soft limit indicates the 5-minute threshold has triggered. Log aggressively
         logger.warning(
-            f"Celery Task [{self.request.id}] gracefully exiting due to SoftTimeLimitExceeded! "
-            f"Review for PR #{pr_number} took longer than 300 seconds."
+            "Celery Task [%s] gracefully exiting due to SoftTimeLimitExceeded! "
+            "Review for PR #%s took longer than 300 seconds.", task.request.id, pr_number
         )
-        raise timeout_exc
+        raise _retry_error(task, timeout_exc, deferrals)
         
     except Exception as e:
-        logger.error(f"Celery Task [{self.request.id}] failed processing PR #{pr_number}: {str(e)}", exc_info=True)
-        # Reraising the exception kicks off the `autoretry_for` logic automatically
-        raise e
+        logger.error("Celery Task [%s] failed processing PR #%s: %s", task.request.id, pr_number, e, exc_info=True)
+        raise _retry_error(task, e, deferrals)
+
+
+@shared_task(name="app.tasks.review.process_pull_request_review", **REVIEW_TASK_OPTIONS)
+def process_pull_request_review(self, payload: dict, deferrals: int = 0) -> dict | None:
+    """
+    Synchronous Celery task that processes a GitHub pull request event.
+    It encapsulates the existing async PullRequestStrategy using an event loop.
+    Enqueued by the API directly when review lanes are disabled or unreachable.
+    Returns the per-stage timing summary of the review.
+    """
+    return _review(self, payload, deferrals)
+
+
+@shared_task(name="app.tasks.review.process_next_review", **REVIEW_TASK_OPTIONS)
+def process_next_review(self, deferrals: int = 0) -> dict | None:
+    """
+    Lane ticket enqueued by the API once per queued review. Claims whichever job the
+    review scheduler picks next and runs it; retries and deferrals keep the task ID and
+    so resume the same job.
+    """
+    job = asyncio.run(review_scheduler.claim(self.request.id))
+    if job is None:
+        logger.warning("Celery Task [%s] found no queued review to claim", self.request.id)
+        return None
+    logger.info(
+        "Celery Task [%s] claimed job %s of %s from the %s lane (cost %s, %s)",
+        self.request.id, job.id, job.tenant, job.lane, job.cost, job.reason,
+    )
+
+    try:
+        summary = _review(self, job.payload, deferrals)
+    except Retry:
+        # Deferred or failed with retries left: the job stays attached to this ticket
+        raise
+    except Exception:
+        asyncio.run(review_scheduler.complete(self.request.id, job))
+        raise
+    asyncio.run(review_scheduler.complete(self.request.id, job))
+    return summary
@@ -0,0 +1,9 @@
+"""
+Offline benchmarking tools for the webhook pipeline.
+
+    python -m benchmarks.replay corpus.jsonl.gz --rate 50 --count 1000
+    python -m benchmarks.fake_github --port 9100
+    python -m benchmarks.micro --compare baseline.json
+
+Nothing here is imported by the application.
+"""
@@ -0,0 +1,304 @@
+"""
+Local stand-in for the GitHub REST endpoints the review pipeline calls.
+
+    python -m benchmarks.fake_github --port 9100 --latency-ms 80 --files 12 --error-rate 0.01
+
+Then run the API and worker with:
+
+    GITHUB_API_URL=http://127.0.0.1:9100
+    AI_PROVIDER=fake                      # see app/services/ai/fake.py
+    eval "$(python -m benchmarks.fake_github --print-env)"   # throwaway GITHUB_APP_ID / GITHUB_PRIVATE_KEY
+
+Covered endpoints: installation lookup, installation access tokens, PR files (paginated with
+a Link header like GitHub's), blobs of the listed files, PR reviews (refused with a 422 when an
+inline comment is outside the diff) and commit statuses. `GET /_fake/stats` returns request counts per endpoint and status.
+
+Every response carries X-RateLimit-* headers from a shared budget of --rate-limit requests per
+--rate-window seconds; once it is spent the server answers 403 with remaining=0, as GitHub does.
+Faults are injected independently per request: --throttle-rate answers 429 with Retry-After,
+--error-rate answers 502. Latency is log-normal with mean --latency-ms. Generated files are
+deterministic per (repository, PR number), so runs are reproducible.
+"""
+import argparse
+import asyncio
+import base64
+import hashlib
+import math
+import random
+import time
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import JSONResponse
+from starlette.routing import Match
+
+from app.services.github.diff_index import DiffIndex
+
+
+@dataclass
+class FakeGitHubConfig:
+    latency_ms: float = 50.0
+    latency_sigma: float = 0.5
+    rate_limit: int = 5000
+    rate_window: float = 3600.0
+    throttle_rate: float = 0.0
+    retry_after: int = 1
+    error_rate: float = 0.0
+    files: int = 5
+    patch_lines: int = 40
+    seed: Optional[int] = None
+
+
+class RateLimitBudget:
+    """Shared primary rate limit; the counter resets at the end of each window."""
+
+    def __init__(self, limit: int, window: float):
+        self.limit = limit
+        self.window = window
+        self.used = 0
+        self.reset_at = time.time() + window
+
+    def take(self) -> bool:
+        now = time.time()
+        if now >= self.reset_at:
+            self.used = 0
+            self.reset_at = now + self.window
+        if self.used >= self.limit:
+            return False
+        self.used += 1
+        return True
+
+    def headers(self) -> Dict[str, str]:
+        return {
+            "X-RateLimit-Limit": str(self.limit),
+            "X-RateLimit-Remaining": str(max(0, self.limit - self.used)),
+            "X-RateLimit-Used": str(self.used),
+            "X-RateLimit-Reset": str(int(self.reset_at)),
+            "X-RateLimit-Resource": "core",
+        }
+
+
+def installation_id_for(owner: str, repo: str) -> int:
+    return int(hashlib.sha256(f"{owner}/{repo}".encode()).hexdigest()[:7], 16)
+
+
+def endpoint_of(app: FastAPI, request: Request) -> str:
+    """Route template of a request (routing hasn't run yet inside the middleware)."""
+    for route in app.router.routes:
+        match, _ = route.matches(request.scope)
+        if match == Match.FULL:
+            return f"{request.method} {route.path}"
+    return f"{request.method} {request.url.path}"
+
+
+# Unchanged code around each generated hunk, so blobs hold more than the patch
+# (the hunk sits in a class body, so there is an enclosing scope to extract)
+FILE_HEADER = [
+    "import logging", "", "from app.compute import compute", "", "logger = logging.getLogger(__name__)", "", "",
+    "class Handlers:", '    """Request handlers."""', "",
+]
+FILE_FOOTER = ["", "    def close(self):", "        logging.shutdown()", "", "", "def teardown():", "    Handlers().close()"]
+
+
+def git_blob_sha(content: bytes) -> str:
+    return hashlib.sha1(b"blob %d\0" % len(content) + content).hexdigest()
+
+
+def generate_files(config: FakeGitHubConfig, owner: str, repo: str, number: int) -> List[Dict[str, Any]]:
+    """Deterministic changed files shaped like GET /pulls/{n}/files entries, plus their head `content`."""
+    rng = random.Random(f"{owner}/{repo}#{number}")
+    files = []
+    for i in range(config.files):
+        filename = f"src/module_{i}/{rng.choice(['service', 'handlers', 'models', 'utils'])}.py"
+        lines = []
+        for n in range(config.patch_lines):
+            name = f"value_{rng.randrange(1000)}"
+            code = rng.choice([
+                f"def handle_{n}(request):",
+                f"    {name} = request.get('{name}')",
+                f"    if {name} is None:",
+                f"        raise ValueError('{name} missing')",
+                f"    return compute({name}, limit={rng.randrange(100)})",
+            ])
+            lines.append(("+" if rng.random() < 0.7 else " ") + "    " + code)
+        additions = sum(1 for line in lines if line.startswith("+"))
+        start = len(FILE_HEADER) + 1
+        lines.insert(0, f"@@ -{start},{len(lines) - additions} +{start},{len(lines)} @@")
+        content = "\n".join(FILE_HEADER + [line[1:] for line in lines[1:]] + FILE_FOOTER) + "\n"
+        files.append({
+            "sha": git_blob_sha(content.encode()),
+            "filename": filename,
+            "status": "modified",
+            "additions": additions,
+            "deletions": 0,
+            "changes": additions,
+            "patch": "\n".join(lines),
+            "content": content,
+        })
+    return files
+
+
+def create_app(config: FakeGitHubConfig) -> FastAPI:
+    app = FastAPI(title="Fake GitHub API", docs_url=None, redoc_url=None)
+    budget = RateLimitBudget(config.rate_limit, config.rate_window)
+    rng = random.Random(config.seed)
+    counts: Counter = Counter()
+    # Head blobs of every file listed so far, by SHA
+    blobs: Dict[str, bytes] = {}
+
+    @app.middleware("http")
+    async def simulate(request: Request, call_next) -> Response:
+        if request.url.path.startswith("/_fake"):
+            return await call_next(request)
+
+        endpoint = endpoint_of(app, request)
+        mean = config.latency_ms / 1000
+        if mean > 0:
+            sigma = config.latency_sigma
+            await asyncio.sleep(rng.lognormvariate(math.log(mean) - sigma ** 2 / 2, sigma) if sigma > 0 else mean)
+
+        if not request.headers.get("Authorization", "").startswith("Bearer "):
+            response: Response = JSONResponse({"message": "Requires authentication"}, status_code=401)
+        elif not budget.take():
+            response = JSONResponse({"message": "API rate limit exceeded"}, status_code=403)
+        elif rng.random() < config.throttle_rate:
+            response = JSONResponse(
+                {"message": "You have exceeded a secondary rate limit"}, status_code=429,
+                headers={"Retry-After": str(config.retry_after)},
+            )
+        elif rng.random() < config.error_rate:
+            response = JSONResponse({"message": "Server Error"}, status_code=502)
+        else:
+            response = await call_next(request)
+
+        response.headers.update(budget.headers())
+        counts[(endpoint, response.status_code)] += 1
+        return response
+
+    @app.get("/app")
+    async def github_app():
+        return {"id": 1, "slug": "chief-fake", "name": "Chief (fake)"}
+
+    @app.get("/repos/{owner}/{repo}/installation")
+    async def installation(owner: str, repo: str):
+        return {"id": installation_id_for(owner, repo), "app_id": 1, "target_type": "Organization"}
+
+    @app.post("/app/installations/{installation_id}/access_tokens", status_code=201)
+    async def access_token(installation_id: int):
+        expires_at = datetime.now(timezone.utc) + timedelta(hours=1)
+        return {
+            "token": f"ghs_fake{installation_id}{rng.getrandbits(64):016x}",
+            "expires_at": expires_at.strftime("%Y-%m-%dT%H:%M:%SZ"),
+        }
+
+    @app.get("/repos/{owner}/{repo}/pulls/{number}/files")
+    async def pull_files(request: Request, response: Response, owner: str, repo: str, number: int,
+                         per_page: int = 30, page: int = 1):
+        per_page = max(1, min(per_page, 100))
+        files = []
+        for file in generate_files(config, owner, repo, number):
+            blobs[file["sha"]] = file.pop("content").encode()
+            files.append(file)
+        last = max(1, math.ceil(len(files) / per_page))
+        base = str(request.url.remove_query_params(["page", "per_page"]))
+        links = []
+        if page < last:
+            links.append(f'<{base}?per_page={per_page}&page={page + 1}>; rel="next"')
+            links.append(f'<{base}?per_page={per_page}&page={last}>; rel="last"')
+        if links:
+            response.headers["Link"] = ", ".join(links)
+        return files[(page - 1) * per_page:page * per_page]
+
+    @app.get("/repos/{owner}/{repo}/git/blobs/{sha}")
+    async def blob(request: Request, owner: str, repo: str, sha: str):
+        content = blobs.get(sha)
+        if content is None:
+            return JSONResponse({"message": "Not Found"}, status_code=404)
+        if "raw" in request.headers.get("Accept", ""):
+            return Response(content, media_type="application/vnd.github.raw")
+        return {"sha": sha, "size": len(content), "encoding": "base64", "content": base64.b64encode(content).decode()}
+
+    @app.post("/repos/{owner}/{repo}/pulls/{number}/reviews")
+    async def create_review(request: Request, owner: str, repo: str, number: int):
+        body = await request.json()
+        # Like GitHub, refuse the whole review if any inline comment is outside the diff
+        indexes = {f["filename"]: DiffIndex(f["patch"]) for f in generate_files(config, owner, repo, number)}
+        for comment in body.get("comments", []):
+            index = indexes.get(comment.get("path"))
+            if index is None or comment.get("line") not in (index.left if comment.get("side") == "LEFT" else index.right):
+                return JSONResponse(
+                    {"message": "Unprocessable Entity", "errors": ["Line could not be resolved"]}, status_code=422
+                )
+        return {
+            "id": rng.getrandbits(31), "state": body.get("event", "COMMENTED"), "body": body.get("body", ""),
+            "comments": len(body.get("comments", [])),
+        }
+
+    @app.post("/repos/{owner}/{repo}/statuses/{sha}", status_code=201)
+    async def create_status(request: Request, owner: str, repo: str, sha: str):
+        body = await request.json()
+        return {"id": rng.getrandbits(31), "state": body.get("state"), "context": body.get("context")}
+
+    @app.get("/_fake/stats")
+    async def stats():
+        return {
+            "requests": [
+                {"endpoint": endpoint, "status": status, "count": count}
+                for (endpoint, status), count in sorted(counts.items())
+            ],
+            "rate_limit": budget.headers(),
+        }
+
+    return app
+
+
+def print_env() -> None:
+    """Throwaway App credentials: the fake ignores the JWT, but GitHubAppAuth must sign one."""
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import rsa
+
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    pem = key.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    ).decode()
+    print("export GITHUB_APP_ID=1")
+    print(f"export GITHUB_PRIVATE_KEY='{pem.strip().replace(chr(10), chr(92) + 'n')}'")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="mean response latency")
+    parser.add_argument("--latency-sigma", type=float, default=0.5, help="log-normal spread (0 = constant)")
+    parser.add_argument("--rate-limit", type=int, default=5000, help="requests per window before 403s")
+    parser.add_argument("--rate-window", type=float, default=3600.0, help="rate limit window in seconds")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="fraction of requests answered 429")
+    parser.add_argument("--retry-after", type=int, default=1, help="Retry-After seconds sent with a 429")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered 502")
+    parser.add_argument("--files", type=int, default=5, help="changed files per pull request")
+    parser.add_argument("--patch-lines", type=int, default=40, help="lines per generated patch")
+    parser.add_argument("--seed", type=int, default=None, help="seed for latency and fault injection")
+    parser.add_argument("--print-env", action="store_true", help="print throwaway App credentials and exit")
+    args = parser.parse_args()
+
+    if args.print_env:
+        print_env()
+        return
+
+    import uvicorn
+
+    config = FakeGitHubConfig(
+        latency_ms=args.latency_ms, latency_sigma=args.latency_sigma,
+        rate_limit=args.rate_limit, rate_window=args.rate_window,
+        throttle_rate=args.throttle_rate, retry_after=args.retry_after, error_rate=args.error_rate,
+        files=args.files, patch_lines=args.patch_lines, seed=args.seed,
+    )
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Import-time budget for the API and worker entry points, measured with `python -X importtime`.
+
+    python -m benchmarks.importtime                          # app.main and app.tasks.review
+    python -m benchmarks.importtime --module app.main --budget-ms 400 --top 20
+    python -m benchmarks.importtime --env ENVIRONMENT=development
+
+Each module is imported in a fresh interpreter --repeat times (the first run also warms the
+OS file cache and the bytecode cache, so it is discarded). Reported per module:
+the median cumulative import time of the module itself, the median wall time of the whole
+interpreter start + import, and the packages with the most self time.
+
+Exits 1 if a median import exceeds --budget-ms (default 1500, 0 disables) or a module listed in
+--forbid got imported: by default the AI provider SDKs, which only the configured provider should
+pull in, lazily, and for app.main also the Celery app, which the API only loads when it first
+publishes a task.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_MODULES = ("app.main", "app.tasks.review")
+DEFAULT_FORBID = ("anthropic", "openai", "groq", "google.generativeai")
+# Added to --forbid for these modules only
+MODULE_FORBID = {"app.main": ("app.core.celery_app", "celery")}
+DEFAULT_BUDGET_MS = 1500.0
+# Settings the app refuses to start without, plus the log format used in deployments
+DEFAULT_ENV = {"SECRET_KEY": "importtime", "ENVIRONMENT": "production"}
+
+
+def measure(module: str, env: Dict[str, str], cwd: str) -> Tuple[float, Dict[str, Tuple[int, int]]]:
+    """One cold interpreter: returns (wall seconds, {module: (self us, cumulative us)})."""
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        env=env, cwd=cwd, capture_output=True, text=True,
+    )
+    wall = time.perf_counter() - started
+    if result.returncode != 0:
+        raise SystemExit(f"Importing {module} failed:\n{result.stderr[-2000:]}")
+
+    timings: Dict[str, Tuple[int, int]] = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        timings[name.strip()] = (int(self_us), int(cumulative_us))
+    return wall, timings
+
+
+def report(module: str, runs: List[Tuple[float, Dict[str, Tuple[int, int]]]], top: int, forbid: List[str]) -> Dict:
+    cumulative = [timings.get(module, (0, 0))[1] / 1000 for _, timings in runs]
+    walls = [wall * 1000 for wall, _ in runs]
+
+    by_package: Dict[str, List[int]] = defaultdict(list)
+    for _, timings in runs:
+        totals: Dict[str, int] = defaultdict(int)
+        for name, (self_us, _) in timings.items():
+            totals[name.split(".")[0]] += self_us
+        for package, total in totals.items():
+            by_package[package].append(total)
+    packages = sorted(
+        ((package, statistics.median(values) / 1000) for package, values in by_package.items()),
+        key=lambda item: -item[1],
+    )
+
+    imported = set(runs[0][1])
+    forbidden = [name for name in forbid if name in imported]
+    return {
+        "module": module,
+        "import_ms": statistics.median(cumulative),
+        "wall_ms": statistics.median(walls),
+        "modules_imported": len(imported),
+        "top_packages": packages[:top],
+        "forbidden_imported": forbidden,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", action="append", help="module to import (repeatable)")
+    parser.add_argument("--repeat", type=int, default=5, help="measured runs per module")
+    parser.add_argument("--top", type=int, default=12, help="packages to list by self time")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS, help="fail if a median import exceeds this (0 disables)")
+    parser.add_argument("--forbid", default=",".join(DEFAULT_FORBID), help="comma separated modules that must not be imported")
+    parser.add_argument("--env", action="append", default=[], help="extra KEY=VALUE for the child interpreter")
+    args = parser.parse_args()
+
+    env = {**os.environ, **DEFAULT_ENV, "PYTHONPATH": REPO_ROOT}
+    for item in args.env:
+        key, _, value = item.partition("=")
+        env[key] = value
+    forbid = [name for name in args.forbid.split(",") if name]
+
+    failed = False
+    # Run outside the repo: importing the app creates logs/ in the working directory
+    with tempfile.TemporaryDirectory() as cwd:
+        for module in args.module or DEFAULT_MODULES:
+            measure(module, env, cwd)
+            module_forbid = forbid + list(MODULE_FORBID.get(module, ()))
+            result = report(module, [measure(module, env, cwd) for _ in range(args.repeat)], args.top, module_forbid)
+
+            print(f"{module}: import {result['import_ms']:.1f}ms, interpreter + import {result['wall_ms']:.1f}ms, "
+                  f"{result['modules_imported']} modules")
+            for package, ms in result["top_packages"]:
+                print(f"  {package:<28} {ms:8.1f}ms self")
+            if result["forbidden_imported"]:
+                failed = True
+                print(f"  FORBIDDEN imports: {', '.join(result['forbidden_imported'])}")
+            if args.budget_ms and result["import_ms"] > args.budget_ms:
+                failed = True
+                print(f"  OVER BUDGET: {result['import_ms']:.1f}ms > {args.budget_ms:.0f}ms")
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
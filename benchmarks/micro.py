@@ -0,0 +1,299 @@
+"""
+Micro-benchmarks for the CPU-side stages of a pull request review.
+
+    python -m benchmarks.micro                              # run and print
+    python -m benchmarks.micro --save baseline.json         # store a baseline
+    python -m benchmarks.micro --compare baseline.json      # exit 1 on regressions
+    python -m benchmarks.micro --filter json --sizes large,huge
+
+Per fixture size (tiny to a 10k-line patch) it times what PullRequestStrategy does for every
+file: rendering the review and triage prompts, stripping ```json fences, json.loads on the
+answer, indexing the patch lines for inline comments, extracting the enclosing scopes, severity
+aggregation, building the review markdown and constructing PRFile from the GitHub payload. HMAC verification of the webhook body and signing the GitHub App JWT are timed
+once per size and once overall.
+
+Fixtures are generated deterministically (same seed, same bytes) so numbers from different
+commits are comparable. --fixtures DIR adds recorded pairs instead: `<name>.diff` holding a
+patch and `<name>.json` holding the raw model answer for it.
+
+Each benchmark is calibrated to run for about --min-time seconds per round; the reported
+time is the median per-call time over --rounds rounds. Baselines are machine specific:
+only compare runs from the same box and interpreter.
+"""
+import argparse
+import hashlib
+import hmac
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+# Benchmarks import app modules, whose settings need a secret; never used for anything real
+os.environ.setdefault("SECRET_KEY", "micro-benchmark")
+
+from app.middlewares.github.github_middleware import verify_signature  # noqa: E402
+from app.models.github import PRFile  # noqa: E402
+from app.services.ai.prompt import (  # noqa: E402
+    REVIEW_PROMPT_TEMPLATE,
+    TRIAGE_PROMPT_TEMPLATE,
+)
+from app.services.github.context_extractor import extract_context  # noqa: E402
+from app.services.github.diff_index import DiffIndex  # noqa: E402
+from app.services.github.review_report import ReviewReport, parse_review, strip_fences  # noqa: E402
+
+# Added lines per generated patch
+SIZES = {"tiny": 5, "small": 50, "medium": 500, "large": 2_000, "huge": 10_000}
+
+CONTEXT = {
+    "repo": "acme/payments", "title": "Refactor settlement batching", "filename": "src/settlement/batch.py",
+    "surrounding_code": "(not available)",
+}
+
+
+@dataclass
+class Fixture:
+    name: str
+    patch: str
+    answer: str
+
+
+@dataclass
+class Timing:
+    name: str
+    median: float
+    best: float
+    loops: int
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {"median": self.median, "min": self.best, "loops": self.loops}
+
+
+def generate_patch(lines: int, rng: random.Random) -> str:
+    out = [f"@@ -1,{lines // 4} +1,{lines} @@"]
+    for n in range(lines):
+        indent = "    " * rng.randrange(3)
+        name = f"amount_{rng.randrange(10_000)}"
+        out.append("+" + indent + rng.choice([
+            f"def settle_{n}(batch, {name}):",
+            f"{name} = batch.total() - fees.get('{name}', 0)",
+            f"if {name} > LIMIT and not batch.approved:",
+            f"    raise SettlementError(f'batch {{batch.id}} over limit: {{{name}}}')",
+            f"rows = db.execute('SELECT * FROM ledger WHERE id = %s', ({name},))",
+            f"return [r for r in rows if r.amount != {rng.randrange(100)}]",
+        ]))
+    return "\n".join(out)
+
+
+def generate_answer(patch_lines: int, rng: random.Random) -> str:
+    """Model answer with one finding per ~50 patch lines, wrapped in a fence like real output often is."""
+    severities = ("CRITICAL", "HIGH", "MEDIUM", "LOW", "SUGGESTION")
+    issues = [
+        {
+            "severity": rng.choice(severities),
+            "line": rng.randrange(1, patch_lines + 1),
+            "title": f"Unchecked amount in settlement path {i}",
+            "description": "The amount is read from the batch without validation. "
+                           "A negative total settles money in the wrong direction.",
+            "suggestion": "if amount < 0:\n    raise SettlementError('negative amount')",
+        }
+        for i in range(max(1, patch_lines // 50))
+    ]
+    answer = {
+        "summary": "Refactors settlement batching. Amounts are not validated before settling.",
+        "file_type": "BACKEND",
+        "files": [{"filename": CONTEXT["filename"], "issues": issues}],
+        "verdict": "REQUEST_CHANGES",
+        "score": 35,
+    }
+    return "```json\n" + json.dumps(answer, indent=2) + "\n```"
+
+
+def build_fixtures(sizes: List[str], fixtures_dir: Optional[str]) -> List[Fixture]:
+    fixtures = []
+    for name in sizes:
+        rng = random.Random(f"micro-{name}")
+        lines = SIZES[name]
+        fixtures.append(Fixture(name, generate_patch(lines, rng), generate_answer(lines, rng)))
+    if fixtures_dir:
+        for entry in sorted(os.listdir(fixtures_dir)):
+            stem, ext = os.path.splitext(entry)
+            answer_path = os.path.join(fixtures_dir, stem + ".json")
+            if ext != ".diff" or not os.path.exists(answer_path):
+                continue
+            with open(os.path.join(fixtures_dir, entry), encoding="utf-8") as f:
+                patch = f.read()
+            with open(answer_path, encoding="utf-8") as f:
+                fixtures.append(Fixture(f"recorded:{stem}", patch, f.read()))
+    return fixtures
+
+
+def bench(fn: Callable[[], Any], rounds: int, min_time: float) -> tuple:
+    """Calibrate a loop count that runs for ~min_time, then time `rounds` rounds of it."""
+    loops = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_time or loops >= 1_000_000:
+            break
+        loops = max(loops * 2, int(loops * min_time / max(elapsed, 1e-9)))
+
+    per_call = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        per_call.append((time.perf_counter() - started) / loops)
+    return statistics.median(per_call), min(per_call), loops
+
+
+def stages(fixture: Fixture) -> Dict[str, Callable[[], Any]]:
+    """One closure per pipeline stage, each doing the same work the strategy does for one file."""
+    patch, answer = fixture.patch, fixture.answer
+    stripped = strip_fences(answer)
+    review_data = parse_review(answer)
+    file_data = {
+        "filename": CONTEXT["filename"], "status": "modified", "patch": patch,
+        "additions": patch.count("\n+"), "deletions": patch.count("\n-"), "changes": patch.count("\n"),
+    }
+    body = json.dumps({"action": "opened", "pull_request": {"body": patch}}).encode()
+    secret = b"micro-benchmark-secret"
+    signature = "sha256=" + hmac.new(secret, body, hashlib.sha256).hexdigest()
+
+    index = DiffIndex(patch)
+    # The head file as far as the patch shows it
+    source = "\n".join(line[1:] for line in patch.splitlines() if not line.startswith(("@@", "-", "\\")))
+
+    def aggregate() -> ReviewReport:
+        report = ReviewReport()
+        report.add(CONTEXT["filename"], review_data, index)
+        return report
+
+    report = aggregate()
+
+    return {
+        "prompt.review": lambda: REVIEW_PROMPT_TEMPLATE.format(diff=patch, **CONTEXT),
+        "prompt.triage": lambda: TRIAGE_PROMPT_TEMPLATE.format(diff=patch, **CONTEXT),
+        "answer.strip_fences": lambda: strip_fences(answer),
+        "answer.json_loads": lambda: json.loads(stripped),
+        "diff.index": lambda: DiffIndex(patch),
+        "context.extract": lambda: extract_context(CONTEXT["filename"], source, patch, 1500),
+        "report.aggregate": aggregate,
+        "report.markdown": lambda: (report.body(), report.severity_breakdown()),
+        "github.pr_file": lambda: PRFile(**file_data),
+        "webhook.hmac": lambda: verify_signature(secret, body, signature),
+    }
+
+
+def jwt_stage() -> Callable[[], Any]:
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import rsa
+
+    from app.services.github_auth import GitHubAppAuth
+
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    auth = GitHubAppAuth()
+    auth.app_id = "1"
+    auth.private_key = key.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    ).decode()
+    return auth._generate_jwt
+
+
+def run(args: argparse.Namespace) -> List[Timing]:
+    sizes = args.sizes.split(",") if args.sizes else list(SIZES)
+    unknown = [s for s in sizes if s not in SIZES]
+    if unknown:
+        raise SystemExit(f"Unknown sizes {unknown}, choose from {', '.join(SIZES)}")
+
+    cases: Dict[str, Callable[[], Any]] = {}
+    for fixture in build_fixtures(sizes, args.fixtures):
+        for stage, fn in stages(fixture).items():
+            cases[f"{stage}[{fixture.name}]"] = fn
+    cases["github.jwt_sign"] = jwt_stage()
+
+    timings = []
+    for name, fn in cases.items():
+        if args.filter and args.filter not in name:
+            continue
+        median, best, loops = bench(fn, args.rounds, args.min_time)
+        timings.append(Timing(name, median, best, loops))
+        if not args.quiet:
+            print(f"  {name:<40} {format_time(median):>10}  (min {format_time(best)}, {loops} loops)", flush=True)
+    return timings
+
+
+def format_time(seconds: float) -> str:
+    for unit, scale in (("s", 1.0), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.2f}{unit}"
+    return f"{seconds / 1e-9:.0f}ns"
+
+
+def environment() -> Dict[str, str]:
+    return {
+        "python": sys.version.split()[0],
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+    }
+
+
+def save(path: str, timings: List[Timing]) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"environment": environment(), "results": {t.name: t.as_dict() for t in timings}}, f, indent=2)
+    print(f"Saved {len(timings)} results to {path}")
+
+
+def compare(path: str, timings: List[Timing], threshold: float) -> bool:
+    """Print the change against a stored baseline. Returns False if any median got slower than threshold."""
+    with open(path, encoding="utf-8") as f:
+        baseline = json.load(f)
+    if baseline.get("environment") != environment():
+        print(f"Warning: baseline was recorded on {baseline.get('environment')}, not this environment")
+
+    ok = True
+    print(f"\n  {'benchmark':<40} {'baseline':>10} {'current':>10} {'change':>8}")
+    for t in timings:
+        previous = baseline["results"].get(t.name)
+        if previous is None:
+            print(f"  {t.name:<40} {'-':>10} {format_time(t.median):>10} {'new':>8}")
+            continue
+        change = t.median / previous["median"] - 1
+        flag = ""
+        if change > threshold:
+            flag, ok = "  REGRESSION", False
+        elif change < -threshold:
+            flag = "  faster"
+        print(f"  {t.name:<40} {format_time(previous['median']):>10} {format_time(t.median):>10} {change:>+8.1%}{flag}")
+    return ok
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="", help=f"comma separated subset of {', '.join(SIZES)}")
+    parser.add_argument("--filter", default="", help="only run benchmarks whose name contains this")
+    parser.add_argument("--fixtures", default="", help="directory of recorded <name>.diff / <name>.json pairs")
+    parser.add_argument("--rounds", type=int, default=7, help="timed rounds per benchmark")
+    parser.add_argument("--min-time", type=float, default=0.1, help="seconds per round used for calibration")
+    parser.add_argument("--save", default="", help="write the results to this baseline file")
+    parser.add_argument("--compare", default="", help="compare against this baseline file")
+    parser.add_argument("--threshold", type=float, default=0.10, help="relative slowdown counted as a regression")
+    parser.add_argument("--quiet", action="store_true", help="only print the comparison")
+    args = parser.parse_args()
+
+    timings = run(args)
+    if args.save:
+        save(args.save, timings)
+    if args.compare and not compare(args.compare, timings, args.threshold):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
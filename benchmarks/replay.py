@@ -0,0 +1,239 @@
+"""
+Replay a recorded webhook corpus against the app and report latency and throughput.
+
+Record a corpus by running the API with WEBHOOK_RECORD_PATH=corpus.jsonl.gz, then:
+
+    # In-process: drives the ASGI app directly (lifespan included), no socket involved
+    python -m benchmarks.replay corpus.jsonl.gz --rate 50 --count 2000
+
+    # Over a local socket, plus the worker's metrics for queue wait and review time
+    python -m benchmarks.replay corpus.jsonl.gz --target http://127.0.0.1:8000 \
+        --worker-metrics http://127.0.0.1:9808/metrics --settle 300
+
+Requests are sent open-loop at --rate: each one is scheduled independently of earlier
+responses, and latency is measured from its scheduled send time. A stalled server therefore
+shows up as latency instead of silently lowering the offered load.
+Every delivery is re-signed with --secret (default: SECRET_KEY) and gets a fresh
+X-GitHub-Delivery ID so deduplication doesn't drop the replays.
+
+Everything runs offline; point the app and worker at a local Redis to exercise the Celery leg,
+and at the fakes so reviews don't touch GitHub or a model API:
+`python -m benchmarks.fake_github` with GITHUB_API_URL, and AI_PROVIDER=fake.
+"""
+import argparse
+import asyncio
+import gzip
+import hashlib
+import hmac
+import json
+import os
+import time
+import uuid
+from collections import Counter
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import httpx
+
+from benchmarks.stats import histogram_delta, parse_histogram, summarize, summarize_histogram
+
+# Mirrors app.models.github.REVIEW_ACTIONS without importing the app
+REVIEW_ACTIONS = ("opened", "synchronize", "reopened")
+
+
+@dataclass
+class Delivery:
+    event: str
+    headers: Dict[str, str]
+    body: bytes
+
+    @property
+    def triggers_review(self) -> bool:
+        if self.event != "pull_request":
+            return False
+        try:
+            return json.loads(self.body).get("action") in REVIEW_ACTIONS
+        except ValueError:
+            return False
+
+
+@dataclass
+class Result:
+    event: str
+    status: int
+    latency: float
+    review: bool
+
+
+def load_corpus(path: str, events: Optional[List[str]] = None) -> List[Delivery]:
+    opener = gzip.open if path.endswith(".gz") else open
+    deliveries = []
+    with opener(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            event = record["headers"].get("X-GitHub-Event", "")
+            if events and event not in events:
+                continue
+            deliveries.append(Delivery(event=event, headers=record["headers"], body=record["body"].encode()))
+    if not deliveries:
+        raise SystemExit(f"No deliveries to replay in {path}")
+    return deliveries
+
+
+def signed_headers(delivery: Delivery, secret: bytes) -> Dict[str, str]:
+    headers = dict(delivery.headers)
+    headers["X-GitHub-Delivery"] = str(uuid.uuid4())
+    headers["X-Hub-Signature-256"] = "sha256=" + hmac.new(secret, delivery.body, hashlib.sha256).hexdigest()
+    headers.setdefault("Content-Type", "application/json")
+    return headers
+
+
+@asynccontextmanager
+async def open_client(target: str) -> AsyncIterator[httpx.AsyncClient]:
+    if target != "inproc":
+        async with httpx.AsyncClient(base_url=target, timeout=30.0) as client:
+            yield client
+        return
+
+    # Imported lazily so HTTP mode doesn't need the app's settings
+    from app.main import app
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://replay", timeout=30.0) as client:
+            yield client
+
+
+async def scrape(url: Optional[str]) -> Optional[str]:
+    if not url:
+        return None
+    async with httpx.AsyncClient(timeout=10.0) as client:
+        response = await client.get(url)
+        response.raise_for_status()
+        return response.text
+
+
+async def replay(args: argparse.Namespace) -> Dict[str, Any]:
+    deliveries = load_corpus(args.corpus, args.events.split(",") if args.events else None)
+    secret = (args.secret or os.getenv("SECRET_KEY", "")).encode()
+    if not secret:
+        raise SystemExit("Pass --secret or set SECRET_KEY so deliveries can be signed")
+    path = args.path or f"/api/v{os.getenv('API_VERSION', 'v1')}/github/webhook"
+    count = args.count or int(args.duration * args.rate)
+
+    worker_before = await scrape(args.worker_metrics)
+    results: List[Result] = []
+    inflight = asyncio.Semaphore(args.concurrency)
+
+    async with open_client(args.target) as client:
+        async def send(delivery: Delivery, scheduled: float) -> None:
+            async with inflight:
+                try:
+                    response = await client.post(path, content=delivery.body, headers=signed_headers(delivery, secret))
+                    status = response.status_code
+                except httpx.HTTPError:
+                    status = 0
+            results.append(Result(delivery.event, status, time.perf_counter() - scheduled, delivery.triggers_review))
+
+        started = time.perf_counter()
+        tasks = []
+        for i in range(count):
+            scheduled = started + i / args.rate
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(send(deliveries[i % len(deliveries)], scheduled)))
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - started
+
+    ok = [r for r in results if 200 <= r.status < 300]
+    report: Dict[str, Any] = {
+        "target": args.target,
+        "offered_rate": args.rate,
+        "sent": len(results),
+        "elapsed_seconds": round(elapsed, 3),
+        "throughput_rps": round(len(ok) / elapsed, 2) if elapsed else 0.0,
+        "status_codes": dict(Counter(str(r.status) for r in results)),
+        "ingress_latency_seconds": summarize(r.latency for r in results),
+        "ingress_latency_by_event": {
+            event: summarize(r.latency for r in results if r.event == event)
+            for event in sorted({r.event for r in results})
+        },
+    }
+
+    if args.worker_metrics:
+        expected_reviews = sum(1 for r in ok if r.review)
+        report["worker"] = await wait_for_worker(args, worker_before, expected_reviews)
+    return report
+
+
+async def wait_for_worker(args: argparse.Namespace, before: str, expected_reviews: int) -> Dict[str, Any]:
+    """Poll the worker's metrics until every accepted review finished (or --settle runs out)."""
+    deadline = time.monotonic() + args.settle
+    while True:
+        after = await scrape(args.worker_metrics)
+        finished = parse_histogram(after, "review_duration_seconds")[2] - parse_histogram(before, "review_duration_seconds")[2]
+        if finished >= expected_reviews or time.monotonic() >= deadline:
+            break
+        await asyncio.sleep(1.0)
+
+    def delta(name: str, **match: str):
+        return summarize_histogram(histogram_delta(parse_histogram(after, name, match), parse_histogram(before, name, match)))
+
+    return {
+        "expected_reviews": expected_reviews,
+        "finished_reviews": finished,
+        "queue_wait_seconds": delta("task_queue_wait_seconds", task="process_pull_request_review"),
+        "review_duration_seconds": delta("review_duration_seconds"),
+        "provider_latency_seconds": delta("ai_provider_latency_seconds", kind="review"),
+    }
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    def row(label: str, s: Dict[str, Any]) -> str:
+        cells = " ".join(
+            f"{k}={v * 1000:.1f}ms" if isinstance(v, float) and k != "count" else f"{k}={v}"
+            for k, v in s.items() if v is not None
+        )
+        return f"  {label:<28} {cells}"
+
+    print(f"Replayed {report['sent']} deliveries at {report['offered_rate']}/s against {report['target']} "
+          f"in {report['elapsed_seconds']}s -> {report['throughput_rps']} accepted/s")
+    print(f"  status codes: {report['status_codes']}")
+    print(row("ingress", report["ingress_latency_seconds"]))
+    for event, summary in report["ingress_latency_by_event"].items():
+        print(row(f"ingress[{event}]", summary))
+    worker = report.get("worker")
+    if worker:
+        print(f"  worker: {worker['finished_reviews']:.0f}/{worker['expected_reviews']} reviews finished")
+        for name in ("queue_wait_seconds", "review_duration_seconds", "provider_latency_seconds"):
+            print(row(name, worker[name]))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("corpus", help="gzip JSONL corpus written with WEBHOOK_RECORD_PATH")
+    parser.add_argument("--target", default="inproc", help='"inproc" or a base URL such as http://127.0.0.1:8000')
+    parser.add_argument("--rate", type=float, default=20.0, help="deliveries per second")
+    parser.add_argument("--count", type=int, default=0, help="number of deliveries (default: rate * duration)")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds to run when --count is not given")
+    parser.add_argument("--concurrency", type=int, default=256, help="max requests in flight")
+    parser.add_argument("--events", default="", help="comma separated X-GitHub-Event filter")
+    parser.add_argument("--secret", default="", help="webhook secret used to re-sign (default: $SECRET_KEY)")
+    parser.add_argument("--path", default="", help="webhook path (default: /api/v$API_VERSION/github/webhook)")
+    parser.add_argument("--worker-metrics", default="", help="worker /metrics URL for queue wait and review time")
+    parser.add_argument("--settle", type=float, default=120.0, help="max seconds to wait for the worker to finish")
+    parser.add_argument("--json", default="", help="also write the report to this file")
+    args = parser.parse_args()
+
+    report = asyncio.run(replay(args))
+    print_report(report)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Latency statistics and Prometheus histogram helpers shared by the benchmark tools."""
+import math
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+_SAMPLE = re.compile(r'^(?P<name>[a-zA-Z_:][a-zA-Z0-9_:]*)(?:\{(?P<labels>[^}]*)\})?\s+(?P<value>\S+)')
+_LABEL = re.compile(r'(\w+)="((?:[^"\\]|\\.)*)"')
+
+# {le: cumulative count} for one histogram, with "+Inf" as float("inf")
+Buckets = Dict[float, float]
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(q * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize(values: Iterable[float]) -> Dict[str, float]:
+    ordered = sorted(values)
+    summary = {f"p{int(q * 100)}": percentile(ordered, q) for q in QUANTILES}
+    summary["max"] = ordered[-1] if ordered else 0.0
+    summary["mean"] = sum(ordered) / len(ordered) if ordered else 0.0
+    summary["count"] = len(ordered)
+    return summary
+
+
+def parse_histogram(text: str, name: str, match: Optional[Dict[str, str]] = None) -> Tuple[Buckets, float, float]:
+    """
+    Sum the `<name>_bucket` series of a Prometheus exposition, keeping only series whose labels
+    include `match`. Returns (cumulative buckets, sum, count).
+    """
+    match = match or {}
+    buckets: Buckets = {}
+    total = count = 0.0
+    for line in text.splitlines():
+        sample = _SAMPLE.match(line)
+        if not sample or not sample["name"].startswith(name):
+            continue
+        labels = dict(_LABEL.findall(sample["labels"] or ""))
+        if any(labels.get(k) != v for k, v in match.items()):
+            continue
+        value = float(sample["value"])
+        suffix = sample["name"][len(name):]
+        if suffix == "_bucket":
+            le = float("inf") if labels["le"] == "+Inf" else float(labels["le"])
+            buckets[le] = buckets.get(le, 0.0) + value
+        elif suffix == "_sum":
+            total += value
+        elif suffix == "_count":
+            count += value
+    return buckets, total, count
+
+
+def histogram_delta(after: Tuple[Buckets, float, float], before: Tuple[Buckets, float, float]) -> Tuple[Buckets, float, float]:
+    buckets = {le: value - before[0].get(le, 0.0) for le, value in after[0].items()}
+    return buckets, after[1] - before[1], after[2] - before[2]
+
+
+def histogram_quantile(q: float, buckets: Buckets) -> Optional[float]:
+    """Same linear interpolation as PromQL's histogram_quantile()."""
+    if not buckets:
+        return None
+    bounds = sorted(buckets)
+    total = buckets[bounds[-1]]
+    if total <= 0:
+        return None
+    rank = q * total
+    previous_bound, previous_count = 0.0, 0.0
+    for bound in bounds:
+        count = buckets[bound]
+        if count >= rank:
+            if math.isinf(bound):
+                # Above the highest finite bucket; the best we can say is "at least" that
+                return previous_bound
+            if count == previous_count:
+                return bound
+            return previous_bound + (bound - previous_bound) * (rank - previous_count) / (count - previous_count)
+        previous_bound, previous_count = bound, count
+    return previous_bound
+
+
+def summarize_histogram(delta: Tuple[Buckets, float, float]) -> Dict[str, Optional[float]]:
+    buckets, total, count = delta
+    summary: Dict[str, Optional[float]] = {f"p{int(q * 100)}": histogram_quantile(q, buckets) for q in QUANTILES}
+    summary["mean"] = total / count if count else None
+    summary["count"] = count
+    return summary
@@ -0,0 +1,25 @@
+import os
+
+# Settings refuse to load without a secret key
+os.environ.setdefault("SECRET_KEY", "test")
+
+import pytest
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    """Point get_redis() at an in-memory fakeredis server (Lua scripts need the lupa extra)."""
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("lupa")
+    from app.infrastructure import redis_client
+
+    server = fakeredis.FakeServer()
+
+    class FakeRedis:
+        @staticmethod
+        def from_url(url, **kwargs):
+            return fakeredis.FakeAsyncRedis(server=server)
+
+    monkeypatch.setattr(redis_client, "Redis", FakeRedis)
+    monkeypatch.setattr(redis_client, "_clients", redis_client.weakref.WeakKeyDictionary())
+    return server
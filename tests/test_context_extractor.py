@@ -0,0 +1,193 @@
+import pytest
+
+from app.services.github.context_extractor import (
+    brace_scopes,
+    extract_context,
+    find_scopes,
+    indent_scopes,
+    python_scopes,
+)
+
+PYTHON = """\
+import os
+
+
+class Service:
+    \"\"\"Handles requests.\"\"\"
+
+    @cached
+    def load(self, key):
+        value = os.environ.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def save(self, key, value):
+        os.environ[key] = value
+
+
+def main():
+    Service().load("HOME")
+"""
+
+JAVASCRIPT = """\
+const limit = 10;
+
+function handle(request) {
+  const body = request.body; // "}" in a comment
+  if (!body) {
+    throw new Error("missing } body");
+  }
+  return body;
+}
+
+class Store
+{
+  save(item) {
+    this.items.push(item);
+  }
+}
+"""
+
+RUBY = """\
+class Cart
+  def total
+    items.sum(&:price)
+  end
+
+  def empty?
+    items.empty?
+  end
+end
+"""
+
+
+def lines(source):
+    return source.splitlines()
+
+
+@pytest.mark.parametrize("hunk, expected", [
+    # Innermost def; its decorator is part of the scope
+    ((10, 11), [(7, 12, "def load")]),
+    ((15, 15), [(14, 15, "def save")]),
+    # Class body outside any method
+    ((5, 5), [(4, 15, "class Service")]),
+    ((19, 19), [(18, 19, "def main")]),
+    # Module level
+    ((1, 1), []),
+    # Hunk spanning two methods: the class holds both
+    ((11, 15), [(4, 15, "class Service")]),
+])
+def test_python_scopes(hunk, expected):
+    scopes = python_scopes(PYTHON, [hunk])
+    assert [(s.start, s.end, s.label) for s in scopes] == expected
+
+
+def test_python_that_does_not_parse_falls_back_to_indentation():
+    broken = PYTHON.replace("def save(self, key, value):", "def save(self, key, value)")
+    assert python_scopes(broken, [(15, 15)]) is None
+    scopes = find_scopes("service.py", broken, [(15, 15)])
+    assert [(s.start, s.end) for s in scopes] == [(14, 15)]
+
+
+@pytest.mark.parametrize("hunk, expected", [
+    # Braces in strings and comments are ignored
+    ((4, 4), [(3, 9, "function handle(request) {")]),
+    # Innermost block
+    ((6, 6), [(5, 7, "if (!body) {")]),
+    # Opening brace on its own line: the scope starts at the signature
+    ((13, 13), [(11, 16, "class Store")]),
+    ((14, 14), [(13, 15, "save(item) {")]),
+    # Top level
+    ((1, 1), []),
+    # Hunk opens the block itself and runs past it
+    ((3, 10), []),
+])
+def test_brace_scopes(hunk, expected):
+    scopes = brace_scopes(lines(JAVASCRIPT), [hunk])
+    assert [(s.start, s.end, s.label) for s in scopes] == expected
+
+
+@pytest.mark.parametrize("hunk, expected", [
+    # A closing "end" at the header's level belongs to the block
+    ((3, 3), [(2, 4, "def total")]),
+    ((7, 7), [(6, 8, "def empty?")]),
+    ((5, 6), [(1, 9, "class Cart")]),
+    # Only blank lines changed
+    ((5, 5), []),
+    ((1, 1), []),
+])
+def test_indent_scopes(hunk, expected):
+    scopes = indent_scopes(lines(RUBY), [hunk])
+    assert [(s.start, s.end, s.label) for s in scopes] == expected
+
+
+@pytest.mark.parametrize("filename, source, hunk, label", [
+    ("app/service.py", PYTHON, (10, 10), "def load"),
+    ("app/service.PYI", PYTHON, (10, 10), "def load"),
+    ("web/handler.js", JAVASCRIPT, (4, 4), "function handle(request) {"),
+    ("web/handler.ts", JAVASCRIPT, (4, 4), "function handle(request) {"),
+    ("lib/cart.rb", RUBY, (3, 3), "def total"),
+    ("README", RUBY, (3, 3), "def total"),
+])
+def test_find_scopes_picks_the_language_path(filename, source, hunk, label):
+    assert [s.label for s in find_scopes(filename, source, [hunk])] == [label]
+
+
+def patch(first, count):
+    return f"@@ -{first},{count} +{first},{count} @@\n" + "\n".join(" x" for _ in range(count))
+
+
+def test_extract_context_elides_lines_in_the_diff():
+    context = extract_context("service.py", PYTHON, patch(10, 2), 1000)
+    assert context.splitlines() == [
+        "# def load (lines 7-12)",
+        " 7 |     @cached",
+        " 8 |     def load(self, key):",
+        " 9 |         value = os.environ.get(key)",
+        "   | ... lines 10-11 are in the diff",
+        "12 |         return value",
+    ]
+
+
+def test_extract_context_keeps_the_outer_scope_once():
+    # Hunks in two methods plus one in the class body share the class scope
+    hunks = "\n".join([patch(5, 1), patch(9, 1), patch(15, 1)])
+    context = extract_context("service.py", PYTHON, hunks, 1000)
+    assert context.count("# ") == 1
+    assert context.startswith("# class Service (lines 4-15)")
+
+
+def test_extract_context_orders_sections_by_line():
+    context = extract_context("service.py", PYTHON, patch(15, 1) + "\n" + patch(10, 1), 1000)
+    headers = [line for line in context.splitlines() if line.startswith("# ")]
+    assert headers == ["# def load (lines 7-12)", "# def save (lines 14-15)"]
+
+
+@pytest.mark.parametrize("max_tokens, expected", [
+    (0, ""),
+    (-5, ""),
+    # Too small for the header plus one line
+    (5, ""),
+])
+def test_extract_context_budget_edges(max_tokens, expected):
+    assert extract_context("service.py", PYTHON, patch(10, 1), max_tokens) == expected
+
+
+def test_extract_context_truncates_a_scope_that_does_not_fit():
+    context = extract_context("service.py", PYTHON, patch(5, 1), 30)
+    rendered = context.splitlines()
+    assert rendered[0] == "# class Service (lines 4-15)"
+    assert rendered[-1] == "... rest of the scope omitted"
+    assert 2 < len(rendered) < 14
+    assert len(context) <= 30 * 4
+
+
+def test_extract_context_skips_scopes_the_diff_already_shows():
+    assert extract_context("service.py", PYTHON, patch(14, 2), 1000) == ""
+
+
+def test_extract_context_without_scopes():
+    assert extract_context("service.py", PYTHON, patch(1, 1), 1000) == ""
+    assert extract_context("service.py", "", patch(1, 1), 1000) == ""
+    assert extract_context("data.bin", "\x00\x01", "", 1000) == ""
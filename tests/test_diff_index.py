@@ -0,0 +1,66 @@
+import pytest
+
+from app.services.github.diff_index import DiffIndex
+
+PATCH = "\n".join([
+    "@@ -10,3 +10,4 @@ def handler(event):",
+    "     context = load(event)",
+    "-    run(context)",
+    "+    result = run(context)",
+    "+    log(result)",
+    "     return context",
+    "@@ -40,2 +41,2 @@ def other():",
+    "-    old()",
+    "+    new()",
+    "     done()",
+    "\\ No newline at end of file",
+])
+
+
+@pytest.mark.parametrize("line, expected", [
+    (10, (10, "RIGHT")),   # context line
+    (11, (11, "RIGHT")),   # added
+    (12, (12, "RIGHT")),   # added
+    (13, (13, "RIGHT")),   # context after the additions
+    (41, (41, "RIGHT")),   # second hunk
+    (42, (42, "RIGHT")),
+    ("11", (11, "RIGHT")),
+    (" 41 ", (41, "RIGHT")),
+    # Outside every hunk: would have been diff positions 1-11
+    (1, None),
+    (2, None),
+    (9, None),
+    (14, None),
+    (40, None),
+    (43, None),
+    (0, None),
+    (-1, None),
+    (None, None),
+    (True, None),
+    ("12a", None),
+    (11.0, None),
+])
+def test_anchor(line, expected):
+    assert DiffIndex(PATCH).anchor(line) == expected
+
+
+def test_hunks_cover_new_file_ranges():
+    assert DiffIndex(PATCH).hunks == [(10, 13), (41, 42)]
+
+
+def test_single_line_and_new_file_hunks():
+    index = DiffIndex("@@ -0,0 +1 @@\n+only line")
+    assert index.hunks == [(1, 1)]
+    assert index.anchor(1) == (1, "RIGHT")
+    assert index.anchor(2) is None
+
+
+def test_deleted_file_has_no_anchors():
+    index = DiffIndex("@@ -1,2 +0,0 @@\n-a\n-b")
+    assert index.right == set()
+    assert index.anchor(1) is None
+
+
+def test_lines_before_the_first_hunk_are_ignored():
+    index = DiffIndex("diff --git a/x b/x\n+++ b/x\n@@ -5 +5 @@\n-a\n+b")
+    assert index.right == {5}
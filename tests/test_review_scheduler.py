@@ -0,0 +1,133 @@
+import asyncio
+from collections import Counter
+
+import pytest
+
+from app.core.settings import settings
+from app.infrastructure.redis_client import get_redis
+from app.services.github.review_scheduler import ReviewScheduler
+
+
+def payload(tenant: str) -> dict:
+    return {"repository": {"full_name": tenant}}
+
+
+@pytest.fixture
+def scheduler(fake_redis, monkeypatch):
+    monkeypatch.setattr(settings, "REVIEW_DRR_QUANTUM", 100)
+    monkeypatch.setattr(settings, "REVIEW_LANE_MAX_WAIT_SECONDS", 0.0)
+    monkeypatch.setattr(settings, "REVIEW_EXPRESS_MAX_COST", 400)
+    return ReviewScheduler()
+
+
+async def drain(scheduler: ReviewScheduler) -> list:
+    """Claim and complete every queued job; returns the tenants in claim order."""
+    order = []
+    while True:
+        job = await scheduler.claim(f"ticket-{len(order)}")
+        if job is None:
+            return order
+        await scheduler.complete(f"ticket-{len(order)}", job)
+        order.append(job.tenant)
+
+
+async def active(lane: str) -> list:
+    return [tenant.decode() for tenant in await get_redis().lrange(f"reviews:lane:{lane}:active", 0, -1)]
+
+
+def test_busy_tenant_does_not_starve_others(scheduler):
+    async def run():
+        for _ in range(6):
+            await scheduler.submit(payload("acme/monorepo"), 100)
+        for _ in range(2):
+            await scheduler.submit(payload("acme/small"), 100)
+        return await drain(scheduler)
+
+    order = asyncio.run(run())
+    assert order[:4] == ["acme/monorepo", "acme/small", "acme/monorepo", "acme/small"]
+    assert Counter(order) == {"acme/monorepo": 6, "acme/small": 2}
+
+
+def test_tenant_weight_scales_share(scheduler):
+    scheduler.tenant_weights = {"acme/payments": 3}
+
+    async def run():
+        for _ in range(8):
+            await scheduler.submit(payload("acme/monorepo"), 100)
+            await scheduler.submit(payload("acme/payments"), 100)
+        return await drain(scheduler)
+
+    order = asyncio.run(run())
+    assert Counter(order[:8]) == {"acme/payments": 6, "acme/monorepo": 2}
+
+
+def test_quantum_is_charged_by_cost(scheduler):
+    async def run():
+        for _ in range(3):
+            await scheduler.submit(payload("acme/large"), 100)
+        for _ in range(20):
+            await scheduler.submit(payload("acme/cheap"), 10)
+        return await drain(scheduler)
+
+    order = asyncio.run(run())
+    # One quantum buys one large job or ten cheap ones
+    assert order[:12] == ["acme/large"] + ["acme/cheap"] * 10 + ["acme/large"]
+
+
+def test_cost_above_quantum_still_gets_a_turn(scheduler):
+    async def run():
+        await scheduler.submit(payload("acme/huge"), 350)
+        await scheduler.submit(payload("acme/huge"), 350)
+        await scheduler.submit(payload("acme/small"), 10)
+        return await drain(scheduler)
+
+    assert asyncio.run(run()) == ["acme/huge", "acme/small", "acme/huge"]
+
+
+def test_express_lane_goes_first(scheduler):
+    async def run():
+        await scheduler.submit(payload("acme/a"), 5000)
+        await scheduler.submit(payload("acme/b"), 10)
+        return await drain(scheduler)
+
+    assert asyncio.run(run()) == ["acme/b", "acme/a"]
+
+
+def test_retried_ticket_resumes_its_job(scheduler):
+    async def run():
+        first = await scheduler.submit(payload("acme/a"), 10)
+        await scheduler.submit(payload("acme/a"), 10)
+        claimed = await scheduler.claim("ticket")
+        resumed = await scheduler.claim("ticket")
+        return first, claimed, resumed
+
+    first, claimed, resumed = asyncio.run(run())
+    assert claimed.id == resumed.id == first.id
+    assert resumed.reason == "resumed"
+
+
+def test_cancel_removes_emptied_tenant_from_round_robin(scheduler):
+    async def run():
+        job = await scheduler.submit(payload("acme/c"), 10)
+        await scheduler.submit(payload("acme/d"), 10)
+        await scheduler.cancel(job)
+        after_cancel = await active("express")
+        await scheduler.submit(payload("acme/c"), 10)
+        return after_cancel, await active("express"), await get_redis().hlen("reviews:jobs")
+
+    after_cancel, after_resubmit, jobs = asyncio.run(run())
+    assert after_cancel == ["acme/d"]
+    assert after_resubmit == ["acme/d", "acme/c"]
+    assert jobs == 2
+
+
+def test_cancel_keeps_tenant_with_queued_jobs(scheduler):
+    async def run():
+        await scheduler.submit(payload("acme/c"), 10)
+        job = await scheduler.submit(payload("acme/c"), 10)
+        await scheduler.cancel(job)
+        return await active("express"), await drain(scheduler)
+
+    tenants, order = asyncio.run(run())
+    assert tenants == ["acme/c"]
+    assert order == ["acme/c"]